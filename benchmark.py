@@ -0,0 +1,1731 @@
+# =============================================================================
+#                           Preprocessing Benchmarks
+# =============================================================================
+#
+# The real data holds sensitive student identifiers, so the benchmarks run on
+#   synthetic data shaped like the csv files in `data/`.
+#
+# Usage:
+#   python benchmark.py                 Run every benchmark
+#   python benchmark.py binning ...     Run the named benchmarks
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.parse
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style
+
+import preprocessing
+
+# =============================================================================
+#                           Synthetic Data
+# =============================================================================
+
+school_years = ['Freshman', 'Sophomore', 'Junior', 'Senior', 'Alumni',
+                'Masters', 'Doctorate']
+colleges = ['School of Business Admin.', 'School of Health Sciences',
+            'School of Egr. and Comp. Sci.', 'Arts & Sci and School of Egr',
+            'School of Ed. and Human Svcs.', 'College of Arts and Sciences',
+            'University Programs', 'All Colleges', 'School of Medicine']
+majors = ['Accounting', 'Nursing', 'Computer Science', 'Biology', 'Art',
+          'Mechanical Engineering', 'History', 'Marketing']
+appointment_types = ['Walk-In Advising', 'Resume Review', 'Career Fair Prep',
+                     'Career Exploration', 'Internship Search',
+                     'Job Search Strategy', 'Graduate School', 'Mock Interview']
+event_categories = ['Academic', 'Career fairs', 'Conference', 'Employers',
+                    'General', 'Guidance', 'Hiring', 'Networking']
+event_names = ['Career Fair Prep Workshop', 'Resume Workshop',
+               'Networking Night', 'Employer Panel', 'Info Session']
+main_fairs = [
+    ('Fall Career Fair 2021', '2021-09-21', 'History,Art'),
+    ('Fall Career Fair 2022', '2022-09-20', 'Accounting,Computer Science'),
+    ('Winter Career Fair 2023', '2023-02-08', 'Nursing,Biology'),
+    ('Fall Career Fair 2023', '2023-09-19', 'Computer Science,Biology,Art'),
+    ('Winter Career Fair 2024', '2024-02-07', 'Accounting,Marketing'),
+]
+other_fairs = [
+    ('Part-time Job Fair 2022', '2022-10-05'),
+    ('Graduate School Fair 2023', '2023-03-01'),
+    ('Part-time Job Fair 2023', '2023-10-04'),
+]
+
+
+def make_raw_data(n_students: int = 2000, seed: int = 0) -> dict:
+    """
+    Generates synthetic raw data with the same columns and quirks as the csv
+      files (Yes/No strings, '1,000' counts, comma separated lists, nulls).
+
+    Args:
+        n_students (int): The number of students to generate.
+        seed (int): The random seed.
+
+    Returns:
+        dict: The raw DataFrames keyed by csv file name (without extension).
+    """
+    rng = np.random.default_rng(seed)
+    stu_ids = np.arange(100000, 100000 + n_students)
+
+    def yes_no(n):
+        return rng.choice(np.array(['Yes', 'No', None], dtype=object), n,
+                          p=[0.4, 0.5, 0.1])
+
+    def dates(n, start, end, null_rate=0.05):
+        seconds = rng.integers(pd.Timestamp(start).value // 10**9,
+                               pd.Timestamp(end).value // 10**9, n)
+        values = pd.to_datetime(seconds, unit='s').strftime('%Y-%m-%d')
+        values = values.to_numpy(dtype=object)
+        values[rng.random(n) < null_rate] = None
+        return values
+
+    def lists(options, n, max_items, null_rate=0.1):
+        values = np.empty(n, dtype=object)
+        for i in range(n):
+            if rng.random() >= null_rate:
+                values[i] = ','.join(rng.choice(
+                    options, rng.integers(1, max_items + 1), replace=False))
+        return values
+
+    def counts(n, high):
+        values = rng.integers(0, high, n).astype(object)
+        values[::5] = [f'{value:,}' for value in values[::5]]
+        return values
+
+    gpa = rng.uniform(0.5, 4.0, n_students).round(2).astype(object)
+    gpa[rng.random(n_students) < 0.2] = None
+    gpa[::7] = [str(value) if value is not None else None
+                for value in gpa[::7]]
+
+    student_data = pd.DataFrame({
+        'stu_id': stu_ids,
+        'stu_is_archived': yes_no(n_students),
+        'stu_is_activated': yes_no(n_students),
+        'stu_is_visible': yes_no(n_students),
+        'stu_is_work_study': yes_no(n_students),
+        'stu_is_profile_complete': yes_no(n_students),
+        'stu_grad_date': dates(n_students, '2015-01-01', '2030-01-01'),
+        'stu_creation_date': dates(n_students, '2014-01-01', '2024-01-01'),
+        'stu_login_date': dates(n_students, '2020-01-01', '2024-06-01'),
+        'stu_gpa': gpa,
+        'stu_majors': lists(majors, n_students, 2),
+        'stu_colleges': lists(colleges, n_students, 2),
+        'stu_school_year': lists(school_years, n_students, 2),
+    })
+
+    has_counts = stu_ids[rng.random(n_students) < 0.9]
+    student_counts_1 = pd.DataFrame({
+        'stu_id': has_counts,
+        'stu_applications': counts(len(has_counts), 30),
+        'stu_logins': counts(len(has_counts), 3000),
+        'stu_appointments': counts(len(has_counts), 15),
+    })
+    has_counts = stu_ids[rng.random(n_students) < 0.9]
+    student_counts_2 = pd.DataFrame({
+        'stu_id': has_counts,
+        'stu_attendances': counts(len(has_counts), 15),
+        'stu_work_experiences': rng.integers(0, 5, len(has_counts)),
+        'stu_experiences': rng.integers(0, 3, len(has_counts)),
+    })
+
+    has_appointments = stu_ids[rng.random(n_students) < 0.5]
+    appointment_data = pd.DataFrame({
+        'stu_id': has_appointments,
+        'appointment_types': lists(appointment_types, len(has_appointments),
+                                   4, null_rate=0.05),
+        'appointment_count': rng.integers(1, 10, len(has_appointments)),
+    })
+
+    career_fair_data = pd.DataFrame(
+        main_fairs,
+        columns=['career_fair_name', 'career_fair_date', 'career_fair_majors']
+    )
+
+    registrations = []
+    for name, date, _ in main_fairs:
+        registered = rng.choice(stu_ids, n_students // 4, replace=False)
+        registrations.append(pd.DataFrame({
+            'stu_id': registered,
+            'career_fair_name': name,
+            'career_fair_date': date,
+            'is_pre_registered': yes_no(len(registered)),
+            'is_checked_in': rng.choice(
+                np.array(['Yes', 'No', None], dtype=object),
+                len(registered), p=[0.3, 0.6, 0.1]),
+        }))
+    registration_data = pd.concat(registrations, ignore_index=True)
+
+    all_fairs = [(name, date) for name, date, _ in main_fairs] + other_fairs
+    fairs_per_student = rng.integers(0, 4, n_students)
+    fair_choices = rng.integers(0, len(all_fairs), fairs_per_student.sum())
+    student_fair_attendance = pd.DataFrame({
+        'stu_id': np.repeat(stu_ids, fairs_per_student),
+        'career_fair_name': [all_fairs[i][0] for i in fair_choices],
+        'career_fair_date': [all_fairs[i][1] for i in fair_choices],
+    }).drop_duplicates()
+
+    events_per_student = rng.integers(0, 10, n_students)
+    n_events = events_per_student.sum()
+    categories = lists(event_categories, n_events, 2, null_rate=0.05)
+    # Some exports separate categories with ', ' instead of ','
+    spaced = rng.random(n_events) < 0.5
+    categories[spaced] = [value.replace(',', ', ') if value else value
+                          for value in categories[spaced]]
+    student_event_attendance = pd.DataFrame({
+        'stu_id': np.repeat(stu_ids, events_per_student),
+        'event_name': rng.choice(event_names, n_events),
+        'event_type': 'Workshop',
+        'event_date': dates(n_events, '2021-01-01', '2024-03-01', 0.01),
+        'event_categories': categories,
+    })
+
+    return {
+        'appointment_data': appointment_data,
+        'career_fair_data': career_fair_data,
+        'registration_data': registration_data,
+        'student_data': student_data,
+        'student_counts_1': student_counts_1,
+        'student_counts_2': student_counts_2,
+        'student_fair_attendance': student_fair_attendance,
+        'student_event_attendance': student_event_attendance,
+    }
+
+
+# =============================================================================
+#                           Helpers
+# =============================================================================
+
+
+def time_call(func, *args, repeat: int = 3, **kwargs):
+    """
+    Times a function call, keeping the fastest of `repeat` runs.
+
+    Returns:
+        tuple: The best time in seconds and the result of the last call.
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func, *args, **kwargs):
+    """
+    Measures the peak memory allocated while running a function.
+
+    Returns:
+        tuple: The peak allocation in bytes and the result of the call.
+    """
+    tracemalloc.start()
+    try:
+        result = func(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def print_timing(label: str, seconds: float, baseline: float = None):
+    speedup = ''
+    if baseline is not None:
+        speedup = f' {Fore.GREEN}({baseline / seconds:.1f}x){Style.RESET_ALL}'
+    print(f'{Fore.BLUE}    {label: <32}{Fore.CYAN}{seconds * 1000: >10.1f} ms'
+          f'{speedup}{Style.RESET_ALL}')
+
+
+def print_memory(label: str, size: int, baseline: int = None):
+    reduction = ''
+    if baseline is not None:
+        reduction = f' {Fore.GREEN}({baseline / size:.1f}x){Style.RESET_ALL}'
+    print(f'{Fore.BLUE}    {label: <32}{Fore.CYAN}'
+          f'{size / 2**20: >10.1f} MB{reduction}{Style.RESET_ALL}')
+
+
+def student_fair_rows(raw_data: dict) -> pd.DataFrame:
+    """
+    Builds the (stu_id, career_fair_date) row for every student and fair.
+    """
+    fairs = raw_data['career_fair_data'][['career_fair_date']]
+    rows = pd.merge(raw_data['student_data'][['stu_id']], fairs, how='cross')
+    rows['career_fair_date'] = pd.to_datetime(rows['career_fair_date'])
+    return rows
+
+
+# =============================================================================
+#                           Benchmarks
+# =============================================================================
+
+
+def legacy_bins(data: pd.DataFrame, bin_specs: list) -> pd.DataFrame:
+    """
+    Bins the columns the way `clean_data` used to, with one `Series.apply`
+      lambda per bucket.
+    """
+    data = data.copy()
+    for column, edges, labels, closed in bin_specs:
+        for low, high, label in zip(edges[:-1], edges[1:], labels):
+            if closed == 'left':
+                data[label] = data[column].apply(
+                    lambda x, low=low, high=high: 1 if low <= x < high else 0)
+            else:
+                data[label] = data[column].apply(
+                    lambda x, low=low, high=high: 1 if low < x <= high else 0)
+    return data
+
+
+def benchmark_binning(n_rows: int = 500_000):
+    """
+    Compares the bin spec engine against the per-bucket lambdas.
+    """
+    print(f'{Fore.MAGENTA}\nBinning ({n_rows} rows){Style.RESET_ALL}')
+
+    rng = np.random.default_rng(0)
+    bin_specs = (preprocessing.count_bin_specs +
+                 preprocessing.date_bin_specs +
+                 preprocessing.gpa_bin_specs)
+    data = pd.DataFrame({
+        'stu_appointments': rng.integers(0, 15, n_rows),
+        'stu_applications': rng.integers(0, 30, n_rows),
+        'stu_logins': rng.integers(0, 3000, n_rows),
+        'stu_attendances': rng.integers(0, 15, n_rows),
+        'stu_work_experiences': rng.integers(0, 5, n_rows),
+        'stu_experiences': rng.integers(0, 3, n_rows),
+        'days_since_created': rng.integers(-100, 3000, n_rows),
+        'days_since_login': rng.integers(0, 365, n_rows),
+        'days_until_grad': rng.integers(-2000, 2000, n_rows),
+        'stu_gpa': rng.uniform(0.5, 4.0, n_rows),
+    })
+
+    legacy_time, expected = time_call(legacy_bins, data, bin_specs, repeat=1)
+    engine_time, result = time_call(
+        preprocessing.apply_bin_specs, data, bin_specs)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    print_timing('Series.apply lambdas', legacy_time)
+    print_timing('Bin spec engine', engine_time, legacy_time)
+
+
+def legacy_fair_history(
+    data: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_fair_attendance_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Counts the prior main/other fair attendances the way `clean_data` used
+      to, with a cross join of the attendances and the career fairs.
+    """
+    attendances = stu_fair_attendance_df.rename(columns={
+        'career_fair_name': 'attended_career_fair_name',
+        'career_fair_date': 'attended_career_fair_date'
+    })
+    attendances['attended_career_fair_date'] = pd.to_datetime(
+        attendances['attended_career_fair_date'])
+    simple_cf_df = career_fair_df[['career_fair_name', 'career_fair_date']]
+    simple_cf_df = simple_cf_df.assign(
+        career_fair_date=pd.to_datetime(simple_cf_df['career_fair_date']))
+    main_fair_names = simple_cf_df['career_fair_name'].unique()
+
+    cross = pd.merge(attendances, simple_cf_df, how='cross')
+    previous = cross[cross['career_fair_date'] >
+                     cross['attended_career_fair_date']]
+    is_main = previous['attended_career_fair_name'].isin(main_fair_names)
+
+    for column, attended in [('attended_main_fair_before', previous[is_main]),
+                             ('attended_other_fair_before',
+                              previous[~is_main])]:
+        counts = attended.groupby(['stu_id', 'career_fair_date']).agg(
+            {'attended_career_fair_date': 'count'}).reset_index()
+        counts = counts.rename(
+            columns={'attended_career_fair_date': column})
+        data = pd.merge(data, counts, on=['stu_id', 'career_fair_date'],
+                        how='left')
+        data[column] = data[column].fillna(0)
+    return data
+
+
+def asof_fair_history(
+    data: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_fair_attendance_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Counts the prior main/other fair attendances with `count_prior_events`.
+    """
+    fair_dates = pd.to_datetime(career_fair_df['career_fair_date'])
+    is_main = stu_fair_attendance_df['career_fair_name'].isin(
+        career_fair_df['career_fair_name']).to_numpy()
+    counts = preprocessing.count_prior_events(
+        data['stu_id'], data['career_fair_date'],
+        stu_fair_attendance_df['stu_id'],
+        stu_fair_attendance_df['career_fair_date'],
+        weights=np.column_stack([is_main, ~is_main]).astype(int))
+    fairs_on_date = data['career_fair_date'].map(
+        fair_dates.value_counts()).fillna(0).to_numpy()
+    return data.assign(
+        attended_main_fair_before=counts[:, 0] * fairs_on_date,
+        attended_other_fair_before=counts[:, 1] * fairs_on_date)
+
+
+def benchmark_fair_history(n_students: int = 50_000):
+    """
+    Compares the sorted as-of counts against the attendance x career fair
+      cross join, in time and peak memory.
+    """
+    print(f'{Fore.MAGENTA}\nFair attendance history ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    raw_data = make_raw_data(n_students)
+    data = student_fair_rows(raw_data)
+    args = (data, raw_data['career_fair_data'],
+            raw_data['student_fair_attendance'])
+
+    legacy_time, expected = time_call(legacy_fair_history, *args, repeat=1)
+    asof_time, result = time_call(asof_fair_history, *args)
+    legacy_peak, _ = peak_memory(legacy_fair_history, *args)
+    asof_peak, _ = peak_memory(asof_fair_history, *args)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+    print_timing('Cross join', legacy_time)
+    print_timing('Sorted as-of counts', asof_time, legacy_time)
+    print_memory('Cross join peak', legacy_peak)
+    print_memory('Sorted as-of counts peak', asof_peak, legacy_peak)
+
+
+def legacy_event_history(
+    data: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Counts the prior event attendances per category the way `clean_data`
+      used to, with a cross join of the events and the career fairs and a
+      filter, groupby and merge per category.
+    """
+    events = stu_event_attendance_df.assign(
+        event_date=pd.to_datetime(stu_event_attendance_df['event_date']),
+        event_categories=stu_event_attendance_df['event_categories'].apply(
+            lambda x: x.lower().strip().split(',') if isinstance(x, str)
+            else []))
+    categories = set(
+        str(category).strip().lower().replace(' ', '_')
+        for category in events['event_categories'].explode().unique())
+    simple_cf_df = career_fair_df[['career_fair_name', 'career_fair_date']]
+    simple_cf_df = simple_cf_df.assign(
+        career_fair_date=pd.to_datetime(simple_cf_df['career_fair_date']))
+
+    cross = pd.merge(events, simple_cf_df, how='cross')
+    previous = cross[cross['career_fair_date'] > cross['event_date']]
+
+    category_dfs = {
+        category: previous[previous['event_categories'].apply(
+            lambda x: category in x)]
+        for category in categories
+    }
+    category_dfs['cf_prep'] = previous[previous['event_name'].apply(
+        lambda x: 'career fair' in str(x).lower())]
+
+    for category, category_df in category_dfs.items():
+        column = f'attended_{category}_before'
+        counts = category_df.groupby(['stu_id', 'career_fair_date']).agg(
+            {'event_date': 'count'}).reset_index()
+        counts = counts.rename(columns={'event_date': column})
+        data = pd.merge(data, counts, on=['stu_id', 'career_fair_date'],
+                        how='left')
+        data[column] = data[column].fillna(0)
+    return data
+
+
+def multi_hot_event_history(
+    data: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Counts the prior event attendances per category with the multi-hot
+      category matrix and a single `count_prior_events` pass.
+    """
+    fair_dates = pd.to_datetime(career_fair_df['career_fair_date'])
+    categories, category_matrix = preprocessing.event_category_matrix(
+        stu_event_attendance_df)
+    counts = preprocessing.count_prior_events(
+        data['stu_id'], data['career_fair_date'],
+        stu_event_attendance_df['stu_id'],
+        stu_event_attendance_df['event_date'],
+        weights=category_matrix)
+    fairs_on_date = data['career_fair_date'].map(
+        fair_dates.value_counts()).fillna(0).to_numpy()
+    return pd.concat([data, pd.DataFrame(
+        counts * fairs_on_date[:, None],
+        columns=[f'attended_{category}_before' for category in categories],
+        index=data.index)], axis=1)
+
+
+def benchmark_event_history(n_students: int = 20_000):
+    """
+    Compares the multi-hot category counts against the event x career fair
+      cross join with a pass per category, in time and peak memory.
+    """
+    print(f'{Fore.MAGENTA}\nEvent attendance history ({n_students} '
+          f'students){Style.RESET_ALL}')
+
+    raw_data = make_raw_data(n_students)
+    data = student_fair_rows(raw_data)
+    args = (data, raw_data['career_fair_data'],
+            raw_data['student_event_attendance'])
+
+    legacy_time, expected = time_call(legacy_event_history, *args, repeat=1)
+    multi_hot_time, result = time_call(multi_hot_event_history, *args)
+    legacy_peak, _ = peak_memory(legacy_event_history, *args)
+    multi_hot_peak, _ = peak_memory(multi_hot_event_history, *args)
+
+    pd.testing.assert_frame_equal(result[expected.columns], expected,
+                                  check_dtype=False)
+
+    print_timing('Cross join per category', legacy_time)
+    print_timing('Multi-hot as-of counts', multi_hot_time, legacy_time)
+    print_memory('Cross join peak', legacy_peak)
+    print_memory('Multi-hot as-of counts peak', multi_hot_peak, legacy_peak)
+
+
+def make_cleaned_data(n_rows: int, n_flags: int = 125) -> pd.DataFrame:
+    """
+    Generates a frame shaped like the cleaned data: the career fair name and
+      dates plus `n_flags` sparse 0/1 feature columns.
+    """
+    rng = np.random.default_rng(0)
+    fair_names = [name for name, _, _ in main_fairs]
+    fair_dates = pd.to_datetime([date for _, date, _ in main_fairs])
+    fair = rng.integers(0, len(main_fairs), n_rows)
+    data = pd.DataFrame({
+        'stu_grad_date': pd.Timestamp('2025-05-01'),
+        'career_fair_name': pd.Categorical(np.array(fair_names)[fair]),
+        'career_fair_date': fair_dates[fair],
+    })
+    flags = pd.DataFrame(
+        (rng.random((n_rows, n_flags)) < 0.2).astype(
+            preprocessing.flag_dtype),
+        columns=[f'feature_{i}' for i in range(n_flags)])
+    return pd.concat([data, flags], axis=1)
+
+
+def benchmark_cache_load(n_rows: int = 500_000):
+    """
+    Compares loading the cleaned data cache from csv against the columnar
+      formats.
+    """
+    print(f'{Fore.MAGENTA}\nCleaned data cache load ({n_rows} rows)'
+          f'{Style.RESET_ALL}')
+
+    # Sorted by fair like the cache is written
+    data = preprocessing.sort_by_fair(make_cleaned_data(n_rows))
+    file_formats = ['csv']
+    if preprocessing.columnar_cache_available():
+        file_formats += ['parquet', 'feather']
+
+    original_directory = preprocessing.data_directory
+    with tempfile.TemporaryDirectory() as directory:
+        preprocessing.data_directory = directory
+        try:
+            csv_time = None
+            for file_format in file_formats:
+                path = preprocessing.save_cleaned_data(data, file_format)
+                size = os.path.getsize(path)
+                for memory_map in ([False, True] if file_format != 'csv'
+                                   else [False]):
+                    load_time, loaded = time_call(
+                        preprocessing.read_cleaned_data, path, memory_map)
+                    pd.testing.assert_frame_equal(loaded, data,
+                                                  check_dtype=False)
+                    label = file_format + (' (memory-mapped)'
+                                           if memory_map else '')
+                    print_timing(f'{label}, {size / 2**20:.0f} MB',
+                                 load_time, csv_time)
+                    csv_time = csv_time or load_time
+        finally:
+            preprocessing.data_directory = original_directory
+
+
+def benchmark_compact_dtypes(n_rows: int = 500_000):
+    """
+    Compares the memory of the cleaned data with int64 flags and object fair
+      names against the compact flag and categorical dtypes.
+    """
+    print(f'{Fore.MAGENTA}\nCleaned data memory ({n_rows} rows)'
+          f'{Style.RESET_ALL}')
+
+    compact = make_cleaned_data(n_rows)
+    flag_columns = compact.columns[3:]
+    legacy = compact.astype({'career_fair_name': object,
+                             **{column: int for column in flag_columns}})
+
+    legacy_memory = legacy.memory_usage(deep=True).sum()
+    compact_memory = compact.memory_usage(deep=True).sum()
+    print_memory('int64 flags, object names', legacy_memory)
+    print_memory('uint8 flags, categorical names', compact_memory,
+                 legacy_memory)
+
+    # The flags are a single block, so the feature matrix is a view
+    features = compact[flag_columns]
+    print(f'{Fore.BLUE}    Feature matrix dtype            '
+          f'{Fore.CYAN}{features.to_numpy().dtype}{Style.RESET_ALL}')
+
+
+def benchmark_sparse_features(n_rows: int = 100_000):
+    """
+    Compares the dense flag features against the CSR features: their size,
+      the float32 copy the forest fits on, the cost of pickling them for a
+      worker and the forest fit time.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    print(f'{Fore.MAGENTA}\nSparse features ({n_rows} rows)'
+          f'{Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    features = data.iloc[:, 3:]
+    target = features.pop(features.columns[0])
+    sparse_features = preprocessing.to_sparse_features(features)
+
+    dense_size = features.memory_usage(index=False).sum()
+    sparse_size = (sparse_features.data.nbytes +
+                   sparse_features.indices.nbytes +
+                   sparse_features.indptr.nbytes)
+    print_memory('Dense uint8', dense_size)
+    print_memory('CSR', sparse_size, dense_size)
+
+    # The forest fits on float32 copies, dense or CSC
+    dense_fit_size = features.size * np.dtype(np.float32).itemsize
+    sparse_fit_size = sparse_features.nnz * 8 + sparse_features.shape[1] * 4
+    print_memory('Dense float32 fit copy', dense_fit_size)
+    print_memory('CSC float32 fit copy', sparse_fit_size, dense_fit_size)
+
+    dense_time, dense_pickle = time_call(pickle.dumps, features)
+    sparse_time, sparse_pickle = time_call(pickle.dumps, sparse_features)
+    print_timing(f'Dense pickle, {len(dense_pickle) / 2**20:.0f} MB',
+                 dense_time)
+    print_timing(f'CSR pickle, {len(sparse_pickle) / 2**20:.0f} MB',
+                 sparse_time, dense_time)
+
+    def fit(x):
+        return RandomForestClassifier(
+            n_estimators=4, min_samples_split=8, random_state=0).fit(x, target)
+
+    dense_fit_time, dense_model = time_call(fit, features)
+    sparse_fit_time, sparse_model = time_call(fit, sparse_features)
+    print_timing('Dense fit', dense_fit_time)
+    print_timing('CSR fit', sparse_fit_time, dense_fit_time)
+
+    assert np.array_equal(dense_model.predict_proba(features),
+                          sparse_model.predict_proba(sparse_features))
+
+
+def benchmark_chunked_build(n_students: int = 4000, chunk_size: int = 500):
+    """
+    Compares the peak memory of building the cleaned data at once against
+      building it in chunks of students.
+    """
+    print(f'{Fore.MAGENTA}\nChunked build ({n_students} students, chunks of '
+          f'{chunk_size}){Style.RESET_ALL}')
+
+    raw_data = make_raw_data(n_students)
+
+    original_directory = preprocessing.data_directory
+    with tempfile.TemporaryDirectory() as directory:
+        preprocessing.data_directory = directory
+        try:
+            for name, data in raw_data.items():
+                data.to_csv(os.path.join(directory, f'{name}.csv'),
+                            index=False)
+
+            def build(chunk_size):
+                # Rebuild from the raw files every time
+                for file_name in os.listdir(directory):
+                    if file_name.startswith(
+                            preprocessing.cleaned_data_file_name):
+                        os.remove(os.path.join(directory, file_name))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    preprocessing.load_data(memory_map=True,
+                                            chunk_size=chunk_size)
+
+            def read():
+                return preprocessing.read_cleaned_data(
+                    preprocessing.find_cleaned_data(preprocessing.cache_format))
+
+            whole_peak, _ = peak_memory(build, None)
+            whole = read()
+            # Without the stage cache, so both builds do the same work
+            shutil.rmtree(preprocessing.stage_cache_directory())
+            chunked_peak, _ = peak_memory(build, chunk_size)
+            pd.testing.assert_frame_equal(whole, read())
+
+            print_memory('Whole dataset peak', whole_peak)
+            print_memory('Chunked peak', chunked_peak, whole_peak)
+        finally:
+            preprocessing.data_directory = original_directory
+
+
+def benchmark_parallel_clean(n_students: int = 8000):
+    """
+    Measures how cleaning the student/career fair rows scales from a single
+      process to a worker process per core.
+    """
+    max_workers = os.cpu_count() or 1
+    print(f'{Fore.MAGENTA}\nParallel cleaning ({n_students} students, '
+          f'{max_workers} cores){Style.RESET_ALL}')
+
+    # Read back from csv, like the raw files, so every column is typed
+    raw_data = {
+        name: preprocessing.read_raw_csv(
+            io.StringIO(data.to_csv(index=False)), name)
+        for name, data in make_raw_data(n_students).items()
+    }
+    tables = (raw_data['career_fair_data'],
+              raw_data['student_fair_attendance'],
+              raw_data['student_event_attendance'])
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        student_data = preprocessing.merge_student_data(
+            raw_data['student_data'], raw_data['student_counts_1'],
+            raw_data['student_counts_2'], raw_data['appointment_data'])
+        rows = preprocessing.build_student_fair_rows(
+            raw_data['student_data'], raw_data['career_fair_data'],
+            raw_data['registration_data'])
+
+        serial_time, serial = time_call(
+            preprocessing.clean_student_fair_rows,
+            rows, student_data, *tables, repeat=1)
+    print_timing('1 process', serial_time)
+
+    workers = 2
+    while workers <= max(max_workers, 2):
+        with contextlib.redirect_stdout(io.StringIO()):
+            parallel_time, parallel = time_call(
+                preprocessing.parallel_clean_student_fair_rows,
+                rows, student_data, *tables, workers, repeat=1)
+        pd.testing.assert_frame_equal(serial, parallel)
+        print_timing(f'{workers} workers', parallel_time, serial_time)
+        workers *= 2
+
+
+def legacy_ingest(raw_files: dict) -> dict:
+    """
+    Reads the raw csv files the way `load_data` used to, inferring every
+      column and fixing up the counts, GPAs and dates afterwards.
+    """
+    raw_data = {name: pd.read_csv(io.BytesIO(raw_file))
+                for name, raw_file in raw_files.items()}
+    for name, data in raw_data.items():
+        for column, kind in preprocessing.raw_file_schemas[name].items():
+            if kind == 'count':
+                data[column] = data[column].apply(
+                    lambda x: int(x.replace(',', '')) if isinstance(x, str)
+                    else x)
+            elif kind == 'float64':
+                data[column] = data[column].apply(
+                    lambda x: float(x) if isinstance(x, str) else x)
+            elif kind == 'date':
+                data[column] = pd.to_datetime(data[column])
+    return raw_data
+
+
+def typed_ingest(raw_files: dict, reader: str) -> dict:
+    """
+    Reads the raw csv files with the typed schema reader.
+    """
+    return {name: preprocessing.read_raw_csv(io.BytesIO(raw_file), name,
+                                             reader)
+            for name, raw_file in raw_files.items()}
+
+
+def benchmark_ingest(n_students: int = 50_000):
+    """
+    Compares reading the raw csv files into typed columns against inferring
+      the columns and fixing them up afterwards, in time and memory.
+    """
+    print(f'{Fore.MAGENTA}\nRaw data ingest ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    raw_files = {name: data.to_csv(index=False).encode()
+                 for name, data in make_raw_data(n_students).items()}
+
+    def size(raw_data):
+        return sum(data.memory_usage(deep=True).sum()
+                   for data in raw_data.values())
+
+    legacy_time, legacy = time_call(legacy_ingest, raw_files)
+    legacy_peak, _ = peak_memory(legacy_ingest, raw_files)
+    print_timing('Inferred + fix-ups', legacy_time)
+
+    readers = ['pandas']
+    if preprocessing.columnar_cache_available():
+        readers.append('arrow')
+
+    sizes = {'Inferred + fix-ups': size(legacy)}
+    peaks = {}
+    for reader in readers:
+        reader_time, typed = time_call(typed_ingest, raw_files, reader)
+        print_timing(f'Typed schema ({reader})', reader_time, legacy_time)
+        sizes[f'Typed schema ({reader})'] = size(typed)
+        # pyarrow allocates outside of the Python allocator
+        if reader == 'pandas':
+            peaks[f'Typed schema ({reader})'], _ = peak_memory(
+                typed_ingest, raw_files, reader)
+
+    print_memory('Inferred + fix-ups peak', legacy_peak)
+    for label, peak in peaks.items():
+        print_memory(f'{label} peak', peak, legacy_peak)
+    for label, loaded_size in sizes.items():
+        print_memory(f'{label} loaded', loaded_size,
+                     sizes['Inferred + fix-ups'])
+
+
+def benchmark_raw_loading(n_students: int = 100_000):
+    """
+    Compares reading the raw csv files one after another against reading
+      them concurrently, with each reader and compression.
+    """
+    print(f'{Fore.MAGENTA}\nRaw file loading ({n_students} students, '
+          f'{os.cpu_count() or 1} cores){Style.RESET_ALL}')
+
+    readers = ['pandas']
+    if preprocessing.columnar_cache_available():
+        readers.append('arrow')
+
+    raw_data = make_raw_data(n_students)
+    original_directory = preprocessing.data_directory
+    original_reader = preprocessing.raw_data_reader
+    with tempfile.TemporaryDirectory() as directory:
+        preprocessing.data_directory = directory
+        try:
+            for compression in ['', '.gz']:
+                for file_name in os.listdir(directory):
+                    os.remove(os.path.join(directory, file_name))
+                for name, data in raw_data.items():
+                    data.to_csv(os.path.join(
+                        directory,
+                        preprocessing.raw_file_names[name] + compression),
+                        index=False)
+
+                for reader in readers:
+                    preprocessing.raw_data_reader = reader
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        serial_time, _ = time_call(
+                            preprocessing.read_raw_files,
+                            preprocessing.raw_file_names, 1, repeat=1)
+                        threaded_time, _ = time_call(
+                            preprocessing.read_raw_files,
+                            preprocessing.raw_file_names, repeat=1)
+                    label = f'{reader}{compression or " csv"}'
+                    print_timing(f'{label} one by one', serial_time)
+                    print_timing(
+                        f'{label} {preprocessing.raw_read_threads} threads',
+                        threaded_time, serial_time)
+        finally:
+            preprocessing.data_directory = original_directory
+            preprocessing.raw_data_reader = original_reader
+
+
+def legacy_profile_tokens(data: pd.DataFrame, career_fair_df: pd.DataFrame):
+    """
+    Extracts the school year, college, major and appointment flags the way
+      `categorical_features` used to, splitting every column into lists and
+      scanning the lists once per flag.
+    """
+    data = data.copy()
+    for column in ['stu_school_year', 'stu_colleges', 'stu_majors']:
+        data[column] = data[column].apply(
+            lambda x: x.split(',') if isinstance(x, str) else x)
+        data[column] = data[column].apply(
+            lambda x: x if isinstance(x, list) else [])
+
+    for feature, [school_year] in preprocessing.school_year_rules.items():
+        data[feature] = data['stu_school_year'].apply(
+            lambda x: 1 if school_year in x else 0)
+
+    all_colleges = sum(preprocessing.college_rules.values(), [])
+    for feature, colleges in preprocessing.college_rules.items():
+        data[feature] = data['stu_colleges'].apply(
+            lambda x: 1 if any([college in colleges for college in x]) else 0)
+    data['multiple_colleges'] = data['stu_colleges'].apply(
+        lambda x: 1 if len(x) > 1 else 0)
+    data['other_college'] = data['stu_colleges'].apply(
+        lambda x: 0 if any(college in all_colleges for college in x) else 1)
+
+    data['cf_has_major'] = data['stu_majors'].apply(
+        lambda x: 1 if any(
+            [major in career_fair_df['career_fair_majors'].values
+             for major in x]) else 0)
+
+    data['appointment_types'] = data['appointment_types'].apply(
+        lambda x: x.lower().split(',') if isinstance(x, str) else x)
+    data['appointment_types'] = data['appointment_types'].apply(
+        lambda x: x if isinstance(x, list) else [])
+    for feature, patterns in preprocessing.appointment_rules.items():
+        data[feature] = data['appointment_types'].apply(
+            lambda x: 1 if any(any(pattern in i for pattern in patterns)
+                               for i in x) else 0)
+        data['appointment_types'] = data['appointment_types'].apply(
+            lambda x: [i for i in x
+                       if not any(pattern in i for pattern in patterns)])
+    data['has_other_appointment'] = data['appointment_types'].apply(
+        lambda x: 1 if len(x) > 0 else 0)
+
+    return data.drop(columns=['stu_school_year', 'stu_colleges',
+                              'stu_majors', 'appointment_types'])
+
+
+def multi_hot_profile_tokens(
+    data: pd.DataFrame,
+    career_fair_df: pd.DataFrame
+):
+    """
+    Extracts the same flags with `multi_hot_tokens`.
+    """
+    colleges = preprocessing.multi_hot_tokens(
+        data['stu_colleges'], preprocessing.college_rules)
+    return pd.concat([
+        data.drop(columns=['stu_school_year', 'stu_colleges', 'stu_majors',
+                           'appointment_types']),
+        preprocessing.multi_hot_tokens(
+            data['stu_school_year'], preprocessing.school_year_rules),
+        colleges,
+        pd.DataFrame({
+            'multiple_colleges': data['stu_colleges'].str.contains(
+                ',', regex=False).fillna(False).astype(np.uint8),
+            'other_college': (~colleges.any(axis=1)).astype(np.uint8),
+        }),
+        preprocessing.multi_hot_tokens(data['stu_majors'], {
+            'cf_has_major':
+                career_fair_df['career_fair_majors'].dropna().unique(),
+        }),
+        preprocessing.multi_hot_tokens(
+            data['appointment_types'], preprocessing.appointment_rules,
+            match='substring', first_match=True, lowercase=True,
+            unmatched='has_other_appointment'),
+    ], axis=1)
+
+
+def benchmark_profile_tokens(n_students: int = 20_000):
+    """
+    Compares the single pass multi-hot token parser against splitting the
+      profile columns into lists and scanning them once per flag, on a row
+      for every student and career fair.
+    """
+    print(f'{Fore.MAGENTA}\nProfile token flags ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    raw_data = make_raw_data(n_students)
+    career_fair_df = raw_data['career_fair_data']
+    students = pd.merge(raw_data['student_data'],
+                        raw_data['appointment_data'], on='stu_id', how='left')
+    students['stu_colleges'] = students['stu_colleges'].fillna(
+        'No College Designated')
+    data = pd.merge(students[['stu_id', 'stu_school_year', 'stu_colleges',
+                              'stu_majors', 'appointment_types']],
+                    career_fair_df[['career_fair_date']], how='cross')
+
+    legacy_time, expected = time_call(
+        legacy_profile_tokens, data, career_fair_df, repeat=1)
+    multi_hot_time, result = time_call(
+        multi_hot_profile_tokens, data, career_fair_df)
+
+    pd.testing.assert_frame_equal(result[expected.columns], expected,
+                                  check_dtype=False)
+
+    print_timing('Lists + scan per flag', legacy_time)
+    print_timing('Single pass multi-hot', multi_hot_time, legacy_time)
+
+
+def make_fair_catalog(n_fairs: int, n_majors: int, seed: int = 0):
+    """
+    Generates `n_fairs` career fairs, each listing a few of `n_majors`
+      majors, and the comma separated majors of 1000 students.
+    """
+    rng = np.random.default_rng(seed)
+    major_names = np.array([f'Major {index}' for index in range(n_majors)])
+    career_fair_df = pd.DataFrame({
+        'career_fair_name': [f'Career Fair {index}'
+                             for index in range(n_fairs)],
+        'career_fair_date': pd.Timestamp('2020-01-01') + pd.to_timedelta(
+            rng.integers(0, 2000, n_fairs), unit='D'),
+        'career_fair_majors': [
+            ','.join(rng.choice(major_names, rng.integers(1, 6),
+                                replace=False))
+            for _ in range(n_fairs)],
+    })
+    student_majors = pd.Series([
+        ','.join(rng.choice(major_names, rng.integers(1, 3), replace=False))
+        for _ in range(1000)])
+    return career_fair_df, student_majors
+
+
+def benchmark_fair_majors(n_students: int = 1000):
+    """
+    Compares the hashed (fair, major) index against scanning the majors of
+      every career fair for every major of every row, as the number of fairs
+      and majors grows.
+    """
+    print(f'{Fore.MAGENTA}\nCareer fair majors ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    for n_fairs, n_majors in [(10, 20), (100, 100), (400, 400)]:
+        career_fair_df, student_majors = make_fair_catalog(n_fairs, n_majors)
+        student_majors = student_majors[:n_students]
+        rows = pd.merge(
+            pd.DataFrame({'student': np.arange(len(student_majors))}),
+            career_fair_df[['career_fair_name', 'career_fair_date']],
+            how='cross')
+        row_majors = student_majors.iloc[rows['student']].reset_index(
+            drop=True)
+        row_major_lists = row_majors.str.split(',')
+
+        def array_scan():
+            return row_major_lists.apply(
+                lambda x: 1 if any(
+                    [major in career_fair_df['career_fair_majors'].values
+                     for major in x]) else 0)
+
+        def hashed_index():
+            return preprocessing.match_fair_majors(
+                rows, row_majors,
+                preprocessing.career_fair_major_index(career_fair_df))
+
+        scan_time, _ = time_call(array_scan, repeat=1)
+        index_time, result = time_call(hashed_index)
+
+        fair_majors = career_fair_df['career_fair_majors'].str.split(',')
+        expected = [
+            int(bool(set(majors) & set(fair_majors[fair])))
+            for majors, fair in zip(row_major_lists,
+                                    np.tile(np.arange(n_fairs),
+                                            len(student_majors)))]
+        assert np.array_equal(result, expected)
+
+        label = f'{n_fairs} fairs/{n_majors} majors'
+        print_timing(f'{label} scan', scan_time)
+        print_timing(f'{label} index', index_time, scan_time)
+
+
+def joined_career_fair_prep(
+    data: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame,
+    window_days: int
+) -> np.ndarray:
+    """
+    Flags the (stu_id, career_fair_date) rows with a prep session in the
+      window before the fair by joining every prep session to every row of
+      its student.
+    """
+    events = stu_event_attendance_df
+    prep = events.loc[
+        preprocessing.is_career_fair_prep(events), ['stu_id', 'event_date']]
+    keys = data[['stu_id', 'career_fair_date']].drop_duplicates()
+    joined = pd.merge(keys, prep, on='stu_id')
+    joined = joined[
+        (joined['event_date'] < joined['career_fair_date']) &
+        (joined['event_date'] >= joined['career_fair_date'] -
+         pd.Timedelta(days=window_days))]
+    prep_keys = pd.MultiIndex.from_frame(
+        joined[['stu_id', 'career_fair_date']].drop_duplicates())
+    return pd.MultiIndex.from_frame(
+        data[['stu_id', 'career_fair_date']]).isin(prep_keys)
+
+
+def sweep_career_fair_prep(
+    data: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame,
+    window_days: int
+) -> np.ndarray:
+    """
+    Flags the same rows with the windowed `count_prior_events` sweep.
+    """
+    events = stu_event_attendance_df
+    is_prep_event = preprocessing.is_career_fair_prep(events)
+    counts = preprocessing.count_prior_events(
+        data['stu_id'], data['career_fair_date'],
+        events['stu_id'][is_prep_event], events['event_date'][is_prep_event],
+        window=np.timedelta64(window_days, 'D'))
+    return counts > 0
+
+
+def benchmark_career_fair_prep(n_students: int = 50_000):
+    """
+    Compares the windowed sorted sweep for the career fair prep flag against
+      joining every prep session to its student's rows.
+    """
+    print(f'{Fore.MAGENTA}\nCareer fair prep ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    raw_data = {
+        name: preprocessing.read_raw_csv(
+            io.StringIO(data.to_csv(index=False)), name)
+        for name, data in make_raw_data(n_students).items()
+        if name in ('career_fair_data', 'student_data',
+                    'student_event_attendance')
+    }
+    data = student_fair_rows(raw_data)
+    args = (data, raw_data['student_event_attendance'],
+            preprocessing.career_fair_prep_window_days)
+
+    join_time, expected = time_call(joined_career_fair_prep, *args)
+    sweep_time, result = time_call(sweep_career_fair_prep, *args)
+    join_peak, _ = peak_memory(joined_career_fair_prep, *args)
+    sweep_peak, _ = peak_memory(sweep_career_fair_prep, *args)
+
+    assert np.array_equal(result, expected)
+
+    print_timing('Keyed join', join_time)
+    print_timing('Windowed sorted sweep', sweep_time, join_time)
+    print_memory('Keyed join peak', join_peak)
+    print_memory('Windowed sorted sweep peak', sweep_peak, join_peak)
+
+
+def benchmark_static_features(n_students: int = 20_000):
+    """
+    Compares computing the student features on every student/career fair
+      row against computing them once per student and broadcasting them by
+      the integer student keys.
+    """
+    print(f'{Fore.MAGENTA}\nStatic student features ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    raw_data = {
+        name: preprocessing.read_raw_csv(
+            io.StringIO(data.to_csv(index=False)), name)
+        for name, data in make_raw_data(n_students).items()
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        student_data = preprocessing.merge_student_data(
+            raw_data['student_data'], raw_data['student_counts_1'],
+            raw_data['student_counts_2'], raw_data['appointment_data'])
+        rows = preprocessing.build_student_fair_rows(
+            raw_data['student_data'], raw_data['career_fair_data'],
+            raw_data['registration_data'])
+
+    def per_row():
+        student_rows = pd.merge(rows[['stu_id']], student_data, on='stu_id',
+                                how='left')
+        return preprocessing.student_features(student_rows)
+
+    def per_student():
+        return preprocessing.broadcast_student_data(
+            rows, preprocessing.student_features(student_data))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        row_time, expected = time_call(per_row, repeat=1)
+        student_time, result = time_call(per_student)
+        row_peak, _ = peak_memory(per_row)
+        student_peak, _ = peak_memory(per_student)
+
+    pd.testing.assert_frame_equal(result.reset_index(drop=True), expected)
+
+    print_timing(f'Every row ({len(rows)})', row_time)
+    print_timing(f'Every student ({len(student_data)})', student_time,
+                 row_time)
+    print_memory('Every row peak', row_peak)
+    print_memory('Every student peak', student_peak, row_peak)
+
+
+def benchmark_model_artifact(n_rows: int = 200_000):
+    """
+    Compares fitting the forest, as every run of `random_forest.py` used to,
+      against loading the saved model.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    import model_artifact
+
+    print(f'{Fore.MAGENTA}\nModel artifact ({n_rows} rows){Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    features = data.iloc[:, 3:]
+    target = features.pop(features.columns[0])
+
+    def fit():
+        return RandomForestClassifier(
+            n_estimators=4, min_samples_split=8, random_state=0).fit(
+                features, target)
+
+    fit_time, model = time_call(fit, repeat=1)
+
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'model')
+        with contextlib.redirect_stdout(io.StringIO()):
+            model_artifact.save_model(
+                model, features.columns,
+                model_artifact.fingerprint_training_data(features, target),
+                {}, path)
+        load_time, (loaded, metadata) = time_call(
+            model_artifact.load_model, path)
+    finally:
+        shutil.rmtree(directory)
+
+    loaded_features = model_artifact.select_model_features(
+        data, metadata['feature_names'])
+    assert np.array_equal(loaded.predict_proba(loaded_features),
+                          model.predict_proba(features))
+
+    print_timing('Fit', fit_time)
+    print_timing('Load saved model', load_time, fit_time)
+
+
+def benchmark_batch_scoring(n_students: int = 50_000):
+    """
+    Scores every student for a career fair with `score.py` at different chunk
+      sizes, reporting the rows per second and the peak memory.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    import score
+
+    print(f'{Fore.MAGENTA}\nBatch scoring ({n_students} students)'
+          f'{Style.RESET_ALL}')
+
+    raw_data = {
+        name: preprocessing.read_raw_csv(
+            io.StringIO(data.to_csv(index=False)), name)
+        for name, data in make_raw_data(n_students).items()
+    }
+    fair = score.find_career_fair(raw_data['career_fair_data'],
+                                  main_fairs[-1][0])
+
+    # Train on the other fairs of a sample of the students
+    with contextlib.redirect_stdout(io.StringIO()):
+        sample = raw_data['student_data'].iloc[:2000]
+        cleaned = preprocessing.clean_student_fair_rows(
+            preprocessing.build_student_fair_rows(
+                sample, raw_data['career_fair_data'],
+                raw_data['registration_data']),
+            preprocessing.merge_student_data(
+                sample, raw_data['student_counts_1'],
+                raw_data['student_counts_2'], raw_data['appointment_data']),
+            raw_data['career_fair_data'],
+            raw_data['student_fair_attendance'],
+            raw_data['student_event_attendance'])
+    features = cleaned.drop(columns=['career_fair_name', 'career_fair_date',
+                                     'stu_grad_date', 'is_checked_in'])
+    model = RandomForestClassifier(
+        n_estimators=4, min_samples_split=8, random_state=0).fit(
+            features, cleaned['is_checked_in'])
+
+    def score_all(chunk_size):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return pd.concat(score.score_fair_chunks(
+                model, list(features.columns), raw_data, fair, chunk_size),
+                ignore_index=True)
+
+    expected = None
+    for chunk_size in (5000, 25_000, n_students):
+        chunk_time, scores = time_call(score_all, chunk_size, repeat=1)
+        chunk_peak, _ = peak_memory(score_all, chunk_size)
+        if expected is None:
+            expected = scores
+        pd.testing.assert_frame_equal(scores, expected)
+
+        print_timing(f'{chunk_size} students, '
+                     f'{len(scores) / chunk_time:,.0f} rows/s', chunk_time)
+        print_memory(f'{chunk_size} students peak', chunk_peak)
+
+
+async def load_test_service(service, clients: int, requests: int) -> dict:
+    """
+    Sends `requests` predictions from each of `clients` concurrent keep-alive
+      connections to a prediction service on localhost.
+
+    Returns:
+        dict: The service stats (see PredictionService.stats).
+    """
+    server = await service.start('127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    keys = list(service.rows)
+    rng = np.random.default_rng(0)
+
+    async def client():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for row in rng.integers(0, len(keys), requests):
+            stu_id, fair_name, date = keys[row]
+            writer.write(f'GET /predict?stu_id={stu_id}&fair='
+                         f'{urllib.parse.quote(fair_name)}&date={date} '
+                         f'HTTP/1.1\r\n'
+                         f'Host: localhost\r\n\r\n'.encode())
+            await writer.drain()
+            headers = await reader.readuntil(b'\r\n\r\n')
+            length = int(headers.split(b'Content-Length: ')[1]
+                         .split(b'\r\n')[0])
+            await reader.readexactly(length)
+        writer.close()
+
+    service.started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    stats = service.stats()
+
+    server.close()
+    await server.wait_closed()
+    service.batcher.cancel()
+    return stats
+
+
+def benchmark_prediction_service(n_rows: int = 50_000, clients: int = 64,
+                                 requests: int = 50):
+    """
+    Load-tests the prediction service with concurrent clients, predicting
+      every request on its own against micro-batching them, with the
+      scikit-learn forest and the flattened forest.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    import forest_inference
+    import serve
+
+    print(f'{Fore.MAGENTA}\nPrediction service ({clients} clients x '
+          f'{requests} requests){Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    features = data.iloc[:, 3:]
+    target = features.pop(features.columns[0])
+    model = RandomForestClassifier(
+        n_estimators=4, min_samples_split=8, random_state=0).fit(
+            features, target)
+    rows = {(stu_id, str(fair_name), f'{date:%Y-%m-%d}'): row
+            for row, (stu_id, fair_name, date) in enumerate(zip(
+                range(n_rows), data['career_fair_name'],
+                data['career_fair_date']))}
+    matrix = np.ascontiguousarray(features.to_numpy())
+
+    def sklearn_predict_proba(batch):
+        return model.predict_proba(pd.DataFrame(batch,
+                                                columns=features.columns))
+
+    flat_predict_proba = functools.partial(
+        forest_inference.flat_forest_predict_proba,
+        forest_inference.flatten_forest(model))
+
+    for label, predict_proba, batch_size in (
+            ('Unbatched', sklearn_predict_proba, 1),
+            ('Micro-batched', sklearn_predict_proba, serve.max_batch_size),
+            ('Micro-batched, flattened', flat_predict_proba,
+             serve.max_batch_size)):
+        service = serve.PredictionService(
+            predict_proba, model.classes_, rows, matrix, batch_size)
+        stats = asyncio.run(load_test_service(service, clients, requests))
+        print(f'{Fore.BLUE}    {label: <32}{Fore.CYAN}'
+              f'{stats["requests_per_second"]:>9,.0f} req/s  '
+              f'p50 {stats["p50_ms"]:.1f} ms  p99 {stats["p99_ms"]:.1f} ms  '
+              f'batch {stats["mean_batch_size"]:.1f}{Style.RESET_ALL}')
+
+
+def benchmark_flat_forest(n_rows: int = 200_000):
+    """
+    Compares the flattened forest against RandomForestClassifier.predict_proba
+      on deep trees, for a large batch and for micro-batches.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    import forest_inference
+
+    print(f'{Fore.MAGENTA}\nFlattened forest ({n_rows} rows){Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    features = data.iloc[:, 3:]
+    features.pop(features.columns[0])
+    # A target that depends on the features grows deep trees
+    rng = np.random.default_rng(0)
+    target = (features.iloc[:, 0] + features.iloc[:, 1] * features.iloc[:, 2]
+              + rng.random(n_rows) * 0.8 > 0.9).astype(int)
+    matrix = features.to_numpy()
+
+    for n_estimators in (4, 50):
+        model = RandomForestClassifier(
+            n_estimators=n_estimators, min_samples_split=8,
+            random_state=0).fit(features, target)
+        forest = forest_inference.flatten_forest(model)
+        depth = max(tree.get_depth() for tree in model.estimators_)
+        label = f'{n_estimators} trees'
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} {label}: '
+              f'{len(forest["leaf"])} nodes, depth {depth}{Style.RESET_ALL}')
+
+        for batch_rows in (n_rows, 64):
+            batch = features.iloc[:batch_rows]
+            repeat = 3 if batch_rows == n_rows else 50
+            sklearn_time, expected = time_call(
+                model.predict_proba, batch, repeat=repeat)
+            flat_time, result = time_call(
+                forest_inference.flat_forest_predict_proba, forest,
+                matrix[:batch_rows], repeat=repeat)
+            assert np.allclose(result, expected, rtol=0, atol=1e-12)
+
+            print_timing(f'{batch_rows} rows, sklearn', sklearn_time)
+            print_timing(f'{batch_rows} rows, flattened', flat_time,
+                         sklearn_time)
+            print(f'{Fore.LIGHTBLACK_EX}      {batch_rows / sklearn_time:,.0f}'
+                  f' vs {batch_rows / flat_time:,.0f} rows/s'
+                  f'{Style.RESET_ALL}')
+
+
+def benchmark_hyperparameter_search(n_rows: int = 20_000):
+    """
+    Compares an exhaustive grid over max_depth, min_samples_split and
+      min_samples_leaf against the randomized and successive halving searches
+      of a fraction of its candidates, by search time and held out F1.
+    """
+    from sklearn.metrics import f1_score
+    import model_search
+
+    print(f'{Fore.MAGENTA}\nHyperparameter search ({n_rows} rows)'
+          f'{Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    features = data.iloc[:, 3:]
+    features.pop(features.columns[0])
+    rng = np.random.default_rng(0)
+    target = (features.iloc[:, 0] + features.iloc[:, 1] * features.iloc[:, 2]
+              + rng.random(n_rows) * 0.8 > 0.9).astype(int)
+    split = int(n_rows * 0.8)
+    x_train, x_val = features.iloc[:split], features.iloc[split:]
+    y_train, y_val = target.iloc[:split], target.iloc[split:]
+
+    wide_grid = {
+        'n_estimators': [4, 16],
+        'max_depth': [None, 20],
+        'min_samples_split': [2, 8, 32],
+        'min_samples_leaf': [1, 4, 16],
+    }
+    n_grid = int(np.prod([len(values) for values in wide_grid.values()]))
+    budget = n_grid // 3
+
+    searches = {}
+    searches[f'grid ({n_grid} candidates)'] = model_search.make_search(
+        'grid', verbose=0)
+    searches[f'grid ({n_grid} candidates)'].param_grid = wide_grid
+    searches[f'random ({budget} candidates)'] = model_search.make_search(
+        'random', budget=budget, verbose=0)
+    searches[f'halving rows ({n_grid} candidates)'] = (
+        model_search.make_search('halving', budget=n_grid, verbose=0))
+    searches[f'halving trees ({n_grid} candidates)'] = (
+        model_search.make_search('halving', budget=n_grid,
+                                 resource='n_estimators', verbose=0))
+
+    baseline = None
+    for label, search in searches.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            model_search.fit_search(search, x_train, y_train)
+        elapsed = search.search_time_
+        f1 = f1_score(y_val, search.best_estimator_.predict(x_val))
+
+        print_timing(label, elapsed, baseline)
+        print(f'{Fore.LIGHTBLACK_EX}      held out F1 {f1:.4f}, '
+              f'{search.best_params_}{Style.RESET_ALL}')
+        baseline = baseline or elapsed
+
+
+def benchmark_oob_search(n_rows: int = 20_000, budget: int = 8):
+    """
+    Compares scoring candidates out-of-bag, growing their trees until the
+      score plateaus, against cross validating the same candidates with as
+      many trees and refitting the best one, as random_forest.py used to.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import f1_score
+    import model_search
+
+    print(f'{Fore.MAGENTA}\nOut-of-bag search ({n_rows} rows, {budget} '
+          f'candidates){Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    features = data.iloc[:, 3:]
+    features.pop(features.columns[0])
+    rng = np.random.default_rng(0)
+    target = (features.iloc[:, 0] + features.iloc[:, 1] * features.iloc[:, 2]
+              + rng.random(n_rows) * 0.8 > 0.9).astype(int)
+    split = int(n_rows * 0.8)
+    x_train, x_val = features.iloc[:split], features.iloc[split:]
+    y_train, y_val = target.iloc[:split], target.iloc[split:]
+
+    oob = model_search.make_search('oob', budget=budget, verbose=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        model_search.fit_search(oob, x_train, y_train)
+    oob_time = oob.search_time_
+
+    # The candidates the out-of-bag search grew, with their final number of
+    #   trees
+    cross_validated = model_search.make_search('grid', verbose=0)
+    cross_validated.param_grid = [
+        {name: [value] for name, value in params.items()}
+        for params in oob.cv_results_['params']]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        model_search.fit_search(cross_validated, x_train, y_train)
+    refitted = RandomForestClassifier(**cross_validated.best_params_)
+    refitted.fit(x_train, y_train)
+    cv_time = time.perf_counter() - start
+
+    for label, elapsed, model, params in (
+            ('5-fold CV + refit', cv_time, refitted,
+             cross_validated.best_params_),
+            ('out-of-bag, no refit', oob_time, oob.best_estimator_,
+             oob.best_params_)):
+        print_timing(label, elapsed, None if model is refitted else cv_time)
+        print(f'{Fore.LIGHTBLACK_EX}      held out F1 '
+              f'{f1_score(y_val, model.predict(x_val)):.4f}, {params}'
+              f'{Style.RESET_ALL}')
+
+
+def worker_peak_rss() -> tuple:
+    """
+    Gets the process id and peak resident memory of a search worker.
+    """
+    import model_search
+
+    time.sleep(0.05)
+    return os.getpid(), model_search.peak_rss()
+
+
+def run_shared_matrix_search(n_rows: int, dtype: str | None, n_jobs: int):
+    """
+    Fits a 5-fold search on generated training data in this process and
+      prints its fit time and the peak resident memory of this process and
+      its workers as json, for benchmark_shared_matrix.
+    """
+    import joblib
+    import model_search
+
+    # Generated a block at a time, so generating them doesn't set the peak
+    rng = np.random.default_rng(0)
+    flags = np.empty((n_rows, 124), dtype=preprocessing.flag_dtype)
+    for start in range(0, n_rows, 10_000):
+        block = flags[start:start + 10_000]
+        block[:] = rng.random(block.shape, dtype=np.float32) < 0.2
+    features = pd.DataFrame(flags, columns=[f'feature_{i}'
+                                            for i in range(124)])
+    target = pd.Series((flags[:, 0] + flags[:, 1] * flags[:, 2]
+                        + rng.random(n_rows) * 0.8 > 0.9).astype(int))
+    del flags
+
+    search = model_search.make_search('grid', n_jobs=n_jobs, verbose=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        if dtype is None:
+            model_search.fit_search(search, features, target)
+        else:
+            with model_search.shared_training_matrix(
+                    features, np.dtype(dtype)) as matrix:
+                model_search.fit_search(search, matrix, target)
+        fit_time = time.perf_counter() - start
+
+    # Asked a few times each, every reused worker answers at least once
+    workers = dict(joblib.Parallel(n_jobs=n_jobs)(
+        joblib.delayed(worker_peak_rss)() for _ in range(4 * n_jobs)))
+    workers.pop(os.getpid(), None)
+    print(json.dumps({
+        'fit_time': fit_time,
+        'main_peak': model_search.peak_rss(),
+        'worker_peaks': list(workers.values()),
+    }))
+
+
+def memory_in_use() -> int | None:
+    """
+    Gets the memory in use on the whole machine in bytes, shared pages
+      counted once, or None without /proc/meminfo.
+    """
+    if not os.path.isfile('/proc/meminfo'):
+        return None
+    with open('/proc/meminfo') as meminfo:
+        fields = {line.split(':')[0]: int(line.split()[1]) * 1024
+                  for line in meminfo}
+    return fields['MemTotal'] - fields['MemAvailable']
+
+
+def benchmark_shared_matrix(n_rows: int = 400_000, n_jobs: int = 4):
+    """
+    Compares handing the search workers the training frame against a shared
+      matrix of it, by fit time and peak memory. Every search runs in a
+      fresh process, so their peaks don't overlap.
+
+    A worker's resident memory counts the pages of the shared matrix it
+      read, even though every worker shares them, so the peak memory in use
+      on the machine is sampled too.
+    """
+    print(f'{Fore.MAGENTA}\nShared training matrix ({n_rows} rows, '
+          f'{n_jobs} workers){Style.RESET_ALL}')
+
+    baseline = None
+    for label, dtype in (('training frame', None),
+                         ('shared uint8 matrix', 'uint8'),
+                         ('shared float32 matrix', 'float32')):
+        idle = memory_in_use()
+        peak = idle
+        process = subprocess.Popen(
+            [sys.executable, '-c',
+             f'import benchmark; benchmark.run_shared_matrix_search('
+             f'{n_rows}, {dtype!r}, {n_jobs})'],
+            stdout=subprocess.PIPE, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)))
+        while process.poll() is None:
+            if idle is not None:
+                peak = max(peak, memory_in_use())
+            time.sleep(0.02)
+        result = json.loads(process.stdout.read().strip().splitlines()[-1])
+        process.stdout.close()
+        result['machine_peak'] = peak - idle if idle is not None else None
+
+        print_timing(label, result['fit_time'],
+                     baseline['fit_time'] if baseline else None)
+        if result['main_peak'] is not None:
+            print_memory('  main process peak RSS', result['main_peak'],
+                         baseline['main_peak'] if baseline else None)
+            print_memory('  largest worker peak RSS',
+                         max(result['worker_peaks']),
+                         max(baseline['worker_peaks']) if baseline else None)
+        if result['machine_peak'] is not None:
+            print_memory('  peak memory in use', result['machine_peak'],
+                         baseline['machine_peak'] if baseline else None)
+        baseline = baseline or result
+
+
+def legacy_fair_evaluation(data: pd.DataFrame, params: dict) -> list:
+    """
+    Holds out every fair with split_practical_data, which used to drop the
+      date columns of its input in place, so every fair got its own copy.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import f1_score
+
+    scores = []
+    for name in data['career_fair_name'].unique():
+        training_data, testing_data = preprocessing.split_practical_data(
+            data.copy(), name)
+        x_train, y_train = preprocessing.extract_features_target(
+            training_data)
+        x_test, y_test = preprocessing.extract_features_target(testing_data)
+        model = RandomForestClassifier(**params).fit(x_train, y_train)
+        scores.append(f1_score(y_test, model.predict(x_test)))
+    return scores
+
+
+def benchmark_fair_evaluation(n_rows: int = 200_000):
+    """
+    Compares holding out every fair with a copy of the cleaned data per fair
+      against the row positions of every fair in a shared matrix, in a
+      single process and in a process per core.
+    """
+    import evaluate_fairs
+
+    workers = max(os.cpu_count() or 1, 2)
+    print(f'{Fore.MAGENTA}\nLeave-one-fair-out evaluation ({n_rows} rows, '
+          f'{len(main_fairs)} fairs){Style.RESET_ALL}')
+
+    data = make_cleaned_data(n_rows)
+    flags = data.columns[3:]
+    data['is_checked_in'] = (
+        (data[flags[0]] + data[flags[1]] * data[flags[2]]
+         + np.random.default_rng(0).random(n_rows) * 0.8) > 0.9
+    ).astype(preprocessing.flag_dtype)
+    params = {'n_estimators': 4, 'min_samples_split': 8, 'n_jobs': 1,
+              'random_state': 0}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        legacy_time, legacy = time_call(legacy_fair_evaluation, data, params,
+                                        repeat=1)
+    print_timing('copy per fair', legacy_time)
+
+    order = {name: index for index, name in
+             enumerate(data['career_fair_name'].unique())}
+    for label, n_workers in (('row positions, 1 process', 1),
+                             (f'row positions, {workers} processes',
+                              workers)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            indexed_time, metrics = time_call(
+                evaluate_fairs.evaluate_fairs, data, params, n_workers,
+                repeat=1)
+        by_legacy_order = metrics.sort_values(
+            'career_fair_name', key=lambda names: names.map(order))
+        assert np.allclose(by_legacy_order['f1'], legacy)
+        print_timing(label, indexed_time, legacy_time)
+
+
+def benchmark_fair_slicing(n_rows: int = 1_000_000):
+    """
+    Compares finding the rows of every fair by comparing every row's career
+      fair against the ranges of the fair index of the fair-sorted data, to
+      map the fairs to their rows and to split off every fair.
+    """
+    print(f'{Fore.MAGENTA}\nFair slicing ({n_rows} rows, {len(main_fairs)} '
+          f'fairs){Style.RESET_ALL}')
+
+    import evaluate_fairs
+
+    indexed = preprocessing.sort_by_fair(make_cleaned_data(n_rows))
+    indexed['is_checked_in'] = indexed['feature_0']
+    # The same rows without their fair index
+    unindexed = indexed.copy()
+    unindexed.attrs = {}
+    names = indexed['career_fair_name'].unique()
+
+    def split_every_fair(data):
+        return [preprocessing.split_practical_data(data, name)
+                for name in names]
+
+    mask_time, positions = time_call(evaluate_fairs.fair_row_positions,
+                                     unindexed)
+    print_timing('fair rows, grouped', mask_time)
+    slice_time, slices = time_call(evaluate_fairs.fair_row_positions,
+                                   indexed)
+    for fair, rows in slices.items():
+        assert np.array_equal(positions[fair],
+                              np.arange(rows.start, rows.stop))
+    print_timing('fair rows, indexed', slice_time, mask_time)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        mask_time, masked = time_call(split_every_fair, unindexed, repeat=1)
+    print_timing('split every fair, masked', mask_time)
+    with contextlib.redirect_stdout(io.StringIO()):
+        slice_time, sliced = time_call(split_every_fair, indexed, repeat=1)
+    for masked_split, sliced_split in zip(masked, sliced):
+        for masked_data, sliced_data in zip(masked_split, sliced_split):
+            pd.testing.assert_frame_equal(masked_data, sliced_data)
+    print_timing('split every fair, indexed', slice_time, mask_time)
+
+
+benchmarks = {
+    'binning': benchmark_binning,
+    'fair_history': benchmark_fair_history,
+    'event_history': benchmark_event_history,
+    'cache_load': benchmark_cache_load,
+    'compact_dtypes': benchmark_compact_dtypes,
+    'sparse_features': benchmark_sparse_features,
+    'chunked_build': benchmark_chunked_build,
+    'parallel_clean': benchmark_parallel_clean,
+    'ingest': benchmark_ingest,
+    'raw_loading': benchmark_raw_loading,
+    'profile_tokens': benchmark_profile_tokens,
+    'fair_majors': benchmark_fair_majors,
+    'career_fair_prep': benchmark_career_fair_prep,
+    'static_features': benchmark_static_features,
+    'model_artifact': benchmark_model_artifact,
+    'batch_scoring': benchmark_batch_scoring,
+    'prediction_service': benchmark_prediction_service,
+    'flat_forest': benchmark_flat_forest,
+    'hyperparameter_search': benchmark_hyperparameter_search,
+    'oob_search': benchmark_oob_search,
+    'shared_matrix': benchmark_shared_matrix,
+    'fair_evaluation': benchmark_fair_evaluation,
+    'fair_slicing': benchmark_fair_slicing,
+}
+
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(benchmarks)
+    for name in names:
+        benchmarks[name]()
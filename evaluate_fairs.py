@@ -0,0 +1,221 @@
+# =============================================================================
+#                           Leave-One-Fair-Out Evaluation
+# =============================================================================
+#
+# Holds out every career fair of the cleaned data in turn: a forest is fitted
+#   on the rows of every other fair and evaluated on the held out fair's rows,
+#   like the practical test of `random_forest.py` does for a single fair. The
+#   fairs are evaluated concurrently in a pool of worker processes, and the
+#   metrics of every fair are printed as a table.
+#
+# Usage:
+#   python evaluate_fairs.py
+#   python evaluate_fairs.py --model models/random_forest --workers 4 \
+#       --output data/fair_metrics.csv
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import (accuracy_score, f1_score, mean_squared_error,
+                             precision_score, recall_score)
+
+from model_artifact import metadata_file_name
+from model_search import param_grid, shared_training_matrix
+from preprocessing import fair_slices, load_data
+
+# The columns of the cleaned data that aren't features
+non_feature_columns = ['career_fair_name', 'career_fair_date',
+                       'stu_grad_date', 'is_checked_in']
+
+fair_metric_columns = ['career_fair_name', 'career_fair_date', 'rows',
+                       'attended', 'positive_predicted', 'mse', 'accuracy',
+                       'f1', 'recall', 'precision', 'fit_seconds']
+
+
+def fair_row_positions(data: pd.DataFrame) -> dict:
+    """
+    Maps every career fair of the cleaned data to the positions of its rows.
+
+    Returns:
+        dict: The rows of every (career_fair_name, career_fair_date), in date
+          order. A slice for the cleaned data as loaded, which is sorted by
+          fair (see fair_slices), and an array of positions otherwise.
+    """
+    slices = fair_slices(data)
+    if slices is not None:
+        return slices
+
+    positions = data.groupby(['career_fair_name', 'career_fair_date'],
+                             observed=True, sort=False).indices
+    return dict(sorted(positions.items(), key=lambda fair: (fair[0][1],
+                                                            fair[0][0])))
+
+
+def evaluate_held_out_fair(
+    matrix_path: str,
+    target: np.ndarray,
+    test_positions: slice | np.ndarray,
+    params: dict
+) -> dict:
+    """
+    Fits a forest on every row but the held out fair's and evaluates it on
+      the held out fair's rows.
+
+    Args:
+        matrix_path (str): The .npy file of the features of every row (see
+          shared_training_matrix), memory-mapped rather than pickled to the
+          worker.
+        target (np.ndarray): The target of every row.
+        test_positions (slice | np.ndarray): The range or positions of the
+          held out rows. A range is read straight from the shared matrix.
+        params (dict): The parameters of the forest.
+
+    Returns:
+        dict: The metrics of the held out fair.
+    """
+    features = np.load(matrix_path, mmap_mode='r')
+    is_test = np.zeros(len(target), dtype=bool)
+    is_test[test_positions] = True
+
+    start = time.perf_counter()
+    model = RandomForestClassifier(**params)
+    model.fit(features[~is_test], target[~is_test])
+    fit_seconds = time.perf_counter() - start
+
+    y_test = target[test_positions]
+    y_pred = model.predict(features[test_positions])
+    return {
+        'rows': len(y_test),
+        'attended': int(y_test.sum()),
+        'positive_predicted': int(y_pred.sum()),
+        'mse': mean_squared_error(y_test, y_pred),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred, zero_division=0),
+        'recall': recall_score(y_test, y_pred, zero_division=0),
+        'precision': precision_score(y_test, y_pred, zero_division=0),
+        'fit_seconds': fit_seconds,
+    }
+
+
+def evaluate_fairs(
+    data: pd.DataFrame,
+    params: dict,
+    workers: int = os.cpu_count() or 1
+) -> pd.DataFrame:
+    """
+    Evaluates a forest on every career fair of the cleaned data, fitted on
+      the rows of every other fair.
+
+    The features are written once to a shared matrix (see
+      shared_training_matrix) and the fairs are held out by the positions of
+      their rows, so neither the frame nor the matrix is copied per fair.
+      Only the rows a worker fits on are; with the cleaned data sorted by
+      fair, the held out rows are a view of the matrix.
+
+    Args:
+        data (pd.DataFrame): The cleaned data, left as it is.
+        params (dict): The parameters of the forest.
+        workers (int): The number of worker processes evaluating fairs.
+
+    Returns:
+        pd.DataFrame: The metrics of every held out fair (see
+          fair_metric_columns), in date order.
+    """
+    if workers < 1:
+        raise ValueError(f'workers must be at least 1, got {workers}')
+
+    positions = fair_row_positions(data)
+    if len(positions) < 2:
+        raise ValueError(f'At least 2 career fairs are needed to hold one '
+                         f'out, got {len(positions)}')
+
+    print(f'{Fore.MAGENTA}\nEvaluating {len(positions)} held out fairs in '
+          f'{workers} processes...{Style.RESET_ALL}')
+
+    features = data[data.columns.drop(non_feature_columns)]
+    target = data['is_checked_in'].to_numpy()
+
+    metrics = []
+    with shared_training_matrix(features) as matrix, \
+            ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            fair: executor.submit(evaluate_held_out_fair, matrix.filename,
+                                  target, fair_positions, params)
+            for fair, fair_positions in positions.items()
+        }
+
+        for (name, date), future in futures.items():
+            fair_metrics = future.result()
+            metrics.append({'career_fair_name': name,
+                            'career_fair_date': date, **fair_metrics})
+            print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} {name} '
+                  f'{Fore.LIGHTBLACK_EX}(F1 {fair_metrics["f1"]:.4f})'
+                  f'{Style.RESET_ALL}')
+
+    return pd.DataFrame(metrics, columns=fair_metric_columns)
+
+
+def print_fair_metrics(metrics: pd.DataFrame):
+    """
+    Prints the metrics of every held out fair, and their mean weighted by
+      the rows of every fair.
+    """
+    print(f'{Fore.CYAN}\nHeld out fair results:{Style.RESET_ALL}')
+    print(f'{Fore.LIGHTBLACK_EX}{"Career fair": >32} {"Date": >10} '
+          f'{"Rows": >7} {"Attended": >8} {"F1": >6} {"Recall": >6} '
+          f'{"Precision": >9}{Style.RESET_ALL}')
+    for fair in metrics.itertuples():
+        print(f'{Fore.MAGENTA}{fair.career_fair_name: >32} '
+              f'{Fore.LIGHTBLACK_EX}{fair.career_fair_date:%Y-%m-%d} '
+              f'{fair.rows: >7} {fair.attended: >8} '
+              f'{Fore.CYAN}{fair.f1: >6.4f} {fair.recall: >6.4f} '
+              f'{fair.precision: >9.4f}{Style.RESET_ALL}')
+
+    weights = metrics['rows'] / metrics['rows'].sum()
+    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Mean F1: '
+          f'{Fore.LIGHTBLACK_EX}{metrics["f1"].mean():.4f} '
+          f'({(metrics["f1"] * weights).sum():.4f} weighted by rows)'
+          f'{Style.RESET_ALL}')
+
+
+def saved_model_params(path: str) -> dict:
+    """
+    Gets the tuned parameters of a model saved by save_model.
+    """
+    with open(os.path.join(path, metadata_file_name)) as metadata_file:
+        saved_params = json.load(metadata_file)['params']
+    return {name: saved_params[name] for name in param_grid}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Evaluates the attendance forest on every career fair, '
+                    'fitted on the rows of every other fair.')
+    parser.add_argument('--model', help='The directory of a saved model to '
+                        'take the parameters from, by default the tuned '
+                        'parameters of random_forest.py')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='The number of worker processes')
+    parser.add_argument('--output', help='The csv file to write the metrics '
+                        'to')
+    args = parser.parse_args()
+
+    if args.model is not None:
+        params = saved_model_params(args.model)
+    else:
+        params = {name: values[0] for name, values in param_grid.items()}
+    # Every worker fits a single forest at a time
+    params = {**params, 'n_jobs': 1, 'random_state': 0}
+
+    metrics = evaluate_fairs(load_data(), params, args.workers)
+    print_fair_metrics(metrics)
+
+    if args.output is not None:
+        metrics.to_csv(args.output, index=False)
+        print(f'{Fore.GREEN}✓{Fore.MAGENTA} Metrics written to '
+              f'{Fore.LIGHTBLACK_EX}{args.output}{Style.RESET_ALL}')
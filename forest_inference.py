@@ -0,0 +1,209 @@
+import os
+import numpy as np
+
+# =============================================================================
+#                           Flattened Forest Inference
+# =============================================================================
+
+# A fitted RandomForestClassifier is flattened into one set of contiguous
+#   node arrays for all of its trees, which are evaluated for a whole batch
+#   of rows at once with numpy, without scikit-learn at predict time.
+#
+# Every (row, tree) pair walking down the trees is a single int64 state,
+#   `node << feature_bits | feature`, the node it is at and the feature that
+#   node splits on, so a level only takes two gathers: the row's value of the
+#   feature, then the state of the left or right child.
+#   - children: the state of the left and right child of every node, leaves
+#     point back to themselves
+#   - threshold: a row goes left when its feature is <= the threshold
+#   - leaf: whether every node is a leaf
+#   - value: the class probabilities of every leaf
+#   - roots: the state of the root of every tree
+#   - classes: the class of every value column
+#   - feature_bits: the number of low bits of a state holding the feature
+#   - binary_splits: whether every split is between 0 and 1, so 0/1 flags
+#     go right exactly when they are 1
+flat_forest_arrays = ['children', 'threshold', 'leaf', 'value', 'roots',
+                      'classes', 'feature_bits', 'binary_splits']
+
+# The rows are evaluated this many at a time, every row of a block walking
+#   down every tree at once
+flat_forest_block_rows = 8192
+
+# The pairs that reached a leaf are dropped every this many levels
+flat_forest_compact_levels = 8
+
+
+def flatten_forest(model) -> dict:
+    """
+    Flattens the trees of a fitted forest into contiguous node arrays (see
+      flat_forest_arrays).
+
+    Args:
+        model (RandomForestClassifier): The fitted forest, with a single
+          output.
+
+    Returns:
+        dict: The node arrays.
+    """
+    if model.n_outputs_ != 1:
+        raise ValueError('Only forests with a single output can be '
+                         'flattened')
+
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    nodes = np.arange(offsets[-1], dtype=np.int64)
+
+    leaf = np.concatenate([tree.children_left < 0 for tree in trees])
+    feature = np.where(
+        leaf, 0, np.concatenate([tree.feature for tree in trees]))
+    threshold = np.where(
+        leaf, np.inf, np.concatenate([tree.threshold for tree in trees]))
+
+    left = np.concatenate([tree.children_left + offset
+                           for tree, offset in zip(trees, offsets)])
+    right = np.concatenate([tree.children_right + offset
+                            for tree, offset in zip(trees, offsets)])
+    children = np.column_stack([np.where(leaf, nodes, left),
+                                np.where(leaf, nodes, right)])
+
+    feature_bits = max(1, int(model.n_features_in_ - 1).bit_length())
+    states = (nodes << feature_bits) | feature
+
+    value = np.concatenate([tree.value[:, 0, :] for tree in trees])
+    # scikit-learn stores class fractions since 1.4 and predicts them as
+    #   they are, older versions store counts and normalize them
+    normalizer = value.sum(axis=1, keepdims=True)
+    if not np.allclose(normalizer, 1):
+        value = value / np.where(normalizer == 0, 1, normalizer)
+
+    split_thresholds = threshold[~leaf]
+    return {
+        'children': np.ascontiguousarray(states[children].ravel()),
+        'threshold': threshold,
+        'leaf': leaf,
+        'value': np.ascontiguousarray(value, dtype=np.float64),
+        'roots': states[offsets[:-1]],
+        'classes': np.asarray(model.classes_),
+        'feature_bits': np.array(feature_bits),
+        'binary_splits': np.array(bool(np.all(
+            (split_thresholds >= 0) & (split_thresholds < 1)))),
+    }
+
+
+def flat_forest_predict_proba(
+    forest: dict,
+    features,
+    block_rows: int = flat_forest_block_rows
+) -> np.ndarray:
+    """
+    Predicts the class probabilities of every row with a flattened forest,
+      the same way RandomForestClassifier.predict_proba does.
+
+    Every (row, tree) pair of a block walks one level down at a time, the
+      pairs that reached a leaf dropping out, so a level costs a few array
+      operations instead of a Python call per tree.
+
+    Args:
+        forest (dict): The flattened forest (see flatten_forest).
+        features (array-like): The features of every row, in the order the
+          forest was trained on, e.g. the uint8 flags. Missing values are
+          not supported.
+        block_rows (int): The number of rows to evaluate at once.
+
+    Returns:
+        np.ndarray: The (rows, classes) probabilities.
+    """
+    features = np.asarray(features)
+    if features.ndim != 2:
+        raise ValueError(f'Expected a 2d feature matrix, got '
+                         f'{features.ndim} dimensions')
+    if not np.issubdtype(features.dtype, np.integer):
+        # scikit-learn compares float32 features to the thresholds
+        features = features.astype(np.float32)
+
+    children, threshold, leaf = (forest['children'], forest['threshold'],
+                                 forest['leaf'])
+    roots = forest['roots']
+    feature_bits = int(forest['feature_bits'])
+    feature_mask = (1 << feature_bits) - 1
+    n_rows, n_features = features.shape
+    n_trees = len(roots)
+
+    probabilities = np.empty((n_rows, forest['value'].shape[1]))
+    for start in range(0, n_rows, block_rows):
+        block = np.ascontiguousarray(features[start:start + block_rows])
+        flat_block = block.ravel()
+        n_block = len(block)
+        # 0/1 flags go right exactly when they are 1, without comparing
+        flags = (bool(forest['binary_splits']) and
+                 np.issubdtype(block.dtype, np.integer) and
+                 (n_block == 0 or (block.min() >= 0 and block.max() <= 1)))
+
+        # One (row, tree) pair per position, tree by tree so that
+        #   neighbouring pairs walk the same tree
+        row_offsets = np.tile(
+            np.arange(n_block, dtype=np.int64) * n_features, n_trees)
+        states = np.repeat(roots, n_block)
+        leaves = np.empty(len(states), dtype=np.int64)
+        pairs = np.arange(len(states))
+
+        level = 0
+        while len(pairs) > 0:
+            if level % flat_forest_compact_levels == 0:
+                nodes = states >> feature_bits
+                at_leaf = leaf[nodes]
+                if at_leaf.any():
+                    leaves[pairs[at_leaf]] = nodes[at_leaf]
+                    walking = ~at_leaf
+                    pairs, states = pairs[walking], states[walking]
+                    row_offsets = row_offsets[walking]
+
+            values = flat_block[row_offsets + (states & feature_mask)]
+            nodes = states >> feature_bits
+            goes_right = values if flags else values > threshold[nodes]
+            states = children[(nodes << 1) + goes_right]
+            level += 1
+
+        # Summed tree by tree, like the forest does
+        tree_values = forest['value'][leaves].reshape(n_trees, n_block, -1)
+        block_probabilities = probabilities[start:start + n_block]
+        block_probabilities[:] = 0
+        for tree in range(n_trees):
+            block_probabilities += tree_values[tree]
+        block_probabilities /= n_trees
+
+    return probabilities
+
+
+def save_flat_forest(forest: dict, path: str):
+    """
+    Saves the node arrays of a flattened forest to a directory, an
+      uncompressed .npy file per array, so load_flat_forest can memory-map
+      them.
+    """
+    os.makedirs(path, exist_ok=True)
+    for name in flat_forest_arrays:
+        np.save(os.path.join(path, f'{name}.npy'), forest[name],
+                allow_pickle=False)
+
+
+def load_flat_forest(path: str, memory_map: bool = True) -> dict:
+    """
+    Loads a flattened forest saved by save_flat_forest.
+
+    Args:
+        path (str): The directory of the node arrays.
+        memory_map (bool): Whether to memory-map the arrays instead of
+          reading them into memory, so processes scoring with the same
+          forest share its pages.
+
+    Returns:
+        dict: The node arrays (see flat_forest_arrays).
+    """
+    return {
+        name: np.load(os.path.join(path, f'{name}.npy'),
+                      mmap_mode='r' if memory_map else None,
+                      allow_pickle=False)
+        for name in flat_forest_arrays
+    }
@@ -0,0 +1,237 @@
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import joblib
+import sklearn
+from scipy import sparse
+from colorama import Fore, Style
+
+from forest_inference import (flatten_forest, load_flat_forest,
+                              save_flat_forest)
+from preprocessing import read_cleaned_data_key
+
+# =============================================================================
+#                           Model Artifacts
+# =============================================================================
+
+# A trained model is saved as a directory holding the fitted forest, its
+#   flattened node arrays (see forest_inference.py) and a json file
+#   describing it: the ordered feature list it was trained on, the
+#   fingerprint of its training data and its metrics
+model_directory = 'models'
+default_model_name = 'random_forest'
+model_file_name = 'forest.joblib'
+flat_forest_directory_name = 'flat_forest'
+metadata_file_name = 'model.json'
+
+
+def model_path(name: str = default_model_name) -> str:
+    """
+    Gets the directory of the saved model with the given name.
+    """
+    return os.path.join(model_directory, name)
+
+
+def fingerprint_training_data(features, target) -> dict:
+    """
+    Fingerprints the data a model is trained on, so a saved model can be
+      traced back to the cleaned data and rows it was fitted with.
+
+    Args:
+        features (pd.DataFrame | csr_matrix): The training features.
+        target (pd.Series): The training target.
+
+    Returns:
+        dict: The key of the cleaned data the features were built from (see
+          load_data), the shape of the features and a content hash of the
+          features and target.
+    """
+    content_hash = hashlib.sha256()
+    if sparse.issparse(features):
+        for array in (features.data, features.indices, features.indptr):
+            content_hash.update(np.ascontiguousarray(array).data)
+    else:
+        content_hash.update(
+            np.ascontiguousarray(np.asarray(features)).data)
+    content_hash.update(np.ascontiguousarray(np.asarray(target)).data)
+
+    return {
+        'cleaned_data_key': read_cleaned_data_key(),
+        'rows': features.shape[0],
+        'features': features.shape[1],
+        'sha256': content_hash.hexdigest(),
+    }
+
+
+def save_model(
+    model,
+    feature_names,
+    data_fingerprint: dict,
+    metrics: dict,
+    path: str = model_path()
+) -> str:
+    """
+    Saves a fitted model along with the exact ordered feature list it was
+      trained on, the fingerprint of its training data and its metrics.
+
+    The forest is written uncompressed, so load_model can memory-map its
+      arrays instead of reading them in. Its flattened node arrays are saved
+      next to it, for load_flat_model.
+
+    The model is written to a temporary sibling directory that then replaces
+      the directory at `path`, so a saved model is never a mix of an old and
+      a new one, and processes that memory-mapped the old arrays keep them.
+
+    Args:
+        model (RandomForestClassifier): The fitted model.
+        feature_names (Index | list): The name of every feature column, in
+          the order the model was trained on.
+        data_fingerprint (dict): The fingerprint of the training data (see
+          fingerprint_training_data).
+        metrics (dict): The metrics of the model, e.g. keyed by the data set
+          they were measured on.
+        path (str): The directory to save the model to.
+
+    Returns:
+        str: The directory the model was saved to.
+    """
+    print(f'{Fore.MAGENTA}\nSaving model...{Style.RESET_ALL}')
+
+    feature_names = [str(name) for name in feature_names]
+    if len(feature_names) != model.n_features_in_:
+        raise ValueError(f'The model was trained on {model.n_features_in_} '
+                         f'features, got {len(feature_names)} feature names')
+
+    path = os.path.normpath(path)
+    parent = os.path.dirname(path) or '.'
+    os.makedirs(parent, exist_ok=True)
+    staging_path = tempfile.mkdtemp(
+        prefix=f'.{os.path.basename(path)}.', suffix='.partial', dir=parent)
+    os.chmod(staging_path, 0o755)
+
+    metadata = {
+        'model': type(model).__name__,
+        'params': model.get_params(),
+        'sklearn_version': sklearn.__version__,
+        'saved_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'feature_names': feature_names,
+        'data_fingerprint': data_fingerprint,
+        'metrics': metrics,
+    }
+    old_path = None
+    try:
+        joblib.dump(model, os.path.join(staging_path, model_file_name))
+        save_flat_forest(flatten_forest(model),
+                         os.path.join(staging_path,
+                                      flat_forest_directory_name))
+        with open(os.path.join(staging_path, metadata_file_name),
+                  'w') as metadata_file:
+            json.dump(metadata, metadata_file, indent=2, default=str)
+
+        # A directory can only be renamed over an empty one, so the old model
+        #   is moved aside first and removed once the new one is in place
+        if os.path.exists(path):
+            old_path = tempfile.mkdtemp(
+                prefix=f'.{os.path.basename(path)}.', suffix='.old',
+                dir=parent)
+            os.replace(path, old_path)
+        os.replace(staging_path, path)
+    except BaseException:
+        if old_path is not None and not os.path.exists(path):
+            os.replace(old_path, path)
+        shutil.rmtree(staging_path, ignore_errors=True)
+        raise
+    if old_path is not None:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Model saved to '
+          f'{Fore.LIGHTBLACK_EX}{path}{Style.RESET_ALL}')
+
+    return path
+
+
+def load_model(path: str = model_path(), memory_map: bool = True):
+    """
+    Loads a model saved by save_model, without refitting it.
+
+    Args:
+        path (str): The directory the model was saved to.
+        memory_map (bool): Whether to memory-map the arrays of the saved
+          forest instead of reading them into memory.
+
+    Returns:
+        tuple: The fitted model and its metadata (see save_model).
+    """
+    metadata_path = os.path.join(path, metadata_file_name)
+    if not os.path.isfile(metadata_path):
+        raise FileNotFoundError(f'No saved model in {path}')
+
+    with open(metadata_path) as metadata_file:
+        metadata = json.load(metadata_file)
+
+    if metadata['sklearn_version'] != sklearn.__version__:
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.YELLOW} Model saved with '
+              f'scikit-learn {metadata["sklearn_version"]}, loading with '
+              f'{sklearn.__version__}{Style.RESET_ALL}')
+
+    model = joblib.load(os.path.join(path, model_file_name),
+                        mmap_mode='r' if memory_map else None)
+
+    return model, metadata
+
+
+def load_flat_model(path: str = model_path(), memory_map: bool = True):
+    """
+    Loads the flattened node arrays of a model saved by save_model, which
+      predict without scikit-learn (see flat_forest_predict_proba).
+
+    Args:
+        path (str): The directory the model was saved to.
+        memory_map (bool): Whether to memory-map the node arrays, so the
+          processes scoring with the same model share them.
+
+    Returns:
+        tuple: The flattened forest and the model's metadata.
+    """
+    metadata_path = os.path.join(path, metadata_file_name)
+    flat_forest_path = os.path.join(path, flat_forest_directory_name)
+    if not os.path.isfile(metadata_path):
+        raise FileNotFoundError(f'No saved model in {path}')
+    if not os.path.isdir(flat_forest_path):
+        raise FileNotFoundError(f'The model in {path} was saved without its '
+                                f'flattened forest, save it again')
+
+    with open(metadata_path) as metadata_file:
+        metadata = json.load(metadata_file)
+
+    return load_flat_forest(flat_forest_path, memory_map), metadata
+
+
+def select_model_features(
+    data: pd.DataFrame,
+    feature_names: list
+) -> pd.DataFrame:
+    """
+    Selects the features a saved model was trained on from the data, in the
+      order it was trained on.
+
+    Args:
+        data (pd.DataFrame): Cleaned data, with at least every feature of the
+          model. Any other column (e.g. the target) is left out.
+        feature_names (list): The ordered feature list of the model (see
+          save_model).
+
+    Returns:
+        pd.DataFrame: The features, with the model's columns in its order.
+    """
+    missing = pd.Index(feature_names).difference(data.columns)
+    if len(missing) > 0:
+        raise ValueError(f'The data is missing {len(missing)} features of '
+                         f'the model: {", ".join(missing[:5])}')
+
+    return data[feature_names]
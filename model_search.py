@@ -0,0 +1,463 @@
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import stats
+from colorama import Fore, Style
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import (accuracy_score, f1_score, precision_score,
+                             recall_score)
+from sklearn.model_selection import (GridSearchCV, HalvingRandomSearchCV,
+                                     ParameterSampler, RandomizedSearchCV)
+
+# =============================================================================
+#                           Hyperparameter Search
+# =============================================================================
+
+# 'grid' fits every combination of `param_grid`. 'random' samples
+#   `search_budget` candidates from `param_distributions`, and 'halving'
+#   (successive halving) starts `search_budget` sampled candidates on a small
+#   share of the rows (or trees), keeping the best third of them every round
+#   with 3x the rows (or trees), so the last round fits the few best
+#   candidates on all of them. 'oob' fits every one of `search_budget`
+#   sampled candidates once, scoring it on the rows left out of every tree's
+#   bootstrap sample instead of cross validating it (see OOBSearch).
+search_strategies = ['grid', 'random', 'halving', 'oob']
+
+param_grid = {
+    'n_estimators': [4],
+    'max_depth': [None],
+    'min_samples_split': [8],
+    'min_samples_leaf': [1]
+}
+
+param_distributions = {
+    'n_estimators': [4, 8, 16],
+    'max_depth': [None, 10, 20, 30, 40],
+    'min_samples_split': stats.randint(2, 33),
+    'min_samples_leaf': stats.randint(1, 17),
+}
+
+# The number of candidates the 'random' and 'halving' searches try
+search_budget = 20
+
+# What 'halving' gives more of to the candidates that are kept:
+#   'n_samples' (training rows) or 'n_estimators' (trees)
+halving_resource = 'n_samples'
+
+# The most trees a candidate gets when halving over 'n_estimators'
+halving_max_estimators = 32
+
+# 'oob' grows every candidate from `oob_start_estimators` trees, doubling them
+#   until its out-of-bag score improves by less than `oob_tolerance`, or it
+#   has `oob_max_estimators` trees
+oob_start_estimators = 8
+oob_max_estimators = 128
+oob_tolerance = 0.002
+
+# The training features are written once to a file-backed memory map as a
+#   single C-contiguous matrix, which the search workers open by reference.
+#   It's float32, the dtype the forests fit on, so the folds taken from it
+#   aren't converted again
+shared_matrix_block_rows = 65_536
+shared_matrix_dtype = np.float32
+
+# RAM-backed when available, like joblib's own memory maps
+shared_matrix_directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# The metrics an 'oob' search can score with
+oob_metrics = {
+    'f1': f1_score,
+    'accuracy': accuracy_score,
+    'recall': recall_score,
+    'precision': precision_score,
+}
+
+
+def make_search(
+    strategy: str = 'grid',
+    budget: int = search_budget,
+    resource: str = halving_resource,
+    cv: int = 5,
+    scoring: str = 'f1',
+    n_jobs: int = -1,
+    pre_dispatch: str = 'n_jobs/2',
+    verbose: int = 3,
+    random_state: int | None = 0
+):
+    """
+    Builds the hyperparameter search of a RandomForestClassifier for the
+      given strategy (see search_strategies).
+
+    Every strategy runs under the same cross validation, scoring, `n_jobs`
+      and `pre_dispatch`.
+
+    Args:
+        strategy (str): 'grid', 'random', 'halving' or 'oob'.
+        budget (int): The number of candidates of 'random', 'halving' and
+          'oob'.
+        resource (str): What 'halving' grows, 'n_samples' or 'n_estimators'.
+        cv (int): The number of cross validation folds.
+        scoring (str): The metric the candidates are ranked by.
+        n_jobs (int): The number of jobs fitting candidates in parallel.
+        pre_dispatch (str): The number of jobs dispatched ahead of time, not
+          used by 'oob', which fits the trees of a forest in parallel.
+        verbose (int): The verbosity of the search.
+        random_state (int | None): The seed the candidates are sampled with.
+
+    Returns:
+        BaseSearchCV: The search, to be fitted on the training data.
+    """
+    if strategy not in search_strategies:
+        raise ValueError(f'Unknown search strategy {strategy!r}, expected '
+                         f'one of {search_strategies}')
+
+    common = {
+        'cv': cv,
+        'scoring': scoring,
+        'n_jobs': n_jobs,
+        'verbose': verbose,
+    }
+
+    if strategy == 'grid':
+        return GridSearchCV(RandomForestClassifier(), param_grid,
+                            pre_dispatch=pre_dispatch, **common)
+
+    if strategy == 'oob':
+        return OOBSearch(budget, scoring, n_jobs, verbose, random_state)
+
+    if strategy == 'random':
+        return RandomizedSearchCV(
+            RandomForestClassifier(), param_distributions, n_iter=budget,
+            random_state=random_state, pre_dispatch=pre_dispatch, **common)
+
+    if resource == 'n_estimators':
+        # The number of trees is what the rounds grow, not a parameter
+        distributions = {name: values
+                         for name, values in param_distributions.items()
+                         if name != 'n_estimators'}
+        search = HalvingRandomSearchCV(
+            RandomForestClassifier(), distributions, n_candidates=budget,
+            resource='n_estimators', max_resources=halving_max_estimators,
+            min_resources='exhaust', factor=3, random_state=random_state,
+            **common)
+    elif resource == 'n_samples':
+        search = HalvingRandomSearchCV(
+            RandomForestClassifier(), param_distributions,
+            n_candidates=budget, resource='n_samples',
+            min_resources='exhaust', factor=3, random_state=random_state,
+            **common)
+    else:
+        raise ValueError(f'Unknown halving resource {resource!r}, expected '
+                         f"'n_samples' or 'n_estimators'")
+
+    # The halving searches don't take `pre_dispatch`, but dispatch every
+    #   round of fits with it all the same
+    search.pre_dispatch = pre_dispatch
+    return search
+
+
+class OOBSearch:
+    """
+    Searches the hyperparameters of a RandomForestClassifier with
+      out-of-bag estimates. Every candidate is fitted once on all the rows,
+      instead of once per cross validation fold, and scored on the rows left
+      out of the bootstrap sample of every tree.
+
+    The trees of a candidate are grown with warm start, doubling from
+      oob_start_estimators until its out-of-bag score plateaus (see
+      oob_tolerance), so `n_estimators` is tuned along the way. The best
+      forest is kept as `best_estimator_` rather than refitted.
+
+    Has the attributes of a fitted scikit-learn search that the rest of the
+      training uses: best_params_, best_score_, best_estimator_, cv_results_
+      and n_splits_.
+
+    Args:
+        budget (int): The number of candidates sampled from
+          param_distributions.
+        scoring (str): The metric the candidates are ranked by (see
+          oob_metrics).
+        n_jobs (int): The number of jobs fitting the trees of a forest.
+        verbose (int): Whether to print the growth of every candidate.
+        random_state (int | None): The seed the candidates are sampled and
+          the forests are grown with.
+    """
+
+    def __init__(
+        self,
+        budget: int = search_budget,
+        scoring: str = 'f1',
+        n_jobs: int = -1,
+        verbose: int = 3,
+        random_state: int | None = 0
+    ):
+        if scoring not in oob_metrics:
+            raise ValueError(f'Unknown oob scoring {scoring!r}, expected one '
+                             f'of {list(oob_metrics)}')
+
+        self.budget = budget
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+        self.random_state = random_state
+        self.n_splits_ = 1
+
+    def grow(self, params: dict, features, target):
+        """
+        Grows a forest with the given parameters until its out-of-bag score
+          plateaus.
+
+        Returns:
+            tuple: The forest and its out-of-bag score at every size.
+        """
+        forest = RandomForestClassifier(
+            n_estimators=oob_start_estimators,
+            oob_score=oob_metrics[self.scoring],
+            warm_start=True,
+            n_jobs=self.n_jobs,
+            random_state=self.random_state,
+            **params
+        )
+
+        scores = []
+        while True:
+            with warnings.catch_warnings():
+                # A few rows are in the bootstrap sample of every tree of a
+                #   small forest, and have no out-of-bag prediction
+                warnings.filterwarnings(
+                    'ignore', message='Some inputs do not have OOB scores')
+                forest.fit(features, target)
+            scores.append((forest.n_estimators, forest.oob_score_))
+
+            if self.verbose:
+                print(f'{Fore.LIGHTBLACK_EX}    {forest.n_estimators: >4} '
+                      f'trees: OOB {self.scoring} {forest.oob_score_:.4f}'
+                      f'{Style.RESET_ALL}')
+
+            if ((len(scores) > 1 and
+                 scores[-1][1] - scores[-2][1] < oob_tolerance) or
+                    forest.n_estimators * 2 > oob_max_estimators):
+                break
+            forest.set_params(n_estimators=forest.n_estimators * 2)
+
+        return forest, scores
+
+    def fit(self, features, target):
+        """
+        Grows and scores every candidate, keeping the best forest.
+
+        Returns:
+            OOBSearch: The fitted search.
+        """
+        distributions = {name: values
+                         for name, values in param_distributions.items()
+                         if name != 'n_estimators'}
+        candidates = list(ParameterSampler(
+            distributions, self.budget, random_state=self.random_state))
+
+        params, fit_times, test_scores, growth = [], [], [], []
+        self.best_estimator_ = None
+        for index, candidate in enumerate(candidates):
+            if self.verbose:
+                print(f'{Fore.LIGHTBLACK_EX}  Candidate {index + 1}/'
+                      f'{len(candidates)}: {candidate}{Style.RESET_ALL}')
+
+            start = time.perf_counter()
+            forest, scores = self.grow(candidate, features, target)
+            fit_times.append(time.perf_counter() - start)
+
+            # The forest keeps its last size, even when the score dropped
+            params.append({**candidate, 'n_estimators': forest.n_estimators})
+            test_scores.append(forest.oob_score_)
+            growth.append(scores)
+
+            if (self.best_estimator_ is None or
+                    forest.oob_score_ > self.best_score_):
+                self.best_estimator_ = forest
+                self.best_score_ = forest.oob_score_
+                self.best_params_ = params[-1]
+
+        # The forest predicts like any other once it is fitted, and is saved
+        #   without the out-of-bag probabilities of every training row
+        self.best_estimator_.set_params(warm_start=False)
+        del self.best_estimator_.oob_decision_function_
+
+        test_scores = np.array(test_scores)
+        self.cv_results_ = {
+            'params': params,
+            'mean_fit_time': np.array(fit_times),
+            'mean_score_time': np.zeros(len(candidates)),
+            'mean_test_score': test_scores,
+            'rank_test_score': stats.rankdata(
+                -test_scores, method='min').astype(int),
+            'oob_growth': growth,
+        }
+
+        return self
+
+
+@contextlib.contextmanager
+def shared_training_matrix(
+    features,
+    dtype=shared_matrix_dtype,
+    directory: str | None = shared_matrix_directory
+):
+    """
+    Writes the training features to a file-backed memory map once, as a
+      C-contiguous matrix, and opens it read-only for the search.
+
+    joblib hands memory maps to the search workers by reference, so the
+      workers index the folds straight out of the matrix rather than out of
+      their own unpickled frame. The matrix is written a block of rows at a
+      time, so it's never held in memory twice. It's deleted once the context
+      exits.
+
+    Args:
+        features (pd.DataFrame | np.ndarray): The dense training features.
+        dtype (np.dtype | None): The dtype of the matrix, float32 by default,
+          which spares the forests converting every fold but makes every
+          fold's copy 4x larger than the uint8 flags. None keeps the common
+          dtype of the features.
+        directory (str | None): The directory to write the matrix to, by
+          default the shared memory filesystem when there is one.
+
+    Yields:
+        np.memmap: The read-only matrix of the features.
+    """
+    if dtype is None:
+        dtype = (np.result_type(*features.dtypes)
+                 if isinstance(features, pd.DataFrame) else features.dtype)
+
+    directory = tempfile.mkdtemp(prefix='training_matrix_', dir=directory)
+    path = os.path.join(directory, 'features.npy')
+    try:
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                           shape=features.shape)
+        for start in range(0, features.shape[0], shared_matrix_block_rows):
+            stop = start + shared_matrix_block_rows
+            block = (features.iloc[start:stop]
+                     if isinstance(features, pd.DataFrame)
+                     else features[start:stop])
+            matrix[start:stop] = np.asarray(block)
+        matrix.flush()
+        del matrix
+
+        yield np.load(path, mmap_mode='r')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def peak_rss() -> int | None:
+    """
+    Gets the peak resident memory of this process in bytes, or None where it
+      isn't available (Windows).
+    """
+    # On Linux, getrusage carries the peak of the parent over into a spawned
+    #   worker, the peak of the process's own memory is in its status
+    with contextlib.suppress(OSError):
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def fit_search(search, features, target):
+    """
+    Fits a search, timing it and reporting the peak resident memory.
+
+    Returns:
+        BaseSearchCV: The fitted search.
+    """
+    print(f'{Fore.MAGENTA}\nSearching hyperparameters with '
+          f'{type(search).__name__}...{Style.RESET_ALL}')
+
+    start = time.perf_counter()
+    search.fit(features, target)
+    search.search_time_ = time.perf_counter() - start
+
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Searched '
+          f'{len(search.cv_results_["params"])} candidates in '
+          f'{search.search_time_:.1f}s{Style.RESET_ALL}')
+    peak = peak_rss()
+    if peak is not None:
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Peak RSS: '
+              f'{Fore.LIGHTBLACK_EX}{peak / 2**20:,.0f} MB (this process)'
+              f'{Style.RESET_ALL}')
+
+    return search
+
+
+def candidate_timings(search) -> pd.DataFrame:
+    """
+    Gets the timing and score of every candidate of a fitted search, best
+      first. For 'halving', the candidates of the last round come first, as
+      the best candidate is picked from them.
+
+    Returns:
+        pd.DataFrame: A row per candidate (and per round, for 'halving'),
+          with the mean fit and score time of a fold, the total time of all
+          its folds and its parameters.
+    """
+    results = search.cv_results_
+    timings = pd.DataFrame({
+        'mean_fit_seconds': results['mean_fit_time'],
+        'mean_score_seconds': results['mean_score_time'],
+        'total_seconds': ((results['mean_fit_time'] +
+                           results['mean_score_time']) * search.n_splits_),
+        'mean_test_score': results['mean_test_score'],
+        'rank': results['rank_test_score'],
+    })
+    order = ['rank', 'total_seconds']
+    ascending = [True, True]
+    for column in ('iter', 'n_resources'):
+        if column in results:
+            timings[column] = results[column]
+    if 'iter' in timings:
+        order.insert(0, 'iter')
+        ascending.insert(0, False)
+    timings['params'] = results['params']
+
+    return timings.sort_values(order, ascending=ascending, kind='stable')
+
+
+def print_candidate_timings(search, top: int = 10):
+    """
+    Prints the timing and score of the `top` candidates of a fitted search,
+      and the time spent on all of them.
+    """
+    timings = candidate_timings(search)
+    by_rows = getattr(search, 'resource', None) == 'n_samples'
+
+    print(f'{Fore.CYAN}\nCandidate timings:{Style.RESET_ALL}')
+    print(f'{Fore.LIGHTBLACK_EX}{"Rank": >4} {"Score": >7} {"Fit (s)": >8} '
+          f'{"Total (s)": >9}  Parameters{Style.RESET_ALL}')
+    for candidate in timings.head(top).itertuples():
+        described = ', '.join(f'{name}={value}'
+                              for name, value in candidate.params.items())
+        if by_rows:
+            described += f' ({candidate.n_resources} rows)'
+        print(f'{Fore.LIGHTBLACK_EX}{candidate.rank: >4} '
+              f'{Fore.CYAN}{candidate.mean_test_score: >7.4f} '
+              f'{Fore.BLUE}{candidate.mean_fit_seconds: >8.2f} '
+              f'{candidate.total_seconds: >9.2f}  '
+              f'{Fore.MAGENTA}{described}{Style.RESET_ALL}')
+
+    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Candidate fit and score '
+          f'time: {Fore.LIGHTBLACK_EX}{timings["total_seconds"].sum():.1f}s '
+          f'over {len(timings)} candidates{Style.RESET_ALL}')
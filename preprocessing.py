@@ -1,5 +1,15 @@
+import contextlib
+import hashlib
+import io
+import json
 import os
+import time
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
+from multiprocessing import shared_memory
+import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.model_selection import train_test_split
 from colorama import Fore, Style
 
@@ -7,62 +17,1980 @@ from colorama import Fore, Style
 #                           Data Preprocessing
 # =============================================================================
 
-cleaned_data_file_name = 'cleaned_data.csv'
+cleaned_data_file_name = 'cleaned_data'
 data_directory = 'data'
 
+# The cleaned data is cached in a columnar format so that reloading it keeps
+#   the column dtypes. 'feather' files can also be memory-mapped. The
+#   columnar formats need pyarrow, without it the cache falls back to 'csv'.
+cache_format = 'feather'
+cache_file_extensions = {
+    'feather': '.feather',
+    'parquet': '.parquet',
+    'csv': '.csv',
+}
+
+# Every binary feature is stored as a single byte, instead of the 8 bytes of
+#   a default int64, so the cleaned data is roughly 8x smaller in memory
+flag_dtype = np.uint8
+
+# The raw csv files are parsed straight into typed columns (see
+#   raw_file_schemas). 'arrow' parses them with pyarrow's multithreaded csv
+#   reader, without pyarrow it falls back to 'pandas'.
+raw_data_reader = 'arrow'
+
+# The raw files are read concurrently by up to this many threads. Both csv
+#   readers release the GIL while parsing, pyarrow's for the whole parse.
+raw_read_threads = 4
 
-def load_data() -> pd.DataFrame:
+# =============================================================================
+#                           Feature Binning
+# =============================================================================
+
+# Each bin spec is (column, edges, labels, closed). The edges split the
+#   column into len(labels) intervals and every label becomes a 0/1 column
+#   that is set when the value falls in that interval. `closed` is the side
+#   of each interval that is inclusive ('left' is [a, b), 'right' is (a, b]).
+#   Values that fall outside every interval (including nulls) get all 0s.
+#
+# Count columns only ever hold whole numbers, so e.g. [0, 1) is the same as
+#   "== 0" and [1, 5) is the same as "1 to 4".
+
+count_bin_specs = [
+    ('stu_appointments', [0, 1, 5, 10, np.inf], [
+        'has_0_appointments',
+        'has_1-5_appointments',
+        'has_5-10_appointments',
+        'has_10+_appointments',
+    ], 'left'),
+    ('stu_applications', [0, 1, 5, 10, np.inf], [
+        'has_0_applications',
+        'has_1-5_applications',
+        'has_5-10_applications',
+        'has_10+_applications',
+    ], 'left'),
+    ('stu_logins', [0, 1, 10, 100, np.inf], [
+        'has_0_logins',
+        'has_1-10_logins',
+        'has_10-100_logins',
+        'has_100+_logins',
+    ], 'left'),
+    ('stu_attendances', [0, 1, 3, 6, 11, np.inf], [
+        'has_0_attendances',
+        'has_1-2_attendance',
+        'has_3-5_attendances',
+        'has_5-10_attendances',
+        'has_10+_attendances',
+    ], 'left'),
+    ('stu_work_experiences', [0, 1, 2, 3, np.inf], [
+        'has_0_work_experiences',
+        'has_1_work_experience',
+        'has_2_work_experiences',
+        'has_3+_work_experiences',
+    ], 'left'),
+    ('stu_experiences', [0, np.inf], [
+        'has_learning_experience',
+    ], 'right'),
+]
+
+fair_history_bin_specs = [
+    ('attended_main_fair_before', [0, 1, 2, 3, np.inf], [
+        'attended_0_main_fairs_before',
+        'attended_1_main_fair_before',
+        'attended_2_main_fairs_before',
+        'attended_3+_main_fairs_before',
+    ], 'left'),
+    ('attended_other_fair_before', [0, 1, 2, 3, np.inf], [
+        'attended_0_other_fairs_before',
+        'attended_1_other_fairs_before',
+        'attended_2_other_fairs_before',
+        'attended_3+_other_fairs_before',
+    ], 'left'),
+]
+
+date_bin_specs = [
+    ('days_since_created', [-np.inf, 365, 730, 1095, 1825, np.inf], [
+        'created_1_year_pre_cf',
+        'created_2_years_pre_cf',
+        'created_3_years_pre_cf',
+        'created_4_years_pre_cf',
+        'created_5_years_pre_cf',
+    ], 'right'),
+    ('days_since_login', [-np.inf, 7, 30, 90, np.inf], [
+        'login_7_days_pre_cf',
+        'login_30_days_pre_cf',
+        'login_90_days_pre_cf',
+        'login_90+_days_pre_cf',
+    ], 'right'),
+    ('days_until_grad', [-np.inf, -1095, -730, -365, 0, 365, 730, 1095,
+                         np.inf], [
+        'grad_4+_years_pre_cf',
+        'grad_3_years_pre_cf',
+        'grad_2_years_pre_cf',
+        'grad_1_year_pre_cf',
+        'grad_1_year_post_cf',
+        'grad_2_years_post_cf',
+        'grad_3_years_post_cf',
+        'grad_4+_years_post_cf',
+    ], 'right'),
+]
+
+gpa_bin_specs = [
+    ('stu_gpa', [-np.inf, 1.0, 1.5, 2.0, 2.5, 3.0, 3.5, np.inf], [
+        'gpa_1.0',
+        'gpa_1.0-1.5',
+        'gpa_1.5-2.0',
+        'gpa_2.0-2.5',
+        'gpa_2.5-3.0',
+        'gpa_3.0-3.5',
+        'gpa_3.5-4.0',
+    ], 'left'),
+]
+
+
+def past_event_bin_spec(category: str) -> tuple:
+    """
+    Builds the bin spec for the past attendance count of an event category.
+
+    Args:
+        category (str): The event category (e.g. 'networking', 'cf_prep').
+
+    Returns:
+        tuple: The (column, edges, labels, closed) bin spec.
+    """
+    return (f'attended_{category}_before', [0, 1, 2, 3, np.inf], [
+        f'attended_0_past_{category}_events',
+        f'attended_1_past_{category}_events',
+        f'attended_2_past_{category}_events',
+        f'attended_3+_past_{category}_events',
+    ], 'left')
+
+
+def one_hot_bins(
+    values: pd.Series,
+    edges: list,
+    labels: list,
+    closed: str = 'left'
+) -> pd.DataFrame:
+    """
+    Converts a numeric column into one-hot bin columns in a single
+      vectorized pass.
+
+    Args:
+        values (pd.Series): The values to bin.
+        edges (list): The sorted interval edges, one more than the labels.
+        labels (list): The name of the column for each interval.
+        closed (str): The inclusive side of each interval, 'left' or 'right'.
+
+    Returns:
+        pd.DataFrame: A 0/1 `flag_dtype` column per label, indexed like
+          `values`.
+    """
+    if len(edges) != len(labels) + 1:
+        raise ValueError(f'Expected {len(labels) + 1} edges for '
+                         f'{len(labels)} labels, got {len(edges)}')
+    if closed not in ('left', 'right'):
+        raise ValueError(f'closed must be \'left\' or \'right\', '
+                         f'got {closed!r}')
+
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float)
+
+    # searchsorted gives the index of the interval each value falls in,
+    #   anything below the first edge, above the last edge or null
+    #   is out of range and matches no label
+    side = 'right' if closed == 'left' else 'left'
+    codes = np.searchsorted(np.asarray(edges, dtype=float), numbers,
+                            side=side) - 1
+    codes[np.isnan(numbers)] = -1
+
+    one_hot = codes[:, None] == np.arange(len(labels))
+
+    return pd.DataFrame(one_hot.astype(flag_dtype), columns=labels,
+                        index=values.index)
+
+
+def apply_bin_specs(data: pd.DataFrame, bin_specs: list) -> pd.DataFrame:
+    """
+    Adds the one-hot bin columns for every bin spec to the data.
+
+    Args:
+        data (pd.DataFrame): The data containing the source columns.
+        bin_specs (list): The (column, edges, labels, closed) bin specs.
+
+    Returns:
+        pd.DataFrame: The data with the bin columns appended.
+    """
+    binned = [
+        one_hot_bins(data[column], edges, labels, closed)
+        for column, edges, labels, closed in bin_specs
+    ]
+    return pd.concat([data, *binned], axis=1)
+
+
+# =============================================================================
+#                           Token Features
+# =============================================================================
+
+# The comma separated profile columns are parsed into multi-hot flags. Each
+#   set of token rules maps a feature to the tokens that set it. 'exact'
+#   rules match whole tokens, 'substring' rules match any token that
+#   contains one of the patterns.
+
+school_year_rules = {
+    'is_freshman': ['Freshman'],
+    'is_sophomore': ['Sophomore'],
+    'is_junior': ['Junior'],
+    'is_senior': ['Senior'],
+    'is_alumni': ['Alumni'],
+    'is_masters': ['Masters'],
+    'is_doctorate': ['Doctorate'],
+}
+
+# A student with none of these colleges is in another college
+college_rules = {
+    'is_engineering': ['School of Egr. and Comp. Sci.',
+                       'Arts & Sci and School of Egr'],
+    'is_business': ['School of Business Admin.'],
+    'is_health': ['School of Health Sciences'],
+    'is_education': ['School of Ed. and Human Svcs.'],
+    'is_arts': ['College of Arts and Sciences'],
+    'no_college': ['No College Designated', 'University Programs',
+                   'All Colleges'],
+}
+
+# The appointment types are lowercased substring rules. Every type only
+#   counts for the first rule it matches, so e.g. a 'walk-in resume review'
+#   is a walk-in and not a resume review. Types that match no rule are other
+#   appointments.
+appointment_rules = {
+    'has_walk_in_appointment': ['walk-in'],
+    'has_resume_review_appointment': ['resume'],
+    'has_cf_prep_appointment': ['career fair'],
+    'has_career_exploration_appointment': ['career exploration'],
+    'has_job_search_appointment': ['internship', 'job'],
+}
+
+
+def multi_hot_tokens(
+    values: pd.Series,
+    rules: dict,
+    match: str = 'exact',
+    first_match: bool = False,
+    lowercase: bool = False,
+    unmatched: str = None,
+    separator: str = ','
+) -> pd.DataFrame:
+    """
+    Converts a delimited text column into multi-hot flags in a single pass.
+
+    Every distinct value is split into tokens once, and the flags of each
+      distinct value are broadcast back to the rows, so repeated values
+      (like a student's profile on every career fair row) cost nothing.
+
+    Args:
+        values (pd.Series): The delimited text, null values have no tokens.
+        rules (dict): The tokens or patterns that set each feature.
+        match (str): 'exact' to match whole tokens, or 'substring' to match
+          tokens that contain a pattern.
+        first_match (bool): Whether every token only counts for the first
+          rule it matches, in the order of `rules`.
+        lowercase (bool): Whether to lowercase the values before splitting.
+        unmatched (str): The name of an extra feature set when any token
+          matches no rule.
+        separator (str): The token separator.
+
+    Returns:
+        pd.DataFrame: A 0/1 `flag_dtype` column per rule (and `unmatched`),
+          indexed like `values`.
+    """
+    if match not in ('exact', 'substring'):
+        raise ValueError(f'match must be \'exact\' or \'substring\', '
+                         f'got {match!r}')
+
+    codes, distinct_values = pd.factorize(values)
+    distinct_values = pd.Series(distinct_values, dtype=object)
+    if lowercase:
+        distinct_values = distinct_values.str.lower()
+
+    # One row per (distinct value, token)
+    tokens = distinct_values.str.split(separator, regex=False).explode()
+    tokens = tokens.dropna()
+    token_values = tokens.to_numpy(dtype=object)
+
+    matches = np.zeros((len(tokens), len(rules)), dtype=bool)
+    for index, patterns in enumerate(rules.values()):
+        if match == 'exact':
+            matches[:, index] = pd.Series(token_values).isin(patterns)
+        else:
+            for pattern in patterns:
+                matches[:, index] |= np.char.find(
+                    token_values.astype(str), pattern) >= 0
+
+    matched = matches.any(axis=1)
+    if first_match:
+        matches = (np.arange(len(rules)) == matches.argmax(axis=1)[:, None])
+        matches &= matched[:, None]
+
+    columns = list(rules)
+    if unmatched is not None:
+        matches = np.column_stack([matches, ~matched])
+        columns.append(unmatched)
+
+    # The last row is for null values, which have no tokens
+    flags = np.zeros((len(distinct_values) + 1, len(columns)),
+                     dtype=flag_dtype)
+    np.maximum.at(flags, tokens.index.to_numpy(), matches.astype(flag_dtype))
+
+    return pd.DataFrame(flags[codes], columns=columns, index=values.index)
+
+
+def career_fair_major_index(
+    career_fair_df: pd.DataFrame
+) -> tuple[pd.MultiIndex, pd.Index, pd.Index]:
+    """
+    Indexes the eligible majors of every career fair.
+
+    Every (fair, major) pair is hashed into a single integer key, so whether
+      a major is eligible at a fair is one hash lookup, however many fairs
+      and majors there are.
+
+    Args:
+        career_fair_df (pd.DataFrame): The career fair information, with the
+          comma separated `career_fair_majors` of each fair.
+
+    Returns:
+        tuple: The (name, date) of every fair, every major, and the key
+          (fair code * majors + major code) of every eligible pair.
+    """
+    fairs = pd.MultiIndex.from_arrays([
+        career_fair_df['career_fair_name'].astype(object),
+        career_fair_df['career_fair_date'],
+    ])
+    fair_majors = (career_fair_df['career_fair_majors'].astype(object)
+                   .str.split(',').reset_index(drop=True).explode()
+                   .str.strip().dropna())
+
+    majors = pd.Index(fair_majors.unique())
+    fair_codes = fairs.unique().get_indexer(fairs[fair_majors.index])
+    pair_keys = fair_codes * len(majors) + majors.get_indexer(fair_majors)
+
+    return fairs.unique(), majors, pd.Index(np.unique(pair_keys))
+
+
+def match_fair_majors(
+    rows: pd.DataFrame,
+    student_majors: pd.Series,
+    major_index: tuple
+) -> np.ndarray:
+    """
+    Checks whether any of the student's majors is eligible at the career
+      fair of each row (see career_fair_major_index).
+
+    Each distinct majors value is split once, and each distinct (majors,
+      fair) pair of the rows is looked up once and broadcast back to the rows.
+
+    Args:
+        rows (pd.DataFrame): The career fair name and date of every row.
+        student_majors (pd.Series): The comma separated majors of every row.
+        major_index (tuple): The index of the career fair majors.
+
+    Returns:
+        np.ndarray: A 0/1 `flag_dtype` value per row.
+    """
+    fairs, majors, pair_keys = major_index
+
+    fair_codes = fairs.get_indexer(pd.MultiIndex.from_arrays([
+        rows['career_fair_name'].astype(object),
+        rows['career_fair_date'],
+    ]))
+    value_codes, values = pd.factorize(student_majors)
+
+    # The major code of every token of every distinct value, without the
+    #   majors that no fair lists
+    tokens = (pd.Series(values, dtype=object).str.split(',').explode()
+              .str.strip().dropna())
+    token_majors = majors.get_indexer(tokens)
+    is_listed = token_majors >= 0
+    token_majors = pd.Series(token_majors[is_listed],
+                             index=tokens.index[is_listed])
+
+    # Look every distinct (value, fair) pair up once. Null values and
+    #   unknown fairs never match.
+    pair_codes, pairs = pd.factorize(
+        value_codes.astype(np.int64) * (len(fairs) + 1) + fair_codes + 1)
+    pair_values = pairs // (len(fairs) + 1)
+    pair_fairs = pairs % (len(fairs) + 1) - 1
+
+    pair_tokens = pd.DataFrame({'pair': np.arange(len(pairs)),
+                                'value': pair_values,
+                                'fair': pair_fairs})
+    pair_tokens = pair_tokens[pair_tokens['fair'] >= 0].merge(
+        token_majors.rename('major'), left_on='value', right_index=True)
+    is_eligible = pd.Index(
+        pair_tokens['fair'] * len(majors) + pair_tokens['major']
+    ).isin(pair_keys)
+
+    pair_matches = np.zeros(len(pairs), dtype=flag_dtype)
+    pair_matches[pair_tokens['pair'].to_numpy()[is_eligible]] = 1
+
+    return pair_matches[pair_codes]
+
+
+# =============================================================================
+#                           History Counts
+# =============================================================================
+
+# A student attended career fair prep for a fair when they went to a prep
+#   session in this many days before it
+career_fair_prep_window_days = 60
+
+
+def count_prior_events(
+    query_ids: pd.Series,
+    query_dates: pd.Series,
+    event_ids: pd.Series,
+    event_dates: pd.Series,
+    weights: np.ndarray = None,
+    window: np.timedelta64 = None
+) -> np.ndarray:
+    """
+    Counts, for every (id, date) query, the events with the same id that
+      happened strictly before the date.
+
+    The events are sorted once by (id, date) and every query is answered with
+      two binary searches into the sorted events, so memory stays linear in
+      the number of events and queries (no events x queries cross product).
+
+    Args:
+        query_ids (pd.Series): The student id of each query.
+        query_dates (pd.Series): The date of each query.
+        event_ids (pd.Series): The student id of each event.
+        event_dates (pd.Series): The date of each event.
+        weights (np.ndarray): Optional (events, k) matrix. When given, the
+          weights of the prior events are summed per column instead of
+          counting the events, giving k counts per query.
+        window (np.timedelta64): Optional look-back window. When given, only
+          the events in [date - window, date) are counted.
+
+    Returns:
+        np.ndarray: The count for each query, or a (queries, k) matrix of
+          sums when `weights` is given. Queries with a null date are 0.
+    """
+    query_dates = pd.to_datetime(query_dates).to_numpy()
+    event_dates = pd.to_datetime(event_dates).to_numpy()
+    query_ids = np.asarray(query_ids)
+    event_ids = np.asarray(event_ids)
+
+    if weights is not None:
+        weights = np.asarray(weights)
+        if weights.ndim == 1:
+            weights = weights[:, None]
+
+    # Events without a date can never be before a query
+    dated = ~np.isnat(event_dates)
+    event_dates = event_dates[dated]
+    event_ids = event_ids[dated]
+    if weights is not None:
+        weights = weights[dated]
+
+    # Replace ids and dates with dense integer codes so that every
+    #   (id, date) pair becomes a single sortable integer key. The date
+    #   codes keep the date order, NaT gets the highest code. Only the
+    #   distinct dates are sorted.
+    id_codes, _ = pd.factorize(np.concatenate([event_ids, query_ids]))
+    all_dates = [event_dates, query_dates]
+    if window is not None:
+        all_dates.append(query_dates - np.timedelta64(window))
+    date_codes, date_values = pd.factorize(np.concatenate(all_dates))
+    date_ranks = np.empty(len(date_values) + 1, dtype=np.int64)
+    date_ranks[np.argsort(date_values, kind='stable')] = np.arange(
+        len(date_values))
+    date_ranks[-1] = len(date_values)
+    date_codes = date_ranks[date_codes]
+    stride = len(date_values) + 1
+
+    n_events = len(event_ids)
+    n_queries = len(query_ids)
+    event_keys = id_codes[:n_events].astype(np.int64) * stride
+    event_keys += date_codes[:n_events]
+    query_starts = id_codes[n_events:].astype(np.int64) * stride
+    query_keys = query_starts + date_codes[n_events:n_events + n_queries]
+    if window is not None:
+        query_starts += date_codes[n_events + n_queries:]
+
+    order = np.argsort(event_keys, kind='stable')
+    event_keys = event_keys[order]
+
+    # The student's events (in the window) are [first, before) in the
+    #   sorted keys
+    first = np.searchsorted(event_keys, query_starts, side='left')
+    before = np.searchsorted(event_keys, query_keys, side='left')
+    before[np.isnat(query_dates)] = first[np.isnat(query_dates)]
+
+    if weights is None:
+        return before - first
+
+    cumulative = np.zeros((n_events + 1, weights.shape[1]),
+                          dtype=np.result_type(weights.dtype, np.int64))
+    np.cumsum(weights[order], axis=0, out=cumulative[1:])
+    return cumulative[before] - cumulative[first]
+
+
+def event_category_matrix(
+    stu_event_attendance_df: pd.DataFrame,
+    event_categories: list | None = None
+) -> tuple[list, np.ndarray]:
+    """
+    Parses the comma separated `event_categories` of every event once into a
+      multi-hot matrix, with a last 'cf_prep' column for career fair prep
+      sessions (events with 'career fair' in the name).
+
+    A category only matches an event when it is spelled exactly like one of
+      the event's lowercased categories, so multi-word categories like
+      'career fairs' (named 'career_fairs') and categories after a ', '
+      separator never match.
+
+    Args:
+        stu_event_attendance_df (pd.DataFrame): The event attendance data.
+        event_categories (list | None): The categories to match, without
+          'cf_prep', e.g. those of every event when only the events of some
+          students are passed. Defaults to the categories of the events.
+
+    Returns:
+        tuple: The category names and the (events, categories) 0/1 matrix.
+    """
+    # One row per (event, category), events without categories become a
+    #   single null row
+    event_category_rows = (
+        stu_event_attendance_df['event_categories'].astype(object)
+        .str.lower().str.strip().str.split(',')
+        .reset_index(drop=True)
+        .explode()
+    )
+
+    if event_categories is None:
+        event_categories = set(
+            category.strip().lower().replace(' ', '_')
+            for category in event_category_rows.dropna().unique()
+        )
+        # Events without categories add a 'nan' category that never matches
+        if event_category_rows.isna().any():
+            event_categories.add('nan')
+        event_categories = sorted(event_categories)
+    category_codes = pd.Index(event_categories).get_indexer(
+        event_category_rows)
+    matched = category_codes >= 0
+
+    is_prep_event = is_career_fair_prep(stu_event_attendance_df)
+
+    category_matrix = np.zeros(
+        (len(stu_event_attendance_df), len(event_categories) + 1),
+        dtype=np.int8)
+    category_matrix[event_category_rows.index[matched],
+                    category_codes[matched]] = 1
+    category_matrix[:, -1] = is_prep_event
+
+    return event_categories + ['cf_prep'], category_matrix
+
+
+def is_career_fair_prep(stu_event_attendance_df: pd.DataFrame) -> np.ndarray:
+    """
+    Checks which events are career fair prep sessions (events with 'career
+      fair' in the name).
+    """
+    return stu_event_attendance_df['event_name'].astype(
+        str).str.lower().str.contains('career fair', regex=False).to_numpy()
+
+
+# =============================================================================
+#                           Cleaned Data Cache
+# =============================================================================
+
+
+def columnar_cache_available() -> bool:
+    """
+    Checks whether pyarrow is installed for the feather and parquet caches.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_cache_format(requested_format: str) -> str:
+    """
+    Validates the cache format, falling back to csv when the columnar formats
+      are not available.
+
+    Args:
+        requested_format (str): 'feather', 'parquet' or 'csv'.
+
+    Returns:
+        str: The cache format to use.
+    """
+    if requested_format not in cache_file_extensions:
+        raise ValueError(f'Unknown cache format {requested_format!r}, expected '
+                         f'one of {list(cache_file_extensions)}')
+
+    if requested_format != 'csv' and not columnar_cache_available():
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.YELLOW} pyarrow is not '
+              f'installed, caching cleaned data as csv{Style.RESET_ALL}')
+        return 'csv'
+
+    return requested_format
+
+
+def cleaned_data_path(file_format: str) -> str:
+    """
+    Gets the path of the cleaned data cache for the given format.
+    """
+    return os.path.join(
+        data_directory,
+        cleaned_data_file_name + cache_file_extensions[file_format]
+    )
+
+
+def find_cleaned_data(file_format: str) -> str | None:
+    """
+    Finds the cached cleaned data, preferring the given format and falling
+      back to a csv cache.
+
+    Returns:
+        str | None: The path of the cache, or None if there is no cache.
+    """
+    for candidate in dict.fromkeys([file_format, 'csv']):
+        path = cleaned_data_path(candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def read_cleaned_data(path: str, memory_map: bool = False) -> pd.DataFrame:
+    """
+    Reads the cleaned data cache.
+
+    Args:
+        path (str): The path of a feather, parquet or csv cache.
+        memory_map (bool): Whether to memory-map the file instead of reading
+          it into memory (feather and parquet only). With an uncompressed
+          feather file the numeric columns are read straight from the
+          mapped file.
+
+    Returns:
+        pd.DataFrame: The cleaned data, with the fair index of the cache in
+          `data.attrs['fair_index']` (see fair_slices).
+    """
+    if path.endswith(cache_file_extensions['feather']):
+        from pyarrow import feather
+        table = feather.read_table(path, memory_map=memory_map)
+        data = table.to_pandas(split_blocks=memory_map)
+    elif path.endswith(cache_file_extensions['parquet']):
+        data = pd.read_parquet(path, memory_map=memory_map)
+    else:
+        # csv doesn't keep the dtypes, every integer column of the cleaned
+        #   data is a flag
+        data = pd.read_csv(path,
+                           parse_dates=['career_fair_date', 'stu_grad_date'],
+                           dtype={'career_fair_name': 'category'})
+        flag_columns = data.select_dtypes('integer').columns
+        data = data.astype({column: flag_dtype for column in flag_columns})
+        # The categories are read in the order the fairs first appear, which
+        #   the fair-sorted rows would make date order
+        names = data['career_fair_name']
+        data['career_fair_name'] = names.cat.reorder_categories(
+            sorted(names.cat.categories))
+
+    fair_index = read_fair_index(path)
+    if fair_index is not None:
+        data.attrs['fair_index'] = fair_index
+    return data
+
+
+# =============================================================================
+#                           Fair-Partitioned Storage
+# =============================================================================
+
+# The cleaned data is stored sorted by career fair (by career_fair_date, then
+#   career_fair_name), so the rows of every fair are a single range. The
+#   offset and length of every fair's range are written next to the cache, in
+#   a small json index, and kept in the `fair_index` attribute of the loaded
+#   frame (see fair_slices), so the rows of a fair are sliced rather than
+#   found by comparing every row's career_fair_name.
+fair_index_extension = '.fairs.json'
+
+
+def fair_index_path(path: str) -> str:
+    return path + fair_index_extension
+
+
+def fair_partition(data: pd.DataFrame) -> tuple[np.ndarray, list]:
+    """
+    Gets the order that sorts the rows of the cleaned data by career fair,
+      keeping the order of every fair's rows, and the index of the sorted
+      rows.
+
+    Args:
+        data (pd.DataFrame): At least the career_fair_name and
+          career_fair_date of every row.
+
+    Returns:
+        tuple: The positions of the rows in sorted order, and the
+          career_fair_name, career_fair_date, offset and length of every fair
+          in the sorted rows.
+    """
+    names = data['career_fair_name']
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        # Fairs on the same date are sorted by name, whatever the order of
+        #   the categories
+        names = names.cat.reorder_categories(
+            sorted(names.cat.categories, key=str))
+    groups = data.groupby([data['career_fair_date'], names],
+                          observed=True, sort=True).indices
+
+    fair_index = []
+    offset = 0
+    for (date, name), positions in groups.items():
+        fair_index.append({
+            'career_fair_name': str(name),
+            'career_fair_date': pd.Timestamp(date).isoformat(),
+            'offset': offset,
+            'length': len(positions),
+        })
+        offset += len(positions)
+
+    if offset != len(data):
+        raise ValueError(f'{len(data) - offset} rows of the cleaned data have '
+                         f'no career fair')
+
+    order = (np.concatenate(list(groups.values())) if groups
+             else np.arange(0))
+    return order, fair_index
+
+
+def matching_fair_index(data: pd.DataFrame) -> list | None:
+    """
+    Gets the fair index of the data (see fair_partition), when it still
+      describes the rows of the data. Only the rows at the ends of every
+      fair's range are checked, so this doesn't scan the data.
+
+    Returns:
+        list | None: The fair index, or None when the data has none or its
+          rows changed since it was indexed.
+    """
+    fair_index = data.attrs.get('fair_index')
+    if not fair_index or 'career_fair_name' not in data:
+        return None
+    if sum(fair['length'] for fair in fair_index) != len(data):
+        return None
+
+    names = data['career_fair_name']
+    dates = data['career_fair_date']
+    for fair in fair_index:
+        date = pd.Timestamp(fair['career_fair_date'])
+        for position in (fair['offset'],
+                         fair['offset'] + fair['length'] - 1):
+            if (names.iat[position] != fair['career_fair_name'] or
+                    dates.iat[position] != date):
+                return None
+
+    return fair_index
+
+
+def sort_by_fair(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sorts the rows of the cleaned data by career fair (see fair_partition)
+      and indexes them, unless they already are.
+
+    Returns:
+        pd.DataFrame: The sorted data, with its fair index in
+          `data.attrs['fair_index']`.
+    """
+    if (matching_fair_index(data) is not None and
+            data.index.equals(pd.RangeIndex(len(data)))):
+        return data
+
+    order, fair_index = fair_partition(data)
+    if not np.array_equal(order, np.arange(len(data))):
+        data = data.take(order)
+    data = data.reset_index(drop=True)
+    data.attrs['fair_index'] = fair_index
+
+    return data
+
+
+def fair_slices(data: pd.DataFrame) -> dict | None:
+    """
+    Gets the range of rows of every career fair of the cleaned data from its
+      fair index, without scanning the rows.
+
+    Returns:
+        dict | None: The slice of the rows of every (career_fair_name,
+          career_fair_date), in date order, or None when the data isn't
+          sorted by fair (see sort_by_fair).
+    """
+    fair_index = matching_fair_index(data)
+    if fair_index is None:
+        return None
+
+    return {
+        (fair['career_fair_name'], pd.Timestamp(fair['career_fair_date'])):
+            slice(fair['offset'], fair['offset'] + fair['length'])
+        for fair in fair_index
+    }
+
+
+def write_fair_index(path: str, fair_index: list):
+    """
+    Writes the fair index of the cleaned data cache at the given path.
+    """
+    with open(fair_index_path(path), 'w') as index_file:
+        json.dump(fair_index, index_file, indent=2)
+
+
+def read_fair_index(path: str) -> list | None:
+    """
+    Reads the fair index of the cleaned data cache at the given path.
+
+    Returns:
+        list | None: The fair index, or None when the cache has none.
+    """
+    if not os.path.isfile(fair_index_path(path)):
+        return None
+    with open(fair_index_path(path)) as index_file:
+        return json.load(index_file)
+
+
+def save_cleaned_data(data: pd.DataFrame, file_format: str) -> str:
+    """
+    Writes the cleaned data cache, sorted by career fair, and its fair index
+      (see sort_by_fair).
+
+    Args:
+        data (pd.DataFrame): The cleaned data.
+        file_format (str): 'feather', 'parquet' or 'csv'.
+
+    Returns:
+        str: The path the cache was written to.
+    """
+    path = cleaned_data_path(file_format)
+    data = sort_by_fair(data)
+
+    if file_format == 'feather':
+        # Uncompressed so that the file can be memory-mapped
+        data.to_feather(path, compression='uncompressed')
+    elif file_format == 'parquet':
+        data.to_parquet(path, index=False)
+    else:
+        data.to_csv(path, index=False)
+    write_fair_index(path, data.attrs['fair_index'])
+
+    return path
+
+
+def save_cleaned_data_chunks(chunks, file_format: str) -> str:
+    """
+    Writes the cleaned data cache one chunk at a time, so only one chunk is
+      in memory at once. The file is the same as the one save_cleaned_data
+      writes for all the chunks concatenated.
+
+    The chunks are written to a partial file that only replaces the cache
+      once every chunk was written and the rows were sorted by career fair
+      (see sort_cleaned_data_file).
+
+    Args:
+        chunks (iterable): The cleaned data chunks, every chunk with the same
+          columns.
+        file_format (str): 'feather', 'parquet' or 'csv'.
+
+    Returns:
+        str: The path the cache was written to.
+    """
+    path = cleaned_data_path(file_format)
+    partial_path = f'{path}.partial'
+    writer = None
+    schema = None
+
+    try:
+        for chunk in chunks:
+            chunk = chunk.reset_index(drop=True)
+
+            if file_format == 'csv':
+                chunk.to_csv(partial_path, index=False,
+                             mode='a' if schema is not None else 'w',
+                             header=schema is None)
+                schema = chunk.columns
+                continue
+
+            import pyarrow as pa
+            if writer is None:
+                # A column that is null in the first chunk has no type yet,
+                #   the only such columns in the cleaned data are strings
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                for index, field in enumerate(schema):
+                    if pa.types.is_null(field.type):
+                        schema = schema.set(index, field.with_type(pa.string()))
+
+                if file_format == 'feather':
+                    # A feather file is an uncompressed Arrow IPC file
+                    writer = pa.ipc.new_file(partial_path, schema)
+                else:
+                    from pyarrow import parquet
+                    writer = parquet.ParquetWriter(partial_path, schema)
+
+            writer.write_table(pa.Table.from_pandas(
+                chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+    fair_index = sort_cleaned_data_file(partial_path, path, file_format)
+    write_fair_index(path, fair_index)
+
+    return path
+
+
+def sort_cleaned_data_file(
+    unsorted_path: str,
+    path: str,
+    file_format: str
+) -> list:
+    """
+    Rewrites a cleaned data file sorted by career fair (see fair_partition),
+      a fair at a time, and replaces the file at `path` with it.
+
+    Only the career fair columns are read to sort the rows. The rows of a
+      feather file are then taken from the memory-mapped file a fair at a
+      time, so only one fair's rows are in memory at once. A parquet or csv
+      file is read whole.
+
+    Args:
+        unsorted_path (str): The file to sort, removed once it's sorted.
+        path (str): The path to write the sorted file to.
+        file_format (str): 'feather', 'parquet' or 'csv'.
+
+    Returns:
+        list: The fair index of the sorted file.
+    """
+    if file_format == 'csv':
+        data = sort_by_fair(read_cleaned_data(unsorted_path))
+        data.to_csv(unsorted_path, index=False)
+        os.replace(unsorted_path, path)
+        return data.attrs['fair_index']
+
+    import pyarrow as pa
+    if file_format == 'feather':
+        from pyarrow import feather
+        table = feather.read_table(unsorted_path, memory_map=True)
+    else:
+        from pyarrow import parquet
+        table = parquet.read_table(unsorted_path, memory_map=True)
+
+    order, fair_index = fair_partition(
+        table.select(['career_fair_date', 'career_fair_name']).to_pandas())
+    if np.array_equal(order, np.arange(len(order))):
+        del table
+        os.replace(unsorted_path, path)
+        return fair_index
+
+    sorted_path = f'{unsorted_path}.sorted'
+    if file_format == 'feather':
+        writer = pa.ipc.new_file(sorted_path, table.schema)
+    else:
+        writer = parquet.ParquetWriter(sorted_path, table.schema)
+    try:
+        for fair in fair_index:
+            writer.write_table(table.take(
+                order[fair['offset']:fair['offset'] + fair['length']]))
+    finally:
+        writer.close()
+
+    del table
+    os.replace(sorted_path, path)
+    os.remove(unsorted_path)
+
+    return fair_index
+
+
+# =============================================================================
+#                           Pipeline Stage Cache
+# =============================================================================
+
+# The raw csv files in the data directory, keyed by name. Each file may also
+#   be compressed, with one of `raw_file_compressions` appended to its name.
+raw_file_compressions = ['.gz', '.zst']
+raw_file_names = {
+    'appointment_data': 'appointment_data.csv',
+    'career_fair_data': 'career_fair_data.csv',
+    'registration_data': 'registration_data.csv',
+    'student_data': 'student_data.csv',
+    'student_counts_1': 'student_counts_1.csv',
+    'student_counts_2': 'student_counts_2.csv',
+    'student_fair_attendance': 'student_fair_attendance.csv',
+    'student_event_attendance': 'student_event_attendance.csv',
+}
+
+# The type of every column used from each raw file. Only these columns are
+#   read. 'str' columns are text (missing values are NaN), 'date' columns are
+#   parsed to datetime64 and 'count' columns are floats that may be written
+#   with thousands separators ('1,845').
+raw_file_schemas = {
+    'appointment_data': {
+        'stu_id': 'int64',
+        'appointment_types': 'str',
+    },
+    'career_fair_data': {
+        'career_fair_name': 'str',
+        'career_fair_date': 'date',
+        'career_fair_majors': 'str',
+    },
+    'registration_data': {
+        'stu_id': 'int64',
+        'career_fair_name': 'str',
+        'career_fair_date': 'date',
+        'is_pre_registered': 'str',
+        'is_checked_in': 'str',
+    },
+    'student_data': {
+        'stu_id': 'int64',
+        'stu_is_archived': 'str',
+        'stu_is_activated': 'str',
+        'stu_is_visible': 'str',
+        'stu_is_work_study': 'str',
+        'stu_is_profile_complete': 'str',
+        'stu_grad_date': 'date',
+        'stu_creation_date': 'date',
+        'stu_login_date': 'date',
+        'stu_gpa': 'float64',
+        'stu_majors': 'str',
+        'stu_colleges': 'str',
+        'stu_school_year': 'str',
+    },
+    'student_counts_1': {
+        'stu_id': 'int64',
+        'stu_applications': 'count',
+        'stu_logins': 'count',
+        'stu_appointments': 'count',
+    },
+    'student_counts_2': {
+        'stu_id': 'int64',
+        'stu_attendances': 'count',
+        'stu_work_experiences': 'count',
+        'stu_experiences': 'count',
+    },
+    'student_fair_attendance': {
+        'stu_id': 'int64',
+        'career_fair_name': 'str',
+        'career_fair_date': 'date',
+    },
+    'student_event_attendance': {
+        'stu_id': 'int64',
+        'event_name': 'str',
+        'event_date': 'date',
+        'event_categories': 'str',
+    },
+}
+
+# Every stage of the pipeline is cached under a key derived from the code
+#   version and the keys of its inputs (raw files or other stages), so
+#   changing a raw file only recomputes the stages that depend on it.
+pipeline_stages = {
+    'student_merge': ['student_data', 'student_counts_1',
+                      'student_counts_2', 'appointment_data'],
+    'fair_cross_product': ['student_data', 'career_fair_data',
+                           'registration_data'],
+    'fair_attendance': ['fair_cross_product', 'career_fair_data',
+                        'student_fair_attendance'],
+    'event_attendance': ['fair_cross_product', 'career_fair_data',
+                         'student_event_attendance'],
+    'date_features': ['fair_cross_product', 'student_merge'],
+    'student_features': ['student_merge'],
+    'fair_majors': ['fair_cross_product', 'student_merge',
+                    'career_fair_data'],
+    'cleaned_data': ['fair_cross_product', 'student_features',
+                     'fair_majors', 'fair_attendance', 'event_attendance',
+                     'date_features'],
+}
+
+stage_cache_directory_name = 'cache'
+fingerprints_file_name = 'fingerprints.json'
+
+
+def stage_cache_directory() -> str:
+    """
+    Gets the directory holding the cached pipeline stages.
+    """
+    return os.path.join(data_directory, stage_cache_directory_name)
+
+
+def fingerprint_raw_files() -> dict:
+    """
+    Fingerprints every raw csv file by size, modification time and content
+      hash.
+
+    The content hash is only recomputed when the size or modification time
+      changed since the last run, so unchanged files are not read again.
+
+    Returns:
+        dict: The content hash of each raw file, keyed by name.
+    """
+    manifest_path = os.path.join(stage_cache_directory(),
+                                 fingerprints_file_name)
+    manifest = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+
+    fingerprints = {}
+    for name in raw_file_names:
+        path = raw_file_path(name)
+        stat = os.stat(path)
+        known = manifest.get(name, {})
+
+        if (known.get('size') != stat.st_size or
+                known.get('mtime_ns') != stat.st_mtime_ns):
+            content_hash = hashlib.sha256()
+            with open(path, 'rb') as raw_file:
+                for block in iter(lambda: raw_file.read(1 << 20), b''):
+                    content_hash.update(block)
+            known = {
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': content_hash.hexdigest(),
+            }
+            manifest[name] = known
+
+        fingerprints[name] = known['sha256']
+
+    os.makedirs(stage_cache_directory(), exist_ok=True)
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    return fingerprints
+
+
+def code_version() -> str:
+    """
+    Hashes the source of this module and the feature settings, so any change
+      to the preprocessing code or settings invalidates the cached stages.
+    """
+    version = hashlib.sha256()
+    with open(__file__, 'rb') as source_file:
+        version.update(source_file.read())
+    version.update(f'prep_window={career_fair_prep_window_days}'.encode())
+    return version.hexdigest()
+
+
+def stage_keys(fingerprints: dict) -> dict:
+    """
+    Derives the cache key of every pipeline stage from the code version and
+      the keys of its inputs.
+
+    Args:
+        fingerprints (dict): The content hash of each raw file.
+
+    Returns:
+        dict: The key of every raw file and pipeline stage, keyed by name.
+    """
+    keys = dict(fingerprints)
+    version = code_version()
+    for stage, inputs in pipeline_stages.items():
+        stage_key = hashlib.sha256()
+        stage_key.update(f'{stage}:{version}'.encode())
+        for name in inputs:
+            stage_key.update(f':{name}={keys[name]}'.encode())
+        keys[stage] = stage_key.hexdigest()
+    return keys
+
+
+def stage_cache_path(stage: str, key: str) -> str:
+    return os.path.join(stage_cache_directory(), f'{stage}-{key[:16]}.pkl')
+
+
+def run_stage(stage: str, key: str, compute) -> pd.DataFrame:
+    """
+    Loads a pipeline stage from the cache, or computes and caches it.
+
+    Args:
+        stage (str): The name of the stage.
+        key (str): The cache key of the stage.
+        compute (callable): Computes the stage when it is not cached.
+
+    Returns:
+        pd.DataFrame: The output of the stage.
+    """
+    path = stage_cache_path(stage, key)
+    if os.path.isfile(path):
+        print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Loading cached '
+              f'{Fore.LIGHTMAGENTA_EX}{stage}{Style.RESET_ALL}')
+        output = pd.read_pickle(path)
+        print_memory_usage(stage, output)
+        return output
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Computing '
+          f'{Fore.LIGHTMAGENTA_EX}{stage}{Style.RESET_ALL}')
+    output = compute()
+    print_memory_usage(stage, output)
+
+    # Remove the stale versions of the stage before caching the new one
+    os.makedirs(stage_cache_directory(), exist_ok=True)
+    for file_name in os.listdir(stage_cache_directory()):
+        if file_name.startswith(f'{stage}-') and file_name.endswith('.pkl'):
+            os.remove(os.path.join(stage_cache_directory(), file_name))
+    output.to_pickle(path)
+
+    return output
+
+
+def cleaned_data_key_path() -> str:
+    return os.path.join(data_directory, f'{cleaned_data_file_name}.key')
+
+
+def read_cleaned_data_key() -> str | None:
+    """
+    Reads the key of the raw data and code the cleaned data was built from.
+    """
+    if not os.path.isfile(cleaned_data_key_path()):
+        return None
+    with open(cleaned_data_key_path()) as key_file:
+        return key_file.read().strip()
+
+
+def load_data(
+    file_format: str = cache_format,
+    memory_map: bool = False,
+    chunk_size: int | None = None,
+    workers: int = 1,
+    append_new_fairs: bool = False
+) -> pd.DataFrame:
+    """
+    Loads and merges data from multiple CSV files to create a cleaned dataset.
+
+    Every stage of the pipeline is cached in the data directory under a key
+      derived from the raw csv files it depends on, so only the stages whose
+      inputs changed are recomputed. The cleaned dataset itself is cached in
+      the data directory and loaded from there while the raw files and the
+      code are unchanged.
+
+    With a `chunk_size`, the cleaned dataset is instead built `chunk_size`
+      students at a time, and every chunk is appended to the cache (see
+      clean_data_chunks). Peak memory then grows with the chunk size rather
+      than with every student for every career fair. With `workers` > 1,
+      the rows are cleaned in a pool of worker processes (see
+      parallel_clean_student_fair_rows). Neither uses the stage cache, and
+      the result is the same either way.
+
+    With `append_new_fairs`, an out of date cleaned dataset is extended with
+      the rows of the career fairs added since it was built instead of being
+      rebuilt (see append_new_career_fairs).
+
+    Args:
+        file_format (str): The cache format, 'feather', 'parquet' or 'csv'.
+        memory_map (bool): Whether to memory-map the cache when loading it.
+        chunk_size (int | None): The number of students per chunk, or None to
+          build the whole dataset at once.
+        workers (int): The number of worker processes to clean the rows in.
+        append_new_fairs (bool): Whether to only clean the rows of new career
+          fairs when the cleaned dataset is out of date.
+
+    Returns:
+        pd.DataFrame: The cleaned dataset.
+    """
+    print(f'{Fore.MAGENTA}\nLoading data...{Style.RESET_ALL}')
+
+    os.makedirs(data_directory, exist_ok=True)
+    file_format = resolve_cache_format(file_format)
+    cached_path = find_cleaned_data(file_format)
+
+    missing_files = [
+        file_name for name, file_name in raw_file_names.items()
+        if raw_file_path(name) is None
+    ]
+    if missing_files:
+        if cached_path is None:
+            raise FileNotFoundError(
+                f'Missing raw data files in {data_directory}: '
+                f'{", ".join(missing_files)}')
+        # Without the raw files there is nothing to check the cache against
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.YELLOW} Raw data files '
+              f'missing, using the cached cleaned data{Style.RESET_ALL}')
+    else:
+        keys = stage_keys(fingerprint_raw_files())
+        if cached_path is not None and (
+                read_cleaned_data_key() != keys['cleaned_data']):
+            print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.YELLOW} Cleaned data is '
+                  f'out of date{Style.RESET_ALL}')
+            if append_new_fairs:
+                cached_path = append_new_career_fairs(
+                    cached_path, file_format, keys, workers)
+            else:
+                cached_path = None
+
+            if cached_path is not None:
+                write_cleaned_data_key(keys)
+
+    if cached_path is not None:
+        print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Loading cleaned '
+              f'data from {Fore.LIGHTBLACK_EX}{cached_path}'
+              f'{Fore.BLUE}...{Style.RESET_ALL}')
+        cleaned_data = read_cleaned_data(cached_path, memory_map)
+        print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Cleaned data loaded'
+              f'{Style.RESET_ALL}')
+        return cleaned_data
+
+    streamed = chunk_size is not None or workers > 1
+    if streamed:
+        cleaned_path = save_cleaned_data_chunks(
+            clean_data_chunks(chunk_size, workers), file_format)
+    else:
+        # Sorted like the cache, so the rows are the same as when they are
+        #   loaded from it
+        cleaned_data = sort_by_fair(run_pipeline(keys))
+
+        print(f'{Fore.MAGENTA}\nSaving cleaned data...{Style.RESET_ALL}')
+
+        cleaned_path = save_cleaned_data(cleaned_data, file_format)
+
+    write_cleaned_data_key(keys)
+
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Cleaned data saved to '
+          f'{Fore.LIGHTBLACK_EX}{cleaned_path}'
+          f'{Style.RESET_ALL}')
+
+    if streamed:
+        cleaned_data = read_cleaned_data(cleaned_path, memory_map)
+        print_cleaned_summary(cleaned_data)
+
+    return cleaned_data
+
+
+def raw_file_path(name: str) -> str | None:
+    """
+    Finds one of the raw csv files, plain or compressed.
+
+    Args:
+        name (str): The name of the file in `raw_file_names`.
+
+    Returns:
+        str | None: The path of the file, or None if it doesn't exist.
+    """
+    path = os.path.join(data_directory, raw_file_names[name])
+    for compression in ['', *raw_file_compressions]:
+        if os.path.isfile(path + compression):
+            return path + compression
+    return None
+
+
+def read_raw_data(name: str) -> pd.DataFrame:
+    """
+    Reads one of the raw csv files, decompressing it if needed.
+
+    Args:
+        name (str): The name of the file in `raw_file_names`.
+
+    Returns:
+        pd.DataFrame: The raw data, typed by `raw_file_schemas`.
+    """
+    path = raw_file_path(name)
+    if path is None:
+        raise FileNotFoundError(
+            f'Missing raw data file in {data_directory}: '
+            f'{raw_file_names[name]}')
+
+    # pandas needs the zstandard package for zstd files, pyarrow decompresses
+    #   them itself
+    if path.endswith('.zst') and columnar_cache_available():
+        import pyarrow as pa
+        with pa.input_stream(path, compression='zstd') as source:
+            return read_raw_csv(source, name)
+
+    return read_raw_csv(path, name)
+
+
+def read_raw_files(names, threads: int = None) -> dict:
+    """
+    Reads raw csv files concurrently in a bounded pool of threads, printing
+      how long each file took.
+
+    Args:
+        names: The names of the files in `raw_file_names`.
+        threads (int): The maximum number of files read at once, defaults to
+          `raw_read_threads`.
+
+    Returns:
+        dict: The raw data of each file, keyed by name in the order of
+          `names`.
+    """
+    names = list(dict.fromkeys(names))
+    if threads is None:
+        threads = raw_read_threads
+    if threads < 1:
+        raise ValueError(f'threads must be at least 1, got {threads}')
+    if not names:
+        return {}
+
+    def read(name):
+        start = time.perf_counter()
+        data = read_raw_data(name)
+        return data, time.perf_counter() - start
+
+    start = time.perf_counter()
+    raw_data = {}
+    with ThreadPoolExecutor(max_workers=min(threads, len(names))) as executor:
+        futures = {executor.submit(read, name): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            raw_data[name], seconds = future.result()
+            print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} '
+                  f'{os.path.basename(raw_file_path(name))} loaded '
+                  f'{Fore.LIGHTBLACK_EX}({len(raw_data[name])} rows, '
+                  f'{seconds:.2f}s){Style.RESET_ALL}')
+
+    print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} {len(names)} raw files loaded '
+          f'{Fore.LIGHTBLACK_EX}({time.perf_counter() - start:.2f}s)'
+          f'{Style.RESET_ALL}')
+
+    return {name: raw_data[name] for name in names}
+
+
+def read_raw_csv(source, name: str, reader: str = None) -> pd.DataFrame:
+    """
+    Parses a raw csv file into the typed columns of its schema in
+      `raw_file_schemas`, so no string fix-ups are needed after loading.
+
+    Args:
+        source: The path or file-like object of the csv file.
+        name (str): The name of the file in `raw_file_schemas`.
+        reader (str): 'pandas' or 'arrow', defaults to `raw_data_reader`.
+
+    Returns:
+        pd.DataFrame: The raw data, with the schema's columns in file order.
+    """
+    schema = raw_file_schemas[name]
+    if reader is None:
+        reader = raw_data_reader
+    if reader == 'arrow' and not columnar_cache_available():
+        reader = 'pandas'
+
+    if reader == 'arrow':
+        data = read_raw_csv_arrow(source, schema)
+    elif reader == 'pandas':
+        data = pd.read_csv(
+            source,
+            usecols=list(schema),
+            dtype={column: ('float64' if kind == 'count' else kind)
+                   for column, kind in schema.items() if kind != 'date'},
+            parse_dates=[column for column, kind in schema.items()
+                         if kind == 'date'],
+            thousands=',',
+        )
+    else:
+        raise ValueError(f'Unknown raw data reader: {reader}')
+
+    for column, kind in schema.items():
+        if kind == 'date' and not pd.api.types.is_datetime64_any_dtype(
+                data[column]):
+            raise ValueError(f'{name}: {column} could not be parsed as dates')
+
+    return data
+
+
+def read_raw_csv_arrow(source, schema: dict) -> pd.DataFrame:
+    """
+    Parses a raw csv file with pyarrow (see read_raw_csv).
+
+    Args:
+        source: The path or file-like object of the csv file.
+        schema (dict): The file's schema in `raw_file_schemas`.
+
+    Returns:
+        pd.DataFrame: The raw data.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    from pyarrow import csv
+
+    # pyarrow only reads binary streams
+    if isinstance(source, io.TextIOBase):
+        source = io.BytesIO(source.read().encode())
+
+    # Counts are read as text so the thousands separators can be dropped
+    arrow_types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'str': pa.string(),
+        'date': pa.timestamp('ns'),
+        'count': pa.string(),
+    }
+    table = csv.read_csv(source, convert_options=csv.ConvertOptions(
+        column_types={column: arrow_types[kind]
+                      for column, kind in schema.items()},
+        include_columns=list(schema),
+        strings_can_be_null=True,
+    ))
+
+    for column, kind in schema.items():
+        if kind == 'count':
+            index = table.schema.get_field_index(column)
+            table = table.set_column(index, column, pc.cast(
+                pc.replace_substring(table[column], ',', ''), pa.float64()))
+
+    data = table.to_pandas()
+
+    # Missing text is NaN like read_csv
+    object_columns = data.select_dtypes(object).columns
+    data[object_columns] = data[object_columns].fillna(np.nan)
+
+    return data
+
+
+def run_pipeline(keys: dict) -> pd.DataFrame:
+    """
+    Builds the cleaned dataset stage by stage, loading every stage whose key
+      is already cached and only reading the raw files needed by the stages
+      that have to be recomputed.
+
+    Args:
+        keys (dict): The key of every raw file and stage (see stage_keys).
+
+    Returns:
+        pd.DataFrame: The cleaned dataset.
+    """
+    print(f'{Fore.MAGENTA}\nCleaning data...{Style.RESET_ALL}')
+
+    # Read every raw file needed by a stage that isn't cached up front, so
+    #   they are read concurrently
+    raw_data = read_raw_files(
+        name
+        for stage_name, inputs in pipeline_stages.items()
+        if stage_name in keys and not os.path.isfile(
+            stage_cache_path(stage_name, keys[stage_name]))
+        for name in inputs if name in raw_file_names
+    )
+    outputs = {}
+
+    def raw(name):
+        if name not in raw_data:
+            raw_data.update(read_raw_files([name]))
+        return raw_data[name]
+
+    def stage(name):
+        if name not in outputs:
+            outputs[name] = run_stage(name, keys[name], stages[name])
+        return outputs[name]
+
+    stages = {
+        'student_merge': lambda: merge_student_data(
+            raw('student_data'), raw('student_counts_1'),
+            raw('student_counts_2'), raw('appointment_data')),
+        'fair_cross_product': lambda: build_student_fair_rows(
+            raw('student_data'), raw('career_fair_data'),
+            raw('registration_data')),
+        'fair_attendance': lambda: fair_attendance_features(
+            stage('fair_cross_product'), raw('career_fair_data'),
+            raw('student_fair_attendance')),
+        'event_attendance': lambda: event_attendance_features(
+            stage('fair_cross_product'), raw('career_fair_data'),
+            raw('student_event_attendance')),
+        'date_features': lambda: date_features(
+            stage('fair_cross_product'), stage('student_merge')),
+        'student_features': lambda: student_features(
+            stage('student_merge')),
+        'fair_majors': lambda: fair_major_features(
+            stage('fair_cross_product'), stage('student_merge'),
+            raw('career_fair_data')),
+    }
+
+    cleaned_data = assemble_cleaned_data(
+        stage('fair_cross_product'),
+        stage('student_features'),
+        stage('fair_majors'),
+        stage('fair_attendance'),
+        stage('event_attendance'),
+        stage('date_features'),
+    )
+
+    print_cleaned_summary(cleaned_data)
+
+    return cleaned_data
+
+
+def clean_data_chunks(chunk_size: int | None, workers: int = 1):
+    """
+    Builds the cleaned dataset `chunk_size` students at a time.
+
+    Only the student/career fair rows of a chunk of students are built,
+      merged and cleaned at once. The career fair, fair attendance and event
+      attendance tables are shared by every chunk, so the features of every
+      row are the same as when all the students are cleaned at once. The
+      chunks are in the same order as the rows of the whole dataset.
+
+    Args:
+        chunk_size (int | None): The number of students per chunk, or None
+          for a single chunk of every student.
+        workers (int): The number of worker processes to clean each chunk in
+          (see parallel_clean_student_fair_rows).
+
+    Yields:
+        pd.DataFrame: The cleaned rows of each chunk of students.
+    """
+    raw_data = read_raw_files(raw_file_names)
+    student_df = raw_data['student_data']
+
+    if chunk_size is None:
+        chunk_size = max(1, len(student_df))
+    if chunk_size < 1:
+        raise ValueError(f'chunk_size must be at least 1, got {chunk_size}')
+
+    print(f'{Fore.MAGENTA}\nCleaning data in chunks of {chunk_size} '
+          f'students...{Style.RESET_ALL}')
+
+    student_data = merge_student_data(
+        student_df, raw_data['student_counts_1'],
+        raw_data['student_counts_2'], raw_data['appointment_data'])
+
+    chunk_count = max(1, -(-len(student_df) // chunk_size))
+    for chunk in range(chunk_count):
+        print(f'{Fore.MAGENTA}\nChunk {chunk + 1}/{chunk_count}'
+              f'{Style.RESET_ALL}')
+
+        students = student_df.iloc[chunk * chunk_size:
+                                   (chunk + 1) * chunk_size]
+        rows = build_student_fair_rows(
+            students, raw_data['career_fair_data'],
+            raw_data['registration_data'])
+
+        tables = (raw_data['career_fair_data'],
+                  raw_data['student_fair_attendance'],
+                  raw_data['student_event_attendance'])
+        chunk_students = student_data[
+            student_data['stu_id'].isin(students['stu_id'])]
+        if workers > 1:
+            cleaned_chunk = parallel_clean_student_fair_rows(
+                rows, chunk_students, *tables, workers)
+        else:
+            cleaned_chunk = clean_student_fair_rows(
+                rows, chunk_students, *tables)
+        print_memory_usage('Chunk', cleaned_chunk)
+
+        yield cleaned_chunk
+
+
+# =============================================================================
+#                           Incremental Career Fairs
+# =============================================================================
+
+def career_fair_index(data: pd.DataFrame) -> pd.MultiIndex:
     """
-    Loads and merges data from multiple CSV files to create a cleaned dataset.
+    Gets the (career_fair_name, career_fair_date) of every row of the data,
+      which identifies its career fair.
+    """
+    return pd.MultiIndex.from_arrays([
+        data['career_fair_name'].astype(str),
+        data['career_fair_date'],
+    ])
+
+
+# The raw files with a row per career fair or registration, the only raw
+#   files that may change when career fairs are appended
+fair_raw_files = ['career_fair_data', 'registration_data']
+
+
+def cleaned_data_inputs_path() -> str:
+    return os.path.join(data_directory,
+                        f'{cleaned_data_file_name}.inputs.json')
+
+
+def fair_key(name: str, date) -> str:
+    return f'{name}|{pd.Timestamp(date).isoformat()}'
+
+
+def career_fair_fingerprints(raw_data: dict) -> dict:
+    """
+    Hashes the rows of every career fair in the career fair and registration
+      data, whatever the order of the rows.
+
+    Args:
+        raw_data (dict): At least the raw files of `fair_raw_files`.
 
     Returns:
-        pd.DataFrame: The cleaned dataset.
+        dict: The hash of the rows of every career fair, keyed by fair_key.
     """
-    print(f'{Fore.MAGENTA}\nLoading data...{Style.RESET_ALL}')
+    hashes = {}
+    for name in fair_raw_files:
+        table = raw_data[name]
+        row_hashes = pd.util.hash_pandas_object(table, index=False).to_numpy()
+        fairs = table.groupby(['career_fair_name', 'career_fair_date'],
+                              dropna=False, sort=False).indices
+        for (fair_name, date), positions in fairs.items():
+            fair_hash = hashes.setdefault(fair_key(fair_name, date),
+                                          hashlib.sha256())
+            fair_hash.update(f'{name}:'.encode())
+            fair_hash.update(np.sort(row_hashes[positions]).tobytes())
+
+    return {fair: fair_hash.hexdigest() for fair, fair_hash in hashes.items()}
+
+
+def cleaned_data_inputs(fingerprints: dict, raw_data: dict) -> dict:
+    """
+    Fingerprints what the cleaned data is built from, for
+      append_new_career_fairs to check the raw data against: the code, every
+      raw file, the set of students and the rows of every career fair.
 
-    if data_directory not in os.listdir():
-        os.makedirs(data_directory)
+    Args:
+        fingerprints (dict): The content hash of each raw file.
+        raw_data (dict): At least the student data and the raw files of
+          `fair_raw_files`.
 
-    if cleaned_data_file_name in os.listdir(data_directory):
-        print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Loading cleaned '
-              f'data...{Style.RESET_ALL}')
-        cleaned_data = pd.read_csv(
-            f'{data_directory}\\{cleaned_data_file_name}')
-        print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Cleaned data loaded'
-              f'{Style.RESET_ALL}')
-        return cleaned_data
+    Returns:
+        dict: The fingerprints of the inputs.
+    """
+    student_ids = np.unique(raw_data['student_data']['stu_id'].to_numpy())
+    return {
+        'code_version': code_version(),
+        'raw_files': {name: fingerprints[name] for name in raw_file_names},
+        'students': hashlib.sha256(
+            student_ids.astype(np.int64).tobytes()).hexdigest(),
+        'fairs': career_fair_fingerprints(raw_data),
+    }
 
-    appointment_df = pd.read_csv('data/appointment_data.csv')
-    career_fair_df = pd.read_csv('data/career_fair_data.csv')
-    registration_df = pd.read_csv('data/registration_data.csv')
-    student_df = pd.read_csv('data/student_data.csv')
-    stu_counts_1_df = pd.read_csv('data/student_counts_1.csv')
-    stu_counts_2_df = pd.read_csv('data/student_counts_2.csv')
-    stu_fair_attendance_df = pd.read_csv('data/student_fair_attendance.csv')
-    stu_event_attendance_df = pd.read_csv('data/student_event_attendance.csv')
 
-    print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} csv files loaded'
-          f'{Style.RESET_ALL}')
+def write_cleaned_data_key(keys: dict):
+    """
+    Writes the key of the raw data and code the cleaned data was built from,
+      and the fingerprints of its inputs (see cleaned_data_inputs).
 
-    # ===============================================================
-    #                          Merge Data
-    # ===============================================================
+    Args:
+        keys (dict): The key of every raw file and pipeline stage.
+    """
+    # Stale fingerprints would let an append skip the checks of the rows
+    #   it keeps
+    if os.path.isfile(cleaned_data_inputs_path()):
+        os.remove(cleaned_data_inputs_path())
+    with open(cleaned_data_key_path(), 'w') as key_file:
+        key_file.write(keys['cleaned_data'])
 
-    # There should be a row for each career fair for every student.
-    #   If the student never attended a career fair, there will be
-    #   a row with all null values for that student.
-    #
-    # The appointment_df only contains rows for students that have
-    #   appointments. There can only be one row per student however,
-    #   so we will just need to merge the appointment data with the
-    #   student data to ensure that we have a row for each student.
-    #
-    # The registration_df contains a row for each student that has
-    #   registered for each career fair. There may be multiple rows
-    #   for each student. We want a row for every student for every
-    #   career fair, so we will need to merge the registration data
-    #   with the student data.
+    raw_data = read_raw_files(['student_data', *fair_raw_files])
+    with open(cleaned_data_inputs_path(), 'w') as inputs_file:
+        json.dump(cleaned_data_inputs(keys, raw_data), inputs_file, indent=2)
+
+
+def read_cleaned_data_inputs() -> dict | None:
+    """
+    Reads the fingerprints of the inputs of the cleaned data, or None when
+      they weren't written.
+    """
+    if not os.path.isfile(cleaned_data_inputs_path()):
+        return None
+    with open(cleaned_data_inputs_path()) as inputs_file:
+        return json.load(inputs_file)
+
+
+def new_fairs_change_old_rows(
+    raw_data: dict,
+    new_fairs: pd.MultiIndex
+) -> str | None:
+    """
+    Checks whether adding the new career fairs changes the features of the
+      rows of the old career fairs.
+
+    The main fair counts depend on the set of career fairs rather than only
+      on the fair of the row, since attendances of fairs in the career fair
+      data count as main fairs.
+
+    Args:
+        raw_data (dict): The raw data, keyed by name.
+        new_fairs (pd.MultiIndex): The (name, date) of every new fair.
+
+    Returns:
+        str | None: Why the old rows change, or None when they don't.
+    """
+    career_fair_df = raw_data['career_fair_data']
+    is_new_fair = career_fair_index(career_fair_df).isin(new_fairs)
+    old_fair_df = career_fair_df[~is_new_fair]
+    new_fair_df = career_fair_df[is_new_fair]
+
+    # Attendances of a fair that became a main fair, before an old fair
+    fair_attendance = raw_data['student_fair_attendance']
+    new_main_fairs = set(new_fair_df['career_fair_name']) - set(
+        old_fair_df['career_fair_name'])
+    is_new_main = fair_attendance['career_fair_name'].isin(new_main_fairs)
+    last_old_date = old_fair_df['career_fair_date'].max()
+    if (fair_attendance.loc[is_new_main, 'career_fair_date']
+            < last_old_date).any():
+        return 'Attendances of the new career fairs count as main fairs'
+
+    return None
+
+
+def append_new_career_fairs(
+    cached_path: str,
+    file_format: str,
+    keys: dict,
+    workers: int = 1
+) -> str | None:
+    """
+    Appends the rows of the career fairs that were added to the raw data to
+      the cleaned dataset, without rebuilding the rows of the other fairs.
+
+    The rows of the fairs already in the cleaned dataset are kept as they
+      are, so the raw data is checked against the fingerprints of the inputs
+      they were built from (see cleaned_data_inputs). The rows are sorted by
+      career fair again when they are written (see sort_cleaned_data_file),
+      in the same order as a rebuild. The cleaned dataset has to be rebuilt
+      instead when:
+        - Its inputs weren't fingerprinted, or the code changed.
+        - There is no new career fair (something else changed).
+        - A career fair was removed, or students were added or removed.
+        - A raw file other than the career fair and registration data
+          changed.
+        - A row of an old fair changed in the career fair or registration
+          data, such as its check-ins.
+        - A career fair was added without registrations.
+        - A new fair shares a date with an old fair, which changes the
+          attendance counts of the old fair.
+        - The new rows have different feature columns.
+
+    Args:
+        cached_path (str): The path of the cleaned dataset.
+        file_format (str): The cache format to write.
+        keys (dict): The key of every raw file and pipeline stage.
+        workers (int): The number of worker processes to clean the rows in.
+
+    Returns:
+        str | None: The path of the extended cleaned dataset, or None when it
+          has to be rebuilt.
+    """
+    print(f'{Fore.MAGENTA}\nAppending new career fairs...{Style.RESET_ALL}')
+
+    def rebuild(reason):
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.YELLOW} {reason}, rebuilding '
+              f'the cleaned data{Style.RESET_ALL}')
+        return None
+
+    inputs = read_cleaned_data_inputs()
+    if inputs is None:
+        return rebuild('The inputs of the cleaned data are unknown')
+
+    cleaned_data = read_cleaned_data(
+        cached_path, memory_map=not cached_path.endswith('.csv'))
+    raw_data = read_raw_files(raw_file_names)
+    student_df = raw_data['student_data']
+    registration_df = raw_data['registration_data']
+    current_inputs = cleaned_data_inputs(keys, raw_data)
+
+    old_fairs = career_fair_index(cleaned_data).unique()
+    raw_fairs = career_fair_index(registration_df).unique()
+    new_fairs = raw_fairs.difference(old_fairs, sort=False)
+
+    if current_inputs['code_version'] != inputs['code_version']:
+        return rebuild('The preprocessing code changed')
+    if len(new_fairs) == 0:
+        return rebuild('No new career fairs')
+    if not old_fairs.isin(raw_fairs).all():
+        return rebuild('Career fairs were removed')
+    if (current_inputs['students'] != inputs['students'] or
+            len(cleaned_data) != len(old_fairs) * len(student_df)):
+        return rebuild('Students were added or removed')
+    changed_files = [
+        raw_file_names[name] for name in raw_file_names
+        if name not in fair_raw_files and
+        current_inputs['raw_files'][name] != inputs['raw_files'].get(name)
+    ]
+    if changed_files:
+        return rebuild(f'{", ".join(changed_files)} changed')
+    if any(current_inputs['fairs'].get(fair) != fair_hash
+           for fair, fair_hash in inputs['fairs'].items()):
+        return rebuild('The rows of an old career fair changed')
+    new_fair_keys = {fair_key(name, date) for name, date in new_fairs}
+    if not set(current_inputs['fairs']).difference(
+            inputs['fairs']).issubset(new_fair_keys):
+        return rebuild('A career fair was added without registrations')
+    if new_fairs.get_level_values(1).isin(
+            old_fairs.get_level_values(1)).any():
+        return rebuild('A new career fair shares a date with an old one')
+    reason = new_fairs_change_old_rows(raw_data, new_fairs)
+    if reason is not None:
+        return rebuild(reason)
+
+    for name, date in new_fairs:
+        print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} New career fair: '
+              f'{Fore.LIGHTBLACK_EX}{name} ({date:%Y-%m-%d}){Style.RESET_ALL}')
+
+    # Only build the rows of the new fairs
+    is_new_fair = career_fair_index(registration_df).isin(new_fairs)
+    rows = build_student_fair_rows(
+        student_df, raw_data['career_fair_data'],
+        registration_df[is_new_fair])
+    student_data = merge_student_data(
+        student_df, raw_data['student_counts_1'],
+        raw_data['student_counts_2'], raw_data['appointment_data'])
+
+    tables = (raw_data['career_fair_data'],
+              raw_data['student_fair_attendance'],
+              raw_data['student_event_attendance'])
+    if workers > 1:
+        new_rows = parallel_clean_student_fair_rows(
+            rows, student_data, *tables, workers)
+    else:
+        new_rows = clean_student_fair_rows(rows, student_data, *tables)
+
+    if set(new_rows.columns) != set(cleaned_data.columns):
+        return rebuild('The new rows have different features')
+    new_rows = new_rows[cleaned_data.columns]
+
+    # Every chunk needs the same categories to be written to the same file
+    fair_names = cleaned_data['career_fair_name'].astype('category')
+    fair_names = fair_names.cat.categories.union(
+        new_rows['career_fair_name'].astype('category').cat.categories)
+    chunks = [
+        data.assign(career_fair_name=pd.Categorical(
+            data['career_fair_name'], categories=fair_names))
+        for data in (cleaned_data, new_rows)
+    ]
+    appended_path = save_cleaned_data_chunks(chunks, file_format)
+
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} {len(new_rows)} rows appended to '
+          f'{Fore.LIGHTBLACK_EX}{appended_path}{Style.RESET_ALL}')
+
+    return appended_path
 
+
+# =============================================================================
+#                           Merge Data
+# =============================================================================
+
+# There should be a row for each career fair for every student.
+#   If the student never attended a career fair, there will be
+#   a row with all null values for that student.
+#
+# The appointment_df only contains rows for students that have
+#   appointments. There can only be one row per student however,
+#   so we will just need to merge the appointment data with the
+#   student data to ensure that we have a row for each student.
+#
+# The registration_df contains a row for each student that has
+#   registered for each career fair. There may be multiple rows
+#   for each student. We want a row for every student for every
+#   career fair, so we will need to merge the registration data
+#   with the student data.
+
+registration_columns = ['is_pre_registered', 'is_checked_in']
+
+
+def merge_student_data(
+    student_df: pd.DataFrame,
+    stu_counts_1_df: pd.DataFrame,
+    stu_counts_2_df: pd.DataFrame,
+    appointment_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Merges the student profile, counts and appointments into one row per
+      student.
+
+    Returns:
+        pd.DataFrame: The merged student data.
+    """
     merged_data = pd.merge(student_df, stu_counts_1_df,
                            on='stu_id', how='left')
     merged_data = pd.merge(merged_data, stu_counts_2_df,
@@ -73,71 +2001,72 @@ def load_data() -> pd.DataFrame:
     print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Student data merged'
           f'{Style.RESET_ALL}')
 
+    return merged_data
+
+
+def build_student_fair_rows(
+    student_df: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    registration_df: pd.DataFrame,
+    fairs: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """
+    Builds a row for every student for every career fair, with the career
+      fair name and date and the student's registration for that fair.
+
+    Args:
+        student_df (pd.DataFrame): The students to build rows for.
+        career_fair_df (pd.DataFrame): The career fair information.
+        registration_df (pd.DataFrame): The career fair registrations.
+        fairs (pd.DataFrame | None): The career_fair_name and
+          career_fair_date of the fairs to build rows for, e.g. an upcoming
+          fair nobody registered for yet. Defaults to every fair in the
+          registration data.
+
+    Returns:
+        pd.DataFrame: The stu_id, career_fair_name, career_fair_date and
+          registration columns (Yes/No converted to 1/0) of every row.
+    """
     # To ensure that we have a row for each student for each career fair,
-    #   we get the cross product of the student ids and career fair dates
-    #   and merge that with the merged data. This ensures there is a row
-    #   for each student for each career fair.
+    #   we get the cross product of the student ids and career fair dates.
+    #   This ensures there is a row for each student for each career fair.
     # Then, we merge the registration data with all that to add the
-    #   registration columns to the merged data.
-
-    # Merge career fair name and date to ensure that we have a unique
-    #   identifier for each career fair (some have the same name but
-    #   different dates)
-    registration_df['career_fair_id'] = (
-        registration_df['career_fair_name'] +
-        ' ' +
-        registration_df['career_fair_date']
-    )
-    career_fair_df['career_fair_id'] = (
-        career_fair_df['career_fair_name'] +
-        ' ' +
-        career_fair_df['career_fair_date']
-    )
-    career_fair_simple = career_fair_df[[
-        'career_fair_id',
-        'career_fair_name',
-        'career_fair_date'
-    ]]
-
-    # Drop the original columns, they will be merged back later
-    registration_df.drop(
-        columns=[
-            'career_fair_name',
-            'career_fair_date'
-        ],
-        inplace=True
-    )
+    #   registration columns to the rows.
+
+    # The career fair name and date together are a unique identifier for
+    #   each career fair (some have the same name but different dates).
+    #   The registration's copy of them identifies the fair of every row,
+    #   the name and date come from the career fair data.
+    fair_columns = ['career_fair_name', 'career_fair_date']
+    career_fair_id = ['registration_fair_name', 'registration_fair_date']
+    registration_df = registration_df.rename(
+        columns=dict(zip(fair_columns, career_fair_id)))
 
     print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Generated unique career fair '
           f'id\'s{Style.RESET_ALL}')
 
     # Merge student data with career fair data
 
-    stu_fair_combinations = pd.merge(
+    if fairs is None:
+        fairs = registration_df[career_fair_id]
+    else:
+        fairs = fairs[fair_columns].set_axis(career_fair_id, axis=1)
+
+    rows = pd.merge(
         student_df[['stu_id']],
-        pd.DataFrame(
-            registration_df['career_fair_id'].unique(),
-            columns=['career_fair_id']
-        ),
+        fairs.drop_duplicates(),
         how='cross'
     )
 
     print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Generated student/career fair '
           f'combinations{Style.RESET_ALL}')
 
-    merged_data = pd.merge(
-        stu_fair_combinations, merged_data,
-        on=['stu_id'],
-        how='left'
-    )
-    print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Student/Career Fair data merged'
-          f'{Style.RESET_ALL}')
-
     # Merge back in the career fair data
 
-    merged_data = pd.merge(
-        merged_data, career_fair_simple,
-        on='career_fair_id',
+    rows = pd.merge(
+        rows, career_fair_df[fair_columns],
+        left_on=career_fair_id,
+        right_on=fair_columns,
         how='left'
     )
 
@@ -145,77 +2074,295 @@ def load_data() -> pd.DataFrame:
           f'{Style.RESET_ALL}')
 
     # Merge the registration data
-    merged_data = pd.merge(
-        merged_data, registration_df,
-        on=['stu_id', 'career_fair_id'],
+    rows = pd.merge(
+        rows, registration_df,
+        on=['stu_id', *career_fair_id],
         how='left'
     )
     print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} Career Fair Registration '
           f'data merged'
           f'{Style.RESET_ALL}')
 
+    rows = rows.drop(columns=career_fair_id)
+
+    # The name is repeated for every student, store it once per fair
+    rows['career_fair_name'] = rows['career_fair_name'].astype('category')
+
     print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Rows: '
-          f'{Fore.LIGHTBLACK_EX}{len(merged_data)}'
+          f'{Fore.LIGHTBLACK_EX}{len(rows)}'
           f'{Style.RESET_ALL}')
     print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Students: '
-          f'{Fore.LIGHTBLACK_EX}{len(merged_data["stu_id"].unique())}'
+          f'{Fore.LIGHTBLACK_EX}{len(rows["stu_id"].unique())}'
           f'{Style.RESET_ALL}')
 
-    merged_data.drop(
-        [
-            'appointment_count',
-            # 'stu_id',
-            'career_fair_id',
-        ], axis=1, inplace=True)
+    return clean_registration(rows)
 
-    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Columns: '
-          f'{Fore.LIGHTBLACK_EX}{merged_data.columns}'
-          f'{Style.RESET_ALL}')
 
-    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Data merged{Style.RESET_ALL}')
+def clean_registration(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the Yes/No registration columns to 1/0 flags, treating null as
+      No.
+    """
+    rows = rows.copy()
+    for column in registration_columns:
+        rows[column] = rows[column].eq('Yes').astype(flag_dtype)
+    return rows
 
-    cleaned_data = clean_data(merged_data, career_fair_df,
-                              stu_fair_attendance_df, stu_event_attendance_df)
 
-    print(f'{Fore.MAGENTA}\nSaving cleaned data...{Style.RESET_ALL}')
+def student_positions(
+    rows: pd.DataFrame,
+    student_data: pd.DataFrame
+) -> np.ndarray:
+    """
+    Finds the position of every row's student in a per-student table, the
+      integer key the per-student tables are joined to the rows by.
 
-    cleaned_data.to_csv(
-        f'{data_directory}\\{cleaned_data_file_name}',
-        index=False
-    )
+    Args:
+        rows (pd.DataFrame): The stu_id of every row.
+        student_data (pd.DataFrame): A table with one row per stu_id.
 
-    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Cleaned data saved to '
-          f'{Fore.LIGHTBLACK_EX}{data_directory}\\{cleaned_data_file_name}'
+    Returns:
+        np.ndarray: The position of each row's student in `student_data`.
+    """
+    student_ids = pd.Index(student_data['stu_id'])
+    if not student_ids.is_unique:
+        raise ValueError('The student data has more than one row for some '
+                         'students')
+
+    positions = student_ids.get_indexer(rows['stu_id'])
+    if (positions < 0).any():
+        raise ValueError('Some rows have students missing from the student '
+                         'data')
+    return positions
+
+
+def broadcast_student_data(
+    rows: pd.DataFrame,
+    student_data: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Repeats a per-student table for every career fair row of the student,
+      by the integer student keys (see student_positions).
+
+    Returns:
+        pd.DataFrame: The student data, aligned with `rows`.
+    """
+    broadcast = student_data.take(student_positions(rows, student_data))
+    broadcast.index = rows.index
+    return broadcast
+
+
+def assemble_cleaned_data(
+    rows: pd.DataFrame,
+    students: pd.DataFrame,
+    fair_majors: pd.DataFrame,
+    fair_attendance: pd.DataFrame,
+    event_attendance: pd.DataFrame,
+    dates: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Joins the outputs of the cleaning stages into the cleaned dataset. The
+      per-student features are joined to the rows by the integer student
+      keys.
+
+    The remaining student columns come first, then the career fair and
+      registration columns, the count features, the fair and event
+      attendance features, the date features and the remaining student
+      features, with cf_has_major before the appointment features.
+
+    Returns:
+        pd.DataFrame: The cleaned dataset.
+    """
+    students = broadcast_student_data(rows, students).drop(columns=['stu_id'])
+
+    count_labels = [label
+                    for _, _, labels, _ in count_bin_specs
+                    for label in labels]
+    first_count = students.columns.get_loc(count_labels[0])
+    last_count = students.columns.get_loc(count_labels[-1]) + 1
+    first_appointment = students.columns.get_loc(next(iter(appointment_rules)))
+
+    return pd.concat([
+        students.iloc[:, :first_count],
+        rows.drop(columns=['stu_id']),
+        students.iloc[:, first_count:last_count],
+        fair_attendance,
+        event_attendance,
+        dates,
+        students.iloc[:, last_count:first_appointment],
+        fair_majors,
+        students.iloc[:, first_appointment:],
+    ], axis=1)
+
+
+def print_memory_usage(name: str, data: pd.DataFrame):
+    """
+    Prints the in-memory size of a stage output, including its strings.
+    """
+    memory = data.memory_usage(deep=True).sum()
+    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} {name} memory: '
+          f'{Fore.LIGHTBLACK_EX}{memory / 2 ** 20:.1f} MiB'
           f'{Style.RESET_ALL}')
 
-    return cleaned_data
 
+def print_cleaned_summary(data: pd.DataFrame):
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Data cleaned{Style.RESET_ALL}')
+
+    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Data: '
+          f'{Fore.LIGHTBLACK_EX}{len(data)}{Style.RESET_ALL}')
+    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Features: '
+          f'{Fore.LIGHTBLACK_EX}{len(data.columns) - 1}{Style.RESET_ALL}')
+    print_memory_usage('Cleaned data', data)
+
+
+# =============================================================================
+#                           Clean Data
+# =============================================================================
 
 def clean_data(
     data: pd.DataFrame,
     career_fair_df: pd.DataFrame,
     stu_fair_attendance_df: pd.DataFrame,
-    stu_event_attendance_df: pd.DataFrame
+    stu_event_attendance_df: pd.DataFrame,
+    workers: int = 1
 ) -> pd.DataFrame:
     """
     Cleans the data by filling null values, converting Yes/No values to 1/0,
       converting strings, dates, school years, colleges, majors, and
       appointments to binary values.
 
+    This runs every cleaning stage without the stage cache (see load_data).
+
     Args:
         data (pd.DataFrame): The input DataFrame containing the data to be
-          cleaned.
+          cleaned, with a row for every student for every career fair.
         career_fair_df (pd.DataFrame): The DataFrame containing career fair
           information.
+        stu_fair_attendance_df (pd.DataFrame): The career fair attendances.
+        stu_event_attendance_df (pd.DataFrame): The event attendances.
+        workers (int): The number of worker processes to clean the rows in
+          (see parallel_clean_student_fair_rows).
+
+    Every input has the column types of `raw_file_schemas` (see
+      read_raw_csv), with parsed dates and numeric counts.
 
     Returns:
         pd.DataFrame: The cleaned DataFrame.
     """
     print(f'{Fore.MAGENTA}\nCleaning data...{Style.RESET_ALL}')
 
+    row_columns = ['stu_id', 'career_fair_name', 'career_fair_date',
+                   *registration_columns]
+    rows = clean_registration(data[row_columns])
+    rows['career_fair_name'] = rows['career_fair_name'].astype('category')
+    student_data = data.drop(columns=row_columns[1:]).drop_duplicates(
+        'stu_id')
+
+    if workers > 1:
+        cleaned_data = parallel_clean_student_fair_rows(
+            rows, student_data, career_fair_df,
+            stu_fair_attendance_df, stu_event_attendance_df, workers)
+    else:
+        cleaned_data = clean_student_fair_rows(
+            rows, student_data, career_fair_df,
+            stu_fair_attendance_df, stu_event_attendance_df)
+
+    print_cleaned_summary(cleaned_data)
+
+    return cleaned_data
+
+
+def clean_student_fair_rows(
+    rows: pd.DataFrame,
+    student_data: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_fair_attendance_df: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame,
+    event_categories: list | None = None
+) -> pd.DataFrame:
+    """
+    Runs every cleaning stage on a set of student/career fair rows.
+
+    The static student features are computed once per student and joined
+      to the rows at the end, the other stages are per row.
+
+    Args:
+        rows (pd.DataFrame): The career fair and registration columns of every
+          row (see build_student_fair_rows).
+        student_data (pd.DataFrame): The merged student data, one row for
+          every student of the rows (see merge_student_data).
+        career_fair_df (pd.DataFrame): The career fair information.
+        stu_fair_attendance_df (pd.DataFrame): The career fair attendances.
+        stu_event_attendance_df (pd.DataFrame): The event attendances.
+        event_categories (list | None): The event categories to count, by
+          default those of the event attendances (see event_category_matrix).
+
+    Returns:
+        pd.DataFrame: The cleaned rows.
+    """
+    stages = {
+        'student_features': student_features(student_data),
+        'fair_majors': fair_major_features(
+            rows, student_data, career_fair_df),
+        'fair_attendance': fair_attendance_features(
+            rows, career_fair_df, stu_fair_attendance_df),
+        'event_attendance': event_attendance_features(
+            rows, career_fair_df, stu_event_attendance_df, event_categories),
+        'date_features': date_features(rows, student_data),
+    }
+    for stage, output in stages.items():
+        print_memory_usage(stage, output)
+
+    return assemble_cleaned_data(
+        rows,
+        stages['student_features'],
+        stages['fair_majors'],
+        stages['fair_attendance'],
+        stages['event_attendance'],
+        stages['date_features'],
+    )
+
+
+def fairs_on_date(
+    rows: pd.DataFrame,
+    career_fair_df: pd.DataFrame
+) -> np.ndarray:
+    """
+    Counts the career fairs on the career fair date of every row.
+
+    Career fairs that share a date each count the attendances before that
+      date, so the fair and event counts are repeated once per fair on the
+      date.
+    """
+    return rows['career_fair_date'].map(
+        career_fair_df['career_fair_date'].value_counts()
+    ).fillna(0).astype(int).to_numpy()
+
+
+def student_features(student_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the student profile, counts, school years, colleges,
+      appointments and GPA to binary values.
+
+    These only depend on the student, so they are computed once per student
+      and joined to the career fair rows by the integer student keys (see
+      assemble_cleaned_data).
+
+    Args:
+        student_data (pd.DataFrame): The merged student data, one row per
+          student.
+
+    Returns:
+        pd.DataFrame: The stu_id, the remaining student columns, the count
+          features and the binary student features of every student.
+    """
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Cleaning student '
+          f'data...{Style.RESET_ALL}')
+
+    data = student_data.drop(columns=['stu_creation_date', 'stu_login_date',
+                                      'stu_majors'])
+
     yes_no_columns = [
-        'is_pre_registered',
-        'is_checked_in',
         'stu_is_activated',
         'stu_is_visible',
         'stu_is_archived',
@@ -239,12 +2386,6 @@ def clean_data(
     print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Filling null values...'
           f'{Style.RESET_ALL}')
 
-    for column in yes_no_columns:
-        data[column] = data[column].fillna('No')
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Null Yes/No values filled '
-          f'with \'No\'{Style.RESET_ALL}')
-
     for column in count_columns:
         data[column] = data[column].fillna(0)
 
@@ -262,8 +2403,7 @@ def clean_data(
           f'1/0...{Style.RESET_ALL}')
 
     for column in yes_no_columns:
-        data[column] = data[column].apply(
-            lambda x: 1 if x == 'Yes' else 0)
+        data[column] = data[column].eq('Yes').astype(flag_dtype)
 
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Yes/No converted to 1/0'
           f'{Style.RESET_ALL}')
@@ -272,77 +2412,162 @@ def clean_data(
     #                       Integer Conversion
     # ===============================================================
 
-    # Convert any strings in the form '1,000' to integers
-    #   while keeping existing integers
+    # The counts are parsed as numbers when the raw files are read (see
+    #   raw_file_schemas)
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Converting numerical values '
+          f'to binary values...{Style.RESET_ALL}')
+
+    # Convert integers to binary thresholds values
+    #   and drop the original columns
+
+    data = apply_bin_specs(data, count_bin_specs)
+
+    data.drop(count_columns, axis=1, inplace=True)
+
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Integers converted to binary '
+          f'values{Style.RESET_ALL}')
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All strings converted to '
+          f'binary values{Style.RESET_ALL}')
+
+    # ===============================================================
+    #                       School Year Cleaning
+    # ===============================================================
+
+    # Convert school year to a binary value. stu_school_year is a list
+    #   of school years
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting student school '
+          f'years...{Style.RESET_ALL}')
+
+    data = pd.concat([data, multi_hot_tokens(
+        data['stu_school_year'], school_year_rules)], axis=1)
+
+    data.drop(['stu_school_year'], axis=1, inplace=True)
+
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All School years converted '
+          f'to binary values{Style.RESET_ALL}')
+
+    # ===============================================================
+    #                       College Cleaning
+    # ===============================================================
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting student '
+          f'colleges...{Style.RESET_ALL}')
+
+    # Convert college to a binary value. stu_colleges is a list of
+    #   colleges
+
+    colleges = multi_hot_tokens(data['stu_colleges'], college_rules)
+    data = pd.concat([data, colleges], axis=1)
+    data['multiple_colleges'] = data['stu_colleges'].str.contains(
+        ',', regex=False).astype(flag_dtype)
+    data['other_college'] = (~colleges.any(axis=1)).astype(flag_dtype)
+
+    data.drop(['stu_colleges'], axis=1, inplace=True)
+
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All colleges converted to '
+          f'binary values{Style.RESET_ALL}')
+
+    # ===============================================================
+    #                       Appointments Cleaning
+    # ===============================================================
+
+    # Convert appointment list to whether or not the student has had
+    #   certain appointment types and drop the original appointment_types
+    #   column since we only need the binary values.
+    #
+    # Appointment Types included: Walk-Ins, Resume Reviews, Career Fair
+    #   Preparation, Career Exploration, Internship/Job Search, and Other.
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting appointment '
+          f'types...{Style.RESET_ALL}')
+
+    data = pd.concat([data, multi_hot_tokens(
+        data['appointment_types'], appointment_rules, match='substring',
+        first_match=True, lowercase=True,
+        unmatched='has_other_appointment')], axis=1)
+
+    # Drop appointment_types since we've extracted the binary values
+    data.drop(['appointment_types'], axis=1, inplace=True)
+
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Appointments cleaned'
+          f'{Style.RESET_ALL}')
+
+    # ===============================================================
+    #                          GPA Cleaning
+    # ===============================================================
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Cleaning GPA '
+          f'values...{Style.RESET_ALL}')
+
+    data['no_gpa'] = data['stu_gpa'].isna().astype(flag_dtype)
+    data = apply_bin_specs(data, gpa_bin_specs)
+
+    data.drop(['stu_gpa'], axis=1, inplace=True)
+
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} GPA cleaned{Style.RESET_ALL}')
+
+    # Every column left other than the stu_id and stu_grad_date is a 0/1
+    #   flag. The other dates are converted by date_features.
+    flag_columns = data.columns.drop(['stu_id', 'stu_grad_date'])
+    return data.astype({column: flag_dtype for column in flag_columns})
+
+
+def fair_major_features(
+    rows: pd.DataFrame,
+    student_data: pd.DataFrame,
+    career_fair_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Checks whether each row's career fair includes one of the student's
+      majors (see match_fair_majors).
+
+    Args:
+        rows (pd.DataFrame): The career fair columns of every row (see
+          build_student_fair_rows).
+        student_data (pd.DataFrame): The merged student data, one row per
+          student.
+        career_fair_df (pd.DataFrame): The career fair information.
+
+    Returns:
+        pd.DataFrame: The cf_has_major column, indexed like `rows`.
+    """
+    # Add a column for whether the student has a major that is
+    #   included in the career fair they attended
 
-    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Converting numerical values '
-          f'to binary values...{Style.RESET_ALL}')
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting student '
+          f'majors...{Style.RESET_ALL}')
 
-    for column in count_columns:
-        data[column] = data[column].apply(
-            lambda x: int(x.replace(',', '')) if isinstance(x, str) else x)
+    student_majors = broadcast_student_data(
+        rows, student_data[['stu_id', 'stu_majors']])['stu_majors']
+    data = pd.DataFrame({'cf_has_major': match_fair_majors(
+        rows, student_majors, career_fair_major_index(career_fair_df))},
+        index=rows.index)
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Strings converted to integers'
-          f'{Style.RESET_ALL}')
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All majors converted to '
+          f'binary values{Style.RESET_ALL}')
 
-    # Convert integers to binary thresholds values
-    #   and drop the original columns
+    return data
 
-    data['has_0_appointments'] = data['stu_appointments'].apply(
-        lambda x: 1 if x == 0 else 0)
-    data['has_1-5_appointments'] = data['stu_appointments'].apply(
-        lambda x: 1 if x >= 1 and x < 5 else 0)
-    data['has_5-10_appointments'] = data['stu_appointments'].apply(
-        lambda x: 1 if x >= 5 and x < 10 else 0)
-    data['has_10+_appointments'] = data['stu_appointments'].apply(
-        lambda x: 1 if x >= 10 else 0)
-    data['has_0_applications'] = data['stu_applications'].apply(
-        lambda x: 1 if x == 0 else 0)
-    data['has_1-5_applications'] = data['stu_applications'].apply(
-        lambda x: 1 if x >= 1 and x < 5 else 0)
-    data['has_5-10_applications'] = data['stu_applications'].apply(
-        lambda x: 1 if x >= 5 and x < 10 else 0)
-    data['has_10+_applications'] = data['stu_applications'].apply(
-        lambda x: 1 if x >= 10 else 0)
-    data['has_0_logins'] = data['stu_logins'].apply(
-        lambda x: 1 if x == 0 else 0)
-    data['has_1-10_logins'] = data['stu_logins'].apply(
-        lambda x: 1 if x >= 1 and x < 10 else 0)
-    data['has_10-100_logins'] = data['stu_logins'].apply(
-        lambda x: 1 if x >= 10 and x < 100 else 0)
-    data['has_100+_logins'] = data['stu_logins'].apply(
-        lambda x: 1 if x >= 100 else 0)
-    data['has_0_attendances'] = data['stu_attendances'].apply(
-        lambda x: 1 if x == 0 else 0)
-    data['has_1-2_attendance'] = data['stu_attendances'].apply(
-        lambda x: 1 if x >= 1 and x <= 2 else 0)
-    data['has_3-5_attendances'] = data['stu_attendances'].apply(
-        lambda x: 1 if x <= 5 and x >= 3 else 0)
-    data['has_5-10_attendances'] = data['stu_attendances'].apply(
-        lambda x: 1 if x <= 10 and x > 5 else 0)
-    data['has_10+_attendances'] = data['stu_attendances'].apply(
-        lambda x: 1 if x > 10 else 0)
-    data['has_0_work_experiences'] = data['stu_work_experiences'].apply(
-        lambda x: 1 if x == 0 else 0)
-    data['has_1_work_experience'] = data['stu_work_experiences'].apply(
-        lambda x: 1 if x == 1 else 0)
-    data['has_2_work_experiences'] = data['stu_work_experiences'].apply(
-        lambda x: 1 if x == 2 else 0)
-    data['has_3+_work_experiences'] = data['stu_work_experiences'].apply(
-        lambda x: 1 if x >= 3 else 0)
-    data['has_learning_experience'] = data['stu_experiences'].apply(
-        lambda x: 1 if x > 0 else 0)
 
-    data.drop(count_columns, axis=1, inplace=True)
+def fair_attendance_features(
+    rows: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_fair_attendance_df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Converts the number of main and other career fairs every student attended
+      before the career fair date of every row to binary values.
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Integers converted to binary '
-          f'values{Style.RESET_ALL}')
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All strings converted to '
-          f'binary values{Style.RESET_ALL}')
+    Args:
+        rows (pd.DataFrame): The stu_id and career_fair_date of every row.
+        career_fair_df (pd.DataFrame): The career fair information.
+        stu_fair_attendance_df (pd.DataFrame): The career fair attendances.
 
-    # ===============================================================
-    #                     Fair Attendance Cleaning
-    # ===============================================================
+    Returns:
+        pd.DataFrame: The fair attendance features of every row.
+    """
     print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting fair attendance '
           f'values...{Style.RESET_ALL}')
 
@@ -356,138 +2581,42 @@ def clean_data(
     #   that row.
     #
     # Process:
-    #   1. Get the cross product of the fair attendances and career fair dates
-    #       to get a row for each attendance for each career fair.
-    #   2. Filter out the attendances that are after the career fair date
-    #       to get the attendances that are before the career fair date.
-    #   3. Separate into main career fair and other career fair attendances.
+    #   1. Separate into main career fair and other career fair attendances.
     #      (main career fairs are the ones we are predicting)
-    #   4. Group by student id and career fair date and count the number of
-    #       attendances before the career fair date.
-    #   5. Merge the counts with the data and fill null values with 0.
-    #   6. Convert the counts to binary values.
+    #   2. Sort each student's attendances by date and count the main and
+    #       other attendances before the career fair date of every row
+    #       (see count_prior_events).
+    #   3. Convert the counts to binary values.
 
     # Step 0. - Data initialization
-    stu_fair_attendance_df['career_fair_date'] = pd.to_datetime(
-        stu_fair_attendance_df['career_fair_date'])
-
-    simple_cf_df = career_fair_df[['career_fair_name', 'career_fair_date']]
-    main_fair_names = simple_cf_df['career_fair_name'].unique()
-    simple_cf_df.loc[:, 'career_fair_date'] = pd.to_datetime(
-        simple_cf_df['career_fair_date'])
-
-    stu_fair_attendance_df.rename(
-        columns={
-            'career_fair_name': 'attended_career_fair_name',
-            'career_fair_date': 'attended_career_fair_date'
-        },
-        inplace=True
-    )
-
-    # Step 1.
-    cross_attendances = pd.merge(
-        stu_fair_attendance_df, simple_cf_df,
-        how='cross')
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Cross product of fair '
-          f'attendance and career fair dates created{Style.RESET_ALL}')
+    attendance_dates = stu_fair_attendance_df['career_fair_date']
 
-    # Step 2.
-    previous_attendances = cross_attendances[
-        cross_attendances['career_fair_date'] >
-        cross_attendances['attended_career_fair_date']
-    ]
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Attendances before career '
-          f'fair date extracted{Style.RESET_ALL}')
+    main_fair_names = career_fair_df['career_fair_name'].unique()
 
-    # Step 3.
-    previous_main_attendances = previous_attendances[
-        previous_attendances['attended_career_fair_name'].isin(main_fair_names)
-    ]
-    previous_other_attendances = previous_attendances[
-        ~previous_attendances['attended_career_fair_name'].isin(
-            main_fair_names)
-    ]
+    # Step 1.
+    is_main_fair = stu_fair_attendance_df['career_fair_name'].isin(
+        main_fair_names).to_numpy()
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Main and other fair '
           f'attendances separated{Style.RESET_ALL}')
 
-    # Step 4.
-    previous_main_attendances = previous_main_attendances.groupby(
-        ['stu_id', 'career_fair_date']
-    ).agg(
-        {'attended_career_fair_date': 'count'}
-    ).reset_index()
-    previous_other_attendances = previous_other_attendances.groupby(
-        ['stu_id', 'career_fair_date']
-    ).agg(
-        {'attended_career_fair_date': 'count'}
-    ).reset_index()
-
-    previous_main_attendances.rename(
-        columns={
-            'attended_career_fair_date': 'attended_main_fair_before',
-        },
-        inplace=True
-    )
-    previous_other_attendances.rename(
-        columns={
-            'attended_career_fair_date': 'attended_other_fair_before',
-        },
-        inplace=True
+    # Step 2.
+    previous_attendances = count_prior_events(
+        rows['stu_id'], rows['career_fair_date'],
+        stu_fair_attendance_df['stu_id'], attendance_dates,
+        weights=np.column_stack([is_main_fair, ~is_main_fair]).astype(int)
+    ) * fairs_on_date(rows, career_fair_df)[:, None]
+
+    data = pd.DataFrame(
+        previous_attendances,
+        columns=['attended_main_fair_before', 'attended_other_fair_before'],
+        index=rows.index
     )
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Fair attendance grouped by '
-          f'student id and career fair date{Style.RESET_ALL}')
-
-    # Step 5.
-    # First we have to ensure career_fair_date is in the same format
-    data['career_fair_date'] = pd.to_datetime(data['career_fair_date'])
-    # Then we can merge the counts with the data
-    data = pd.merge(
-        data, previous_main_attendances,
-        on=['stu_id', 'career_fair_date'],
-        how='left')
-    data = pd.merge(
-        data, previous_other_attendances,
-        on=['stu_id', 'career_fair_date'],
-        how='left')
-
-    data['attended_other_fair_before'] = (
-        data['attended_other_fair_before'].fillna(0))
-    data['attended_main_fair_before'] = (
-        data['attended_main_fair_before'].fillna(0))
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Fair attendance merged with '
-          f'data{Style.RESET_ALL}')
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Fair attendance extracted'
-          f'{Style.RESET_ALL}')
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Fair attendances before '
+          f'career fair date counted{Style.RESET_ALL}')
 
-    # Step 6.
-    data['attended_0_main_fairs_before'] = (
-        data['attended_main_fair_before'].apply(
-            lambda x: 1 if x == 0 else 0))
-    data['attended_1_main_fair_before'] = (
-        data['attended_main_fair_before'].apply(
-            lambda x: 1 if x == 1 else 0))
-    data['attended_2_main_fairs_before'] = (
-        data['attended_main_fair_before'].apply(
-            lambda x: 1 if x == 2 else 0))
-    data['attended_3+_main_fairs_before'] = (
-        data['attended_main_fair_before'].apply(
-            lambda x: 1 if x >= 3 else 0))
-
-    data['attended_0_other_fairs_before'] = (
-        data['attended_other_fair_before'].apply(
-            lambda x: 1 if x == 0 else 0))
-    data['attended_1_other_fairs_before'] = (
-        data['attended_other_fair_before'].apply(
-            lambda x: 1 if x == 1 and x <= 2 else 0))
-    data['attended_2_other_fairs_before'] = (
-        data['attended_other_fair_before'].apply(
-            lambda x: 1 if x == 2 else 0))
-    data['attended_3+_other_fairs_before'] = (
-        data['attended_other_fair_before'].apply(
-            lambda x: 1 if x >= 3 else 0))
+    # Step 3.
+    data = apply_bin_specs(data, fair_history_bin_specs)
 
     data.drop(['attended_main_fair_before', 'attended_other_fair_before'],
               axis=1, inplace=True)
@@ -498,9 +2627,30 @@ def clean_data(
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Fair attendance extracted'
           f'{Style.RESET_ALL}')
 
-    # ===============================================================
-    #                     Event Attendance Cleaning
-    # ===============================================================
+    return data
+
+
+def event_attendance_features(
+    rows: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame,
+    event_categories: list | None = None
+) -> pd.DataFrame:
+    """
+    Converts the number of events of every category every student attended
+      before the career fair date of every row to binary values, and flags
+      the students that attended a career fair prep session for the fair.
+
+    Args:
+        rows (pd.DataFrame): The stu_id and career_fair_date of every row.
+        career_fair_df (pd.DataFrame): The career fair information.
+        stu_event_attendance_df (pd.DataFrame): The event attendances.
+        event_categories (list | None): The event categories to count (see
+          event_category_matrix).
+
+    Returns:
+        pd.DataFrame: The event attendance features of every row.
+    """
     print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting event attendance '
           f'values...{Style.RESET_ALL}')
 
@@ -527,175 +2677,88 @@ def clean_data(
     #   because they are likely to be more relevant to the career fair.
     #
     # Process:
-    #   1. Get the cross product of the event attendances and career fair dates
-    #   2. Filter out the attendances that are after the career fair date
-    #   3. Separate categories into different dataframes
-    #   4. Separate career fair prep sessions into a separate dataframe
-    #   5. For each dataframe, group by student id and career fair date and
-    #      count the number of attendances.
-    #   6. For the career fair prep session dataframe, add a boolean for
-    #      whether that attendance/event is for that upcoming career fair
-    #      (this can be determined as whether the event is within a month)
-    #   7. Merge the counts with the data and fill null values with 0.
-    #   8. Convert the counts to binary values.
+    #   1. Parse the categories of every event once into a multi-hot matrix
+    #      with a column per category
+    #   2. Add a column for career fair prep sessions
+    #   3. Sort each student's events by date and count the events of every
+    #      category before the career fair date of every row in one pass
+    #      (see count_prior_events)
+    #   4. Add a boolean for whether the student attended a career fair prep
+    #      session for that upcoming career fair (a prep session in the
+    #      `career_fair_prep_window_days` before the career fair date)
+    #   5. Convert the counts to binary values.
 
     print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Loading event attendance '
           f'data...{Style.RESET_ALL}')
 
-    stu_event_attendance_df['event_date'] = pd.to_datetime(
-        stu_event_attendance_df['event_date'])
+    event_dates = stu_event_attendance_df['event_date']
 
-    # Convert string list to list type
-    stu_event_attendance_df['event_categories'] = (
-        stu_event_attendance_df['event_categories'].apply(
-            lambda x: (
-                x.lower().strip().split(',') if isinstance(x, str) else []
-            )
-        )
-    )
+    # Step 1. and 2.
+    event_categories, category_matrix = event_category_matrix(
+        stu_event_attendance_df, event_categories)
 
-    all_event_categories = (
-        stu_event_attendance_df['event_categories'].explode().unique())
-    event_categories = set(
-        str(category).strip().lower().replace(' ', '_')
-        for category in all_event_categories
-    )
     print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event categories loaded')
     print(f'{Fore.LIGHTBLACK_EX}      ⓘ {Fore.BLUE} Event Categories: '
           f'{Fore.LIGHTBLACK_EX}{event_categories}{Style.RESET_ALL}')
 
-    print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event attendance data '
-          f'loaded{Style.RESET_ALL}')
-
-    # Step 1.
-    cross_event_attendances = pd.merge(
-        stu_event_attendance_df, simple_cf_df,
-        how='cross')
-    print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Cross product of event '
-          f'attendance and career fair dates created{Style.RESET_ALL}')
-
-    # Step 2.
-    previous_event_attendances = cross_event_attendances[
-        cross_event_attendances['career_fair_date'] >
-        cross_event_attendances['event_date']
-    ]
-    print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Attendances before career '
-          f'fair date extracted{Style.RESET_ALL}')
-
-    # Step 3.
-    print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Separating event attendance '
-          f'by category...{Style.RESET_ALL}')
-    category_dfs = {}
-    for category in event_categories:
-        category_df = previous_event_attendances[
-            previous_event_attendances['event_categories'].apply(
-                lambda x: category in x)
-        ]
-        category_dfs[category] = category_df
-        print(f'{Fore.GREEN}      ✓ {Fore.LIGHTMAGENTA_EX}{category}'
-              f'{Fore.LIGHTCYAN_EX} event attendance separated'
-              f'{Style.RESET_ALL}')
     print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event attendance separated '
           f'by category{Style.RESET_ALL}')
 
-    # Step 4.
-    print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Separating career fair prep '
-          f'sessions...{Style.RESET_ALL}')
+    # Step 3.
+    print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Counting event attendance '
+          f'before career fair dates...{Style.RESET_ALL}')
 
-    career_fair_prep_df = previous_event_attendances[
-        previous_event_attendances['event_name'].apply(
-            lambda x: 'career fair' in str(x).lower())
-    ]
+    previous_events = count_prior_events(
+        rows['stu_id'], rows['career_fair_date'],
+        stu_event_attendance_df['stu_id'], event_dates,
+        weights=category_matrix
+    ) * fairs_on_date(rows, career_fair_df)[:, None]
 
-    category_dfs['cf_prep'] = career_fair_prep_df.copy(deep=True)
-    event_categories.add('cf_prep')
-    # Step 5.
-    print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Grouping event attendance by '
-          f'student id and career fair date...{Style.RESET_ALL}')
-    for category, category_df in category_dfs.items():
-        category_df = category_df.groupby(
-            ['stu_id', 'career_fair_date']
-        ).agg(
-            {'event_date': 'count'}
-        ).reset_index()
-        category_df.rename(
-            columns={'event_date': f'attended_{category}_before'},
-            inplace=True
-        )
-        category_dfs[category] = category_df
-        print(f'{Fore.GREEN}      ✓ {Fore.LIGHTMAGENTA_EX}{category}'
-              f'{Fore.LIGHTCYAN_EX} event attendance grouped by student id'
-              f'and career fair date{Style.RESET_ALL}')
-    print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event attendance grouped '
+    print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event attendance counted '
           f'by student id and career fair date{Style.RESET_ALL}')
 
-    # Step 6.
+    # Step 4.
     print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Adding boolean for career '
           f'fair prep sessions...{Style.RESET_ALL}')
 
-    prep_event_dates = (pd.to_datetime(career_fair_prep_df['career_fair_date']) -
-         pd.to_datetime(career_fair_prep_df['event_date'])).dt.days
-    
-    attended_prep_event = career_fair_prep_df[prep_event_dates <= 60]
-
-    # drop duplicates because we only want to count each prep session once per 
-    #   career fair/student
-    attended_prep_event = attended_prep_event.drop_duplicates(
-        subset=['stu_id', 'career_fair_date'])
+    # The prep sessions of the row's student in the window before the row's
+    #   career fair
+    is_prep_event = category_matrix[:, -1] == 1
+    recent_prep_sessions = count_prior_events(
+        rows['stu_id'], rows['career_fair_date'],
+        stu_event_attendance_df['stu_id'][is_prep_event],
+        event_dates[is_prep_event],
+        window=np.timedelta64(career_fair_prep_window_days, 'D'))
 
     print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Selected relevant career '
-          f'fair prep sessions (within 60 days of career fair date)'
-          f'{Style.RESET_ALL}')
+          f'fair prep sessions (within {career_fair_prep_window_days} days '
+          f'of career fair date){Style.RESET_ALL}')
 
-    data['attended_career_fair_prep'] = (
-        (data['stu_id'].isin(attended_prep_event['stu_id'])) &
-        (data['career_fair_date'].isin(attended_prep_event['career_fair_date']))
-    ).astype(int)
+    attended_career_fair_prep = pd.Series(
+        (recent_prep_sessions > 0).astype(flag_dtype),
+        index=rows.index)
 
     print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Career fair prep sessions '
           f'boolean added{Style.RESET_ALL}')
 
-    # Step 7.
-    print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Merging event attendance '
-          f'with data...{Style.RESET_ALL}')
-    for category, category_df in category_dfs.items():
-        data = pd.merge(
-            data, category_df,
-            on=['stu_id', 'career_fair_date'],
-            how='left')
-        data[f'attended_{category}_before'] = (
-            data[f'attended_{category}_before'].fillna(0))
-        print(f'{Fore.GREEN}      ✓ {Fore.LIGHTMAGENTA_EX}{category}'
-              f'{Fore.LIGHTCYAN_EX} event attendance merged with data'
-              f'{Style.RESET_ALL}')
-    print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event attendance merged '
-          f'with data{Style.RESET_ALL}')
+    # Add all the counts with a single concat
+    event_count_columns = [f'attended_{category}_before'
+                           for category in event_categories]
+    data = pd.concat([
+        attended_career_fair_prep.rename('attended_career_fair_prep'),
+        pd.DataFrame(previous_events, columns=event_count_columns,
+                     index=rows.index)
+    ], axis=1)
 
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Event attendance extracted'
           f'{Style.RESET_ALL}')
 
-    # Step 8.
+    # Step 5.
     print(f'{Fore.LIGHTBLACK_EX}    → {Fore.BLUE}Converting event attendance '
           f'to binary values...{Style.RESET_ALL}')
-    for category in event_categories:
-        data[f'attended_0_past_{category}_events'] = (
-            data[f'attended_{category}_before'].apply(
-                lambda x: 1 if x == 0 else 0))
-        data[f'attended_1_past_{category}_events'] = (
-            data[f'attended_{category}_before'].apply(
-                lambda x: 1 if x == 1 else 0))
-        data[f'attended_2_past_{category}_events'] = (
-            data[f'attended_{category}_before'].apply(
-                lambda x: 1 if x == 2 else 0))
-        data[f'attended_3+_past_{category}_events'] = (
-            data[f'attended_{category}_before'].apply(
-                lambda x: 1 if x >= 3 else 0))
-
-        data.drop([f'attended_{category}_before'],
-                  axis=1, inplace=True)
-        print(f'{Fore.GREEN}      ✓ {Fore.LIGHTMAGENTA_EX}{category}'
-              f'{Fore.LIGHTCYAN_EX} event attendance converted to binary '
-              f'values{Style.RESET_ALL}')
+    data = apply_bin_specs(
+        data, [past_event_bin_spec(category) for category in event_categories])
+    data.drop(event_count_columns, axis=1, inplace=True)
 
     print(f'{Fore.GREEN}      ✓{Fore.LIGHTCYAN_EX} Event attendance converted '
           f'to binary values{Style.RESET_ALL}')
@@ -703,400 +2766,332 @@ def clean_data(
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Event attendance '
           f'extracted{Style.RESET_ALL}')
 
-    # ===============================================================
-    #                      Date Conversion
-    # ===============================================================
+    return data
+
+
+def date_features(
+    rows: pd.DataFrame,
+    student_data: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Converts the time between the career fair date of every row and the
+      student's creation, last login and graduation dates to binary values.
+
+    Args:
+        rows (pd.DataFrame): The stu_id and career_fair_date of every row.
+        student_data (pd.DataFrame): The merged student data, one row per
+          student.
 
+    Returns:
+        pd.DataFrame: The date features of every row.
+    """
     print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Converting dates to binary '
           f'values...{Style.RESET_ALL}')
 
-    # Date between stu_creation_date and career_fair_date
-    data['days_since_created'] = (pd.to_datetime(data['career_fair_date']) -
-                                  pd.to_datetime(data['stu_creation_date'])
-                                  ).dt.days
-    data['created_1_year_pre_cf'] = data['days_since_created'].apply(
-        lambda x: 1 if x <= 365 else 0)
-    data['created_2_years_pre_cf'] = data['days_since_created'].apply(
-        lambda x: 1 if x <= 730 and x > 365 else 0)
-    data['created_3_years_pre_cf'] = data['days_since_created'].apply(
-        lambda x: 1 if x <= 1095 and x > 730 else 0)
-    data['created_4_years_pre_cf'] = data['days_since_created'].apply(
-        lambda x: 1 if x <= 1825 and x > 1095 else 0)
-    data['created_5_years_pre_cf'] = data['days_since_created'].apply(
-        lambda x: 1 if x > 1825 else 0)
-
-    data.drop(['stu_creation_date', 'days_since_created'],
-              axis=1, inplace=True)
+    career_fair_date = rows['career_fair_date']
+    student_rows = broadcast_student_data(rows, student_data[[
+        'stu_id', 'stu_creation_date', 'stu_login_date', 'stu_grad_date']])
+    data = pd.DataFrame(index=rows.index)
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Creation date converted to '
-          f'binary values{Style.RESET_ALL}')
+    # Date between stu_creation_date and career_fair_date
+    data['days_since_created'] = (
+        career_fair_date -
+        student_rows['stu_creation_date']
+    ).dt.days
 
     # Date between stu_login_date and career_fair_date
-    data['days_since_login'] = (pd.to_datetime(data['career_fair_date']) -
-                                pd.to_datetime(data['stu_login_date'])
-                                ).dt.days
-    data['login_7_days_pre_cf'] = data['days_since_login'].apply(
-        lambda x: 1 if x <= 7 else 0)
-    data['login_30_days_pre_cf'] = data['days_since_login'].apply(
-        lambda x: 1 if x <= 30 and x > 7 else 0)
-    data['login_90_days_pre_cf'] = data['days_since_login'].apply(
-        lambda x: 1 if x <= 90 and x > 30 else 0)
-    data['login_90+_days_pre_cf'] = data['days_since_login'].apply(
-        lambda x: 1 if x > 90 else 0)
-
-    data.drop(['stu_login_date', 'days_since_login'], axis=1, inplace=True)
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Login date converted to '
-          f'binary values{Style.RESET_ALL}')
+    data['days_since_login'] = (
+        career_fair_date -
+        student_rows['stu_login_date']
+    ).dt.days
 
     # Date between stu_grad_date and career_fair_date
     data['days_until_grad'] = (
-        pd.to_datetime(data['stu_grad_date']) -
-        pd.to_datetime(data['career_fair_date'])
+        student_rows['stu_grad_date'] -
+        career_fair_date
     ).dt.days
 
-    data['grad_4+_years_pre_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= -1095 else 0)
-    data['grad_3_years_pre_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= -730 and x > -1095 else 0)
-    data['grad_2_years_pre_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= -365 and x > -730 else 0)
-    data['grad_1_year_pre_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= 0 and x > -365 else 0)
-
-    data['grad_1_year_post_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= 365 and x > 0 else 0)
-    data['grad_2_years_post_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= 730 and x > 365 else 0)
-    data['grad_3_years_post_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x <= 1095 and x > 730 else 0)
-    data['grad_4+_years_post_cf'] = data['days_until_grad'].apply(
-        lambda x: 1 if x > 1095 else 0)
+    data = apply_bin_specs(data, date_bin_specs)
 
-    data.drop(['days_until_grad'], axis=1, inplace=True)
-
-    # data.drop(['career_fair_date'], axis=1, inplace=True)
+    data.drop(['days_since_created', 'days_since_login',
+               'days_until_grad'], axis=1, inplace=True)
 
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Creation date converted to '
+          f'binary values{Style.RESET_ALL}')
+    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Login date converted to '
+          f'binary values{Style.RESET_ALL}')
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Graduation date converted to '
           f'binary values{Style.RESET_ALL}')
 
     print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All dates converted to '
           f'binary values{Style.RESET_ALL}')
 
-    # ===============================================================
-    #                       School Year Cleaning
-    # ===============================================================
-
-    # Convert school year to a binary value. stu_school_year is a list
-    #   of school years
-
-    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting student school '
-          f'years...{Style.RESET_ALL}')
-
-    data['stu_school_year'] = data['stu_school_year'].apply(
-        lambda x: x.split(',') if isinstance(x, str) else x
-    )
-    data['stu_school_year'] = data['stu_school_year'].apply(
-        lambda x: x if isinstance(x, list) else []
-    )
-
-    data['is_freshman'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Freshman' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Freshmen {Style.RESET_ALL}')
-    data['is_sophomore'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Sophomore' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Sophomores {Style.RESET_ALL}')
-    data['is_junior'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Junior' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Juniors {Style.RESET_ALL}')
-    data['is_senior'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Senior' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Seniors {Style.RESET_ALL}')
-    data['is_alumni'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Alumni' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Alumni {Style.RESET_ALL}')
-    data['is_masters'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Masters' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Masters Students {Style.RESET_ALL}')
-    data['is_doctorate'] = data['stu_school_year'].apply(
-        lambda x: 1 if 'Doctorate' in x else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}Doctoral Students {Style.RESET_ALL}')
-
-    data.drop(['stu_school_year'], axis=1, inplace=True)
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All School years converted '
-          f'to binary values{Style.RESET_ALL}')
-
-    # ===============================================================
-    #                       College Cleaning
-    # ===============================================================
-
-    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting student '
-          f'colleges...{Style.RESET_ALL}')
+    return data
 
-    # Convert colleges to a list of colleges
 
-    data['stu_colleges'] = data['stu_colleges'].apply(
-        lambda x: x.split(',') if isinstance(x, str) else x
-    )
-    data['stu_colleges'] = data['stu_colleges'].apply(
-        lambda x: x if isinstance(x, list) else []
-    )
+# =============================================================================
+#                           Parallel Cleaning
+# =============================================================================
 
-    # Convert college to a binary value
-
-    business = ['School of Business Admin.']
-    health = ['School of Health Sciences']
-    engineering = ['School of Egr. and Comp. Sci.',
-                   'Arts & Sci and School of Egr', ]
-    education = ['School of Ed. and Human Svcs.']
-    arts = ['College of Arts and Sciences']
-    no_college = ['No College Designated',
-                  'University Programs', 'All Colleges']
-
-    all_colleges = (business + health + engineering +
-                    education + arts + no_college)
-
-    data['is_engineering'] = data['stu_colleges'].apply(
-        lambda x: 1 if any([college in engineering for college in x]) else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}engineering '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['is_business'] = data['stu_colleges'].apply(
-        lambda x: 1 if any([college in business for college in x]) else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}business '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['is_health'] = data['stu_colleges'].apply(
-        lambda x: 1 if any([college in health for college in x]) else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}health '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['is_education'] = data['stu_colleges'].apply(
-        lambda x: 1 if any([college in education for college in x]) else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}education '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['is_arts'] = data['stu_colleges'].apply(
-        lambda x: 1 if any([college in arts for college in x]) else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}arts '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['no_college'] = data['stu_colleges'].apply(
-        lambda x: 1 if any([college in no_college for college in x]) else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}no college '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['multiple_colleges'] = data['stu_colleges'].apply(
-        lambda x: 1 if len(x) > 1 else 0)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}multiple colleges '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
-    data['other_college'] = data['stu_colleges'].apply(
-        lambda x: 0 if any(college in all_colleges for college in x) else 1)
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Extracted '
-          f'{Fore.LIGHTMAGENTA_EX}other colleges '
-          f'{Fore.LIGHTCYAN_EX}binary values{Style.RESET_ALL}')
+# Every cleaning stage is row-local once the attendance tables are known, so
+#   the rows can be cleaned in independent partitions of students. The
+#   partitions and the shared tables are passed to the worker processes as
+#   Arrow IPC streams in shared memory blocks rather than pickled.
 
-    data.drop(['stu_colleges'], axis=1, inplace=True)
+def write_shared_frame(data: pd.DataFrame) -> shared_memory.SharedMemory:
+    """
+    Writes a DataFrame to a new shared memory block as an Arrow IPC stream.
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All colleges converted to '
-          f'binary values{Style.RESET_ALL}')
+    The caller owns the block and has to close and unlink it.
 
-    # ===============================================================
-    #                        Majors Cleaning
-    # ===============================================================
+    Args:
+        data (pd.DataFrame): The data to share. Object columns must hold a
+          single type (plus nulls).
 
-    # Add a column for whether the student has a major that is
-    #   included in the career fair they attended
+    Returns:
+        shared_memory.SharedMemory: The shared memory block.
+    """
+    import pyarrow as pa
 
-    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting student '
-          f'majors...{Style.RESET_ALL}')
+    table = pa.Table.from_pandas(data, preserve_index=False)
 
-    # First ensure that stu_majors only contains lists
+    # Size the block first, then write the stream straight into it
+    size_stream = pa.MockOutputStream()
+    with pa.ipc.new_stream(size_stream, table.schema) as writer:
+        writer.write_table(table)
 
-    data['stu_majors'] = data['stu_majors'].apply(
-        lambda x: x.split(',') if isinstance(x, str) else x
-    )
-    data['stu_majors'] = data['stu_majors'].apply(
-        lambda x: x if isinstance(x, list) else []
-    )
+    block = shared_memory.SharedMemory(create=True,
+                                       size=max(size_stream.size(), 1))
+    block_view = block.buf[:size_stream.size()]
+    block_stream = pa.FixedSizeBufferWriter(pa.py_buffer(block_view))
+    with pa.ipc.new_stream(block_stream, table.schema) as writer:
+        writer.write_table(table)
 
-    # Check if any of the student's majors are included in the career fair's
-    data['cf_has_major'] = data['stu_majors'].apply(
-        lambda x: 1 if any(
-            [major in career_fair_df['career_fair_majors'].values for major in x]) else 0
-    )
+    # The view can only be released once nothing else refers to it
+    del writer, block_stream
+    block_view.release()
 
-    data.drop(['stu_majors'], axis=1, inplace=True)
+    return block
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} All majors converted to '
-          f'binary values{Style.RESET_ALL}')
 
-    # ===============================================================
-    #                       Appointments Cleaning
-    # ===============================================================
+def read_shared_frame(name: str) -> pd.DataFrame:
+    """
+    Reads a DataFrame written by write_shared_frame from a shared memory
+      block, without taking ownership of the block.
 
-    # Convert appointment list to whether or not the student has had
-    #   certain appointment types and drop the original appointment_types
-    #   column since we only need the binary values.
-    #
-    # Appointment Types included: Walk-Ins, Resume Reviews, Career Fair
-    #   Preparation, Career Exploration, Internship/Job Search, and Other.
+    Args:
+        name (str): The name of the shared memory block.
 
-    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Extracting appointment '
-          f'types...{Style.RESET_ALL}')
+    Returns:
+        pd.DataFrame: The data, with nulls in object columns as NaN like
+          read_csv.
+    """
+    import pyarrow as pa
 
-    # First ensure that appointment_types only contains lists of
-    #   lowercase strings
+    block = shared_memory.SharedMemory(name=name)
 
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: x.lower().split(',') if isinstance(x, str) else x
-    )
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: x if isinstance(x, list) else []
-    )
+    block_view = block.buf[:]
+    table = pa.ipc.open_stream(pa.py_buffer(block_view)).read_all()
+    # Copy the columns out of the block, so it can be closed
+    data = table.to_pandas().copy()
 
-    # Walk-Ins
-    data['has_walk_in_appointment'] = data['appointment_types'].apply(
-        lambda x: 1 if any('walk-in' in i for i in x) else 0
-    )
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: [i for i in x if 'walk-in' not in i]
-    )
+    # The view can only be released once nothing else refers to it
+    del table
+    block_view.release()
+    block.close()
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Walk-Ins extracted'
-          f'{Style.RESET_ALL}')
+    object_columns = data.select_dtypes(object).columns
+    data[object_columns] = data[object_columns].fillna(np.nan)
 
-    # Resume Reviews
-    data['has_resume_review_appointment'] = data['appointment_types'].apply(
-        lambda x: 1 if any('resume' in i for i in x) else 0
-    )
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: [i for i in x if 'resume' not in i]
-    )
+    return data
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Resume Reviews extracted'
-          f'{Style.RESET_ALL}')
 
-    # Career Fair Prep
-    data['has_cf_prep_appointment'] = data['appointment_types'].apply(
-        lambda x: 1 if any('career fair' in i for i in x) else 0
-    )
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: [i for i in x if 'career fair' not in i]
-    )
+def clean_shared_partition(
+    rows_name: str,
+    student_data_name: str,
+    table_names: dict
+) -> str:
+    """
+    Cleans a partition of rows in a worker process (see
+      parallel_clean_student_fair_rows).
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Career Fair Prep extracted'
-          f'{Style.RESET_ALL}')
+    Args:
+        rows_name (str): The shared memory block of the partition's rows.
+        student_data_name (str): The shared memory block of the partition's
+          students.
+        table_names (dict): The shared memory block of the career fair, fair
+          attendance and event attendance tables.
 
-    # Career Exploration
-    data['has_career_exploration_appointment'] = (
-        data['appointment_types'].apply(
-            lambda x: 1 if any('career exploration' in i for i in x) else 0
+    Returns:
+        str: The shared memory block of the cleaned partition, owned by the
+          caller.
+    """
+    # The parent process reports the progress
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaned = clean_student_fair_rows(
+            read_shared_frame(rows_name),
+            read_shared_frame(student_data_name),
+            read_shared_frame(table_names['career_fair']),
+            read_shared_frame(table_names['fair_attendance']),
+            read_shared_frame(table_names['event_attendance']),
         )
-    )
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: [i for i in x if 'career exploration' not in i]
-    )
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Career Exploration extracted'
-          f'{Style.RESET_ALL}')
 
-    # Internship/Job Search
-    data['has_job_search_appointment'] = data['appointment_types'].apply(
-        lambda x: 1 if any('internship' in i or 'job' in i for i in x) else 0
-    )
-    data['appointment_types'] = data['appointment_types'].apply(
-        lambda x: [i for i in x if 'internship' not in i and 'job' not in i]
-    )
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Internship/Job Search '
-          f'extracted{Style.RESET_ALL}')
-
-    # Other
-    data['has_other_appointment'] = data['appointment_types'].apply(
-        lambda x: 1 if len(x) > 0 else 0
-    )
-
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Other extracted'
-          f'{Style.RESET_ALL}')
+    # The caller unlinks the block once it has read it
+    block = write_shared_frame(cleaned)
+    block.close()
 
-    # Drop appointment_types since we've extracted the binary values
-    data.drop(['appointment_types'], axis=1, inplace=True)
+    return block.name
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Appointments cleaned'
-          f'{Style.RESET_ALL}')
 
-    # ===============================================================
-    #                          GPA Cleaning
-    # ===============================================================
+def parallel_clean_student_fair_rows(
+    rows: pd.DataFrame,
+    student_data: pd.DataFrame,
+    career_fair_df: pd.DataFrame,
+    stu_fair_attendance_df: pd.DataFrame,
+    stu_event_attendance_df: pd.DataFrame,
+    workers: int
+) -> pd.DataFrame:
+    """
+    Runs clean_student_fair_rows in a pool of worker processes.
 
-    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Cleaning GPA '
-          f'values...{Style.RESET_ALL}')
+    The rows are partitioned by a hash of the stu_id, so all of a student's
+      rows are cleaned by the same worker, which only gets those students'
+      data. Every worker gets the whole career fair and attendance tables, so
+      the result is the same as cleaning the rows in a single process, in the
+      same order.
 
-    data['stu_gpa'] = data['stu_gpa'].apply(
-        lambda x: float(x) if isinstance(x, str) else x
-    )
+    Args:
+        rows (pd.DataFrame): The career fair and registration columns of every
+          row (see build_student_fair_rows).
+        student_data (pd.DataFrame): The merged student data, one row per
+          student.
+        career_fair_df (pd.DataFrame): The career fair information.
+        stu_fair_attendance_df (pd.DataFrame): The career fair attendances.
+        stu_event_attendance_df (pd.DataFrame): The event attendances.
+        workers (int): The number of worker processes and partitions.
 
-    data['no_gpa'] = data['stu_gpa'].apply(
-        lambda x: 1 if pd.isna(x) else 0
-    )
-    data['gpa_1.0'] = data['stu_gpa'].apply(
-        lambda x: 1 if x < 1.0 else 0
-    )
-    data['gpa_1.0-1.5'] = data['stu_gpa'].apply(
-        lambda x: 1 if x >= 1.0 and x < 1.5 else 0
-    )
-    data['gpa_1.5-2.0'] = data['stu_gpa'].apply(
-        lambda x: 1 if x >= 1.5 and x < 2.0 else 0
-    )
-    data['gpa_2.0-2.5'] = data['stu_gpa'].apply(
-        lambda x: 1 if x >= 2.0 and x < 2.5 else 0
-    )
-    data['gpa_2.5-3.0'] = data['stu_gpa'].apply(
-        lambda x: 1 if x >= 2.5 and x < 3.0 else 0
-    )
-    data['gpa_3.0-3.5'] = data['stu_gpa'].apply(
-        lambda x: 1 if x >= 3.0 and x < 3.5 else 0
-    )
-    data['gpa_3.5-4.0'] = data['stu_gpa'].apply(
-        lambda x: 1 if x >= 3.5 else 0
-    )
+    Returns:
+        pd.DataFrame: The cleaned rows.
+    """
+    if workers < 1:
+        raise ValueError(f'workers must be at least 1, got {workers}')
+
+    print(f'{Fore.LIGHTBLACK_EX}  → {Fore.BLUE}Cleaning {len(rows)} rows in '
+          f'{workers} partitions...{Style.RESET_ALL}')
+
+    def partition_of(stu_ids):
+        return (pd.util.hash_pandas_object(stu_ids, index=False).to_numpy()
+                % workers)
+
+    partition = partition_of(rows['stu_id'])
+    student_partition = partition_of(student_data['stu_id'])
+    indexes = [index for index in range(workers)
+               if (partition == index).any()]
+    positions = [np.flatnonzero(partition == index) for index in indexes]
+
+    blocks = []
+    futures = []
+    # The cleaned partitions' blocks are created by the workers and freed
+    #   by this process once read, or once the cleaning failed
+    freed_names = set()
+
+    def free_cleaned_block(name):
+        cleaned_block = shared_memory.SharedMemory(name=name)
+        cleaned_block.close()
+        cleaned_block.unlink()
+        freed_names.add(name)
+
+    try:
+        def share(data):
+            blocks.append(write_shared_frame(data))
+            return blocks[-1].name
+
+        table_names = {
+            'career_fair': share(career_fair_df),
+            'fair_attendance': share(stu_fair_attendance_df),
+            'event_attendance': share(stu_event_attendance_df),
+        }
+        partition_names = [
+            (share(rows.iloc[position]),
+             share(student_data[student_partition == index]))
+            for index, position in zip(indexes, positions)
+        ]
 
-    data.drop(['stu_gpa'], axis=1, inplace=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(clean_shared_partition,
+                                rows_name, student_data_name, table_names)
+                for rows_name, student_data_name in partition_names
+            ]
+
+            # Collect the partitions in order, whichever finishes first
+            cleaned_partitions = []
+            try:
+                for index, future in enumerate(futures):
+                    cleaned_name = future.result()
+                    cleaned_partitions.append(
+                        read_shared_frame(cleaned_name))
+                    free_cleaned_block(cleaned_name)
+
+                    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} Partition '
+                          f'{index + 1}/{len(futures)} cleaned'
+                          f'{Style.RESET_ALL}')
+            except BaseException:
+                # The partitions that haven't started are dropped, the
+                #   running ones are waited for as the pool shuts down
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        # Free the blocks of the partitions the other workers cleaned after
+        #   one of them failed
+        for future in futures:
+            if (future.done() and not future.cancelled() and
+                    future.exception() is None and
+                    future.result() not in freed_names):
+                free_cleaned_block(future.result())
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # Put the rows back in their original order
+    cleaned_data = pd.concat(cleaned_partitions, ignore_index=True)
+    order = np.argsort(np.concatenate(positions), kind='stable')
+    cleaned_data = cleaned_data.take(order)
+    cleaned_data.index = rows.index
 
-    print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} GPA cleaned{Style.RESET_ALL}')
+    return cleaned_data
 
-    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Data cleaned{Style.RESET_ALL}')
 
-    data.drop(['stu_id'], axis=1, inplace=True)
+def to_sparse_features(features: pd.DataFrame) -> sparse.csr_matrix:
+    """
+    Converts the flag features to a CSR matrix, which only stores the set
+      flags. Most of the one-hot columns are 0 on any given row.
 
-    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Data: '
-          f'{Fore.LIGHTBLACK_EX}{len(data)}{Style.RESET_ALL}')
-    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Features: '
-          f'{Fore.LIGHTBLACK_EX}{len(data.columns) - 1}{Style.RESET_ALL}')
+    Args:
+        features (pd.DataFrame): The flag features.
 
-    return data
+    Returns:
+        sparse.csr_matrix: The features, with a column per feature.
+    """
+    return sparse.csr_matrix(features.to_numpy(dtype=flag_dtype))
 
 
-def extract_features_target(data):
+def extract_features_target(data, sparse_output: bool = False):
     """
     Extracts features and target from the given data.
 
     Parameters:
         data (DataFrame): The input data containing features and target.
+        sparse_output (bool): Whether to return the features as a CSR matrix
+          (see to_sparse_features) followed by the feature names.
 
     Returns:
-        features (DataFrame): The extracted features from the data.
+        features (DataFrame | csr_matrix): The extracted features from the
+          data.
         target (Series): The extracted target from the data.
+        feature_names (Index): The name of every feature column, only
+          returned with `sparse_output`.
     """
     print(f'{Fore.MAGENTA}\n  Extracting features and target...'
           f'{Style.RESET_ALL}')
@@ -1113,6 +3108,9 @@ def extract_features_target(data):
     print(f'{Fore.GREEN}  ✓{Fore.LIGHTCYAN_EX} '
           f'Features and target extracted{Style.RESET_ALL}')
 
+    if sparse_output:
+        return to_sparse_features(features), target, features.columns
+
     return features, target
 
 
@@ -1175,8 +3173,10 @@ def align_features(
               f'Features missing from testing data{Style.RESET_ALL}')
         test_data = test_data.reindex(columns=all_features, fill_value=0)
 
-    # Ensure the column are in the same order
-    test_data = test_data[train_data.columns]
+    # Ensure the column are in the same order, the data split from a single
+    #   frame already is
+    if not test_data.columns.equals(train_data.columns):
+        test_data = test_data[train_data.columns]
 
     print(f'{Fore.GREEN}  ✓{Fore.CYAN} {count}{Fore.LIGHTCYAN_EX} Features '
           f'aligned{Style.RESET_ALL}')
@@ -1184,10 +3184,34 @@ def align_features(
     return train_data, test_data
 
 
+def take_row_ranges(
+    data: pd.DataFrame,
+    ranges: list,
+    columns: pd.Index
+) -> pd.DataFrame:
+    """
+    Gets the given columns of the rows in the given ranges of the data.
+
+    Args:
+        data (pd.DataFrame): The data to take the rows from.
+        ranges (list): The slices of the rows, in order.
+        columns (pd.Index): The columns to take.
+
+    Returns:
+        pd.DataFrame: The rows of every range, concatenated.
+    """
+    positions = data.columns.get_indexer(columns)
+    if len(ranges) == 0:
+        return data.iloc[:0, positions]
+    if len(ranges) == 1:
+        return data.iloc[ranges[0], positions]
+    return pd.concat([data.iloc[rows, positions] for rows in ranges])
+
+
 def split_practical_data(data: pd.DataFrame, test_career_fair_name: str):
     """
     Split the given data into training and testing data based on the specified
-      test career fair name.
+      test career fair name. The given data is left as it is.
 
     Parameters:
         data (pd.DataFrame): The input data to be split.
@@ -1201,17 +3225,31 @@ def split_practical_data(data: pd.DataFrame, test_career_fair_name: str):
     print(f'{Fore.BLUE}  Splitting test and training data by '
           f'{Fore.CYAN}{test_career_fair_name}{Style.RESET_ALL}')
 
-    data.drop(
-        columns=['career_fair_date', 'stu_grad_date'],
-        axis=1,
-        inplace=True
-    )
-
-    training_data = data[data['career_fair_name'] != test_career_fair_name]
-    testing_data = data[data['career_fair_name'] == test_career_fair_name]
-
-    training_data = training_data.drop(columns=['career_fair_name'], axis=1)
-    testing_data = testing_data.drop(columns=['career_fair_name'], axis=1)
+    columns = data.columns.drop(
+        ['career_fair_name', 'career_fair_date', 'stu_grad_date'])
+
+    slices = fair_slices(data)
+    if slices is not None:
+        # The rows of the fair-sorted data are read a range at a time rather
+        #   than gathered by comparing every row's career_fair_name
+        test_rows = [rows for (name, _), rows in slices.items()
+                     if name == test_career_fair_name]
+        training_rows = []
+        start = 0
+        for rows in test_rows:
+            if rows.start > start:
+                training_rows.append(slice(start, rows.start))
+            start = rows.stop
+        if start < len(data):
+            training_rows.append(slice(start, len(data)))
+
+        training_data = take_row_ranges(data, training_rows, columns)
+        testing_data = take_row_ranges(data, test_rows, columns)
+    else:
+        is_test = (data['career_fair_name'] == test_career_fair_name
+                   ).to_numpy()
+        training_data = data.loc[~is_test, columns]
+        testing_data = data.loc[is_test, columns]
 
     training_data, testing_data = align_features(training_data, testing_data)
 
@@ -1225,7 +3263,8 @@ def split_practical_data(data: pd.DataFrame, test_career_fair_name: str):
 def get_practical_test(
     data: pd.DataFrame,
     test_career_fair_name: str,
-    test_size: float
+    test_size: float,
+    sparse_output: bool = False
 ):
     """
     Prepare practical test data for the Career Fair Attendance Classifier.
@@ -1237,6 +3276,8 @@ def get_practical_test(
           for practical testing.
         test_size (float): The proportion of the data from 0 to 1 to be used
           for testing.
+        sparse_output (bool): Whether to return the features as CSR matrices
+          (see to_sparse_features), followed by the feature names.
 
     Returns:
         tuple: A tuple containing the training and testing data for the
@@ -1249,6 +3290,8 @@ def get_practical_test(
               test data.
             - y_practical_test (pd.Series): The target labels of the practical
               test data.
+            - feature_names (pd.Index): The name of every feature column,
+              only returned with `sparse_output`.
     """
     print(f'{Fore.MAGENTA}\nPreparing practical test data...{Style.RESET_ALL}')
 
@@ -1260,19 +3303,28 @@ def get_practical_test(
 
     features, x_practical_test = align_features(features, x_practical_test)
 
+    feature_names = features.columns
+    if sparse_output:
+        features = to_sparse_features(features)
+        x_practical_test = to_sparse_features(x_practical_test)
+
     x_train, x_test, y_train, y_test = split_data(
         features, target, test_size)
 
     print(f'{Fore.GREEN}✓{Fore.MAGENTA} Practical test data prepared'
           f'{Style.RESET_ALL}')
     print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Training data: '
-          f'{Fore.LIGHTBLACK_EX}{len(x_train)}{Style.RESET_ALL}')
+          f'{Fore.LIGHTBLACK_EX}{x_train.shape[0]}{Style.RESET_ALL}')
     print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Testing data: '
-          f'{Fore.LIGHTBLACK_EX}{len(x_test)}{Style.RESET_ALL}')
+          f'{Fore.LIGHTBLACK_EX}{x_test.shape[0]}{Style.RESET_ALL}')
     print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Practical test data: '
-          f'{Fore.LIGHTBLACK_EX}{len(x_practical_test)}{Style.RESET_ALL}')
+          f'{Fore.LIGHTBLACK_EX}{x_practical_test.shape[0]}{Style.RESET_ALL}')
     print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Features: '
-          f'{Fore.LIGHTBLACK_EX}{len(features.columns)}{Style.RESET_ALL}')
+          f'{Fore.LIGHTBLACK_EX}{len(feature_names)}{Style.RESET_ALL}')
+
+    if sparse_output:
+        return (x_train, x_test, y_train, y_test,
+                x_practical_test, y_practical_test, feature_names)
 
     return x_train, x_test, y_train, y_test, x_practical_test, y_practical_test
 
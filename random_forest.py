@@ -1,15 +1,18 @@
 # =============================================================================
 #                           Load and preprocess data
 # =============================================================================
-import sys
-import time
+import argparse
+import numpy as np
 from colorama import Fore, Style
 from tqdm import tqdm
 from preprocessing import (extract_features_target,
                            get_practical_test, load_data, print_metrics)
+from model_artifact import fingerprint_training_data, save_model
+from model_search import (fit_search, halving_resource, make_search,
+                          print_candidate_timings, search_budget,
+                          search_strategies, shared_training_matrix)
 
-from sklearn.model_selection import GridSearchCV, train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     f1_score,
     mean_squared_error,
@@ -18,32 +21,48 @@ from sklearn.metrics import (
     recall_score
 )
 
+parser = argparse.ArgumentParser(
+    description='Tunes, trains and saves the attendance random forest.')
+# `--sparse` trains on CSR feature matrices, which are smaller to copy to the
+#   search workers
+parser.add_argument('--sparse', action='store_true',
+                    help='Train on CSR feature matrices')
+parser.add_argument('--search', choices=search_strategies, default='grid',
+                    help='The hyperparameter search strategy')
+parser.add_argument('--search-budget', type=int, default=search_budget,
+                    help='The number of candidates of the random, halving '
+                         'and oob searches')
+parser.add_argument('--halving-resource', default=halving_resource,
+                    choices=['n_samples', 'n_estimators'],
+                    help='What the halving search grows every round')
+parser.add_argument('--no-shared-matrix', action='store_true',
+                    help='Hand the search the training frame itself rather '
+                         'than a shared float32 matrix of it')
+args = parser.parse_args()
+sparse_features = args.sparse
+
 cleaned_data = load_data()
 
 (
     x_train, x_test,
     y_train, y_test,
-    x_practical_test, y_practical_test
+    x_practical_test, y_practical_test,
+    *_
 ) = get_practical_test(
     cleaned_data,
     'Winter Career Fair 2024',
-    0.2
+    0.2,
+    sparse_output=sparse_features
 )
 
 # =============================================================================
 #                           Hyperparameter Tuning
 # =============================================================================
 
-param_grid = {
-    'n_estimators': [4],
-    'max_depth': [None],
-    'min_samples_split': [8],
-    'min_samples_leaf': [1]
-}
-
-grid_search = GridSearchCV(
-    RandomForestClassifier(),
-    param_grid,
+search = make_search(
+    args.search,
+    budget=args.search_budget,
+    resource=args.halving_resource,
     cv=5,
     scoring='f1',
     verbose=3,
@@ -52,21 +71,34 @@ grid_search = GridSearchCV(
 )
 
 cleaned_data.drop(
-    columns=['career_fair_name'],
+    columns=['career_fair_name', 'career_fair_date', 'stu_grad_date'],
     axis=1,
     inplace=True
 )
-features, target = extract_features_target(cleaned_data)
+if sparse_features:
+    features, target, feature_names = extract_features_target(
+        cleaned_data, sparse_output=True)
+else:
+    features, target = extract_features_target(cleaned_data)
+    feature_names = features.columns
 x_train, x_val, y_train, y_val = train_test_split(
     features, target, test_size=0.2, random_state=42
 )
 
-grid_search.fit(x_train, y_train)
+if sparse_features or args.no_shared_matrix:
+    fit_search(search, x_train, y_train)
+else:
+    with shared_training_matrix(x_train) as training_matrix:
+        fit_search(search, training_matrix, y_train)
+print_candidate_timings(search)
 
-print(grid_search.best_params_)
+print(search.best_params_)
 
-best_model = RandomForestClassifier(**grid_search.best_params_)
-best_model.fit(x_train, y_train)
+# The search already refitted the best candidate on all the training data
+best_model = search.best_estimator_
+if not hasattr(best_model, 'feature_names_in_') and not sparse_features:
+    # The shared matrix has no column names, the frames it was built from do
+    best_model.feature_names_in_ = np.asarray(feature_names, dtype=object)
 
 # Evalute on validation data
 
@@ -84,6 +116,11 @@ positive_predicted = sum(y_pred)
 print_metrics(mse, accuracy, f1, recall, precision)
 print(f"  Total positive predicted: {positive_predicted}")
 
+metrics = {'validation': {
+    'mse': mse, 'accuracy': accuracy, 'f1': f1, 'recall': recall,
+    'precision': precision, 'positive_predicted': int(positive_predicted),
+}}
+
 # Evaluate on practical data
 
 print(Fore.CYAN + "\nPractical test results:" + Style.RESET_ALL)
@@ -101,6 +138,20 @@ print_metrics(mse, accuracy, f1, recall, precision)
 
 print(f"  Total positive predicted: {positive_predicted}")
 
+metrics['practical_test'] = {
+    'mse': mse, 'accuracy': accuracy, 'f1': f1, 'recall': recall,
+    'precision': precision, 'positive_predicted': int(positive_predicted),
+}
+
+# Save the model with its feature list, so it can score without refitting
+
+save_model(
+    best_model,
+    feature_names,
+    fingerprint_training_data(x_train, y_train),
+    metrics
+)
+
 # Print the feature ranking
 
 importances = best_model.feature_importances_
@@ -126,6 +177,6 @@ for f in range(x_train.shape[1]):
         name_color = Fore.MAGENTA
 
     print(f'{Fore.LIGHTBLACK_EX}{f+1: >4}'
-          f'{name_color}{features.columns[indices[f]]: >40} '
+          f'{name_color}{feature_names[indices[f]]: >40} '
           f'{val_color}{importances[indices[f]]: >10.5f}'
           f'{Style.RESET_ALL}')
\ No newline at end of file
@@ -0,0 +1,292 @@
+# =============================================================================
+#                           Score an Upcoming Career Fair
+# =============================================================================
+#
+# Predicts the probability of every student attending a career fair with a
+#   model saved by `random_forest.py`, without retraining it. The fair has to
+#   be in `career_fair_data.csv`, but doesn't need any registrations yet.
+#
+# Usage:
+#   python score.py "Fall Career Fair 2025"
+#   python score.py "Fall Career Fair 2025" --date 2025-09-17 \
+#       --output data/fall_2025_scores.parquet --chunk-size 20000
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+from colorama import Fore, Style
+
+from model_artifact import load_model, model_path, select_model_features
+from preprocessing import (build_student_fair_rows, clean_student_fair_rows,
+                           data_directory, event_category_matrix,
+                           merge_student_data, raw_file_names,
+                           read_raw_files)
+
+# Every chunk of students is built, cleaned and scored at once, so the
+#   memory used grows with the chunk size rather than with the roster
+score_chunk_size = 10_000
+
+score_columns = ['stu_id', 'career_fair_name', 'career_fair_date',
+                 'attendance_probability']
+
+
+def find_career_fair(
+    career_fair_df: pd.DataFrame,
+    name: str,
+    date: str | None = None
+) -> pd.DataFrame:
+    """
+    Finds a career fair in the career fair data by name, and date when more
+      than one fair has the name.
+
+    Args:
+        career_fair_df (pd.DataFrame): The career fair information.
+        name (str): The career_fair_name.
+        date (str | None): The career_fair_date, e.g. '2025-09-17'.
+
+    Returns:
+        pd.DataFrame: The career fair's row of the career fair data.
+    """
+    fair = career_fair_df[career_fair_df['career_fair_name'] == name]
+    if date is not None:
+        fair = fair[fair['career_fair_date'] == pd.Timestamp(date)]
+
+    if len(fair) == 0:
+        raise ValueError(f'No career fair named {name!r}'
+                         + (f' on {date}' if date is not None else '')
+                         + ' in the career fair data')
+    if len(fair) > 1:
+        dates = ', '.join(f'{fair_date:%Y-%m-%d}'
+                          for fair_date in fair['career_fair_date'])
+        raise ValueError(f'More than one career fair named {name!r} '
+                         f'({dates}), pick one with its date')
+
+    return fair
+
+
+class StudentRows:
+    """
+    Finds the rows of a set of students in a table by binary search. The
+      rows are sorted by stu_id once, so every chunk of students only costs
+      its own rows rather than a scan of the whole table.
+
+    Args:
+        data (pd.DataFrame): The table, with a stu_id column.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        stu_ids = data['stu_id'].to_numpy()
+        self.data = data
+        self.order = np.argsort(stu_ids, kind='stable')
+        self.sorted_ids = stu_ids[self.order]
+
+    def of(self, stu_ids) -> pd.DataFrame:
+        """
+        Gets the rows of the given students, in the order of the table.
+        """
+        stu_ids = np.unique(np.asarray(stu_ids))
+        starts = np.searchsorted(self.sorted_ids, stu_ids, side='left')
+        lengths = np.searchsorted(self.sorted_ids, stu_ids,
+                                  side='right') - starts
+        # The positions of every student's range of sorted rows, end to end
+        ends = np.cumsum(lengths)
+        sorted_positions = (np.repeat(starts - ends + lengths, lengths)
+                            + np.arange(ends[-1] if len(ends) else 0))
+        return self.data.iloc[np.sort(self.order[sorted_positions])]
+
+
+def fair_feature_chunks(
+    feature_names: list,
+    raw_data: dict,
+    fair: pd.DataFrame,
+    chunk_size: int = score_chunk_size
+):
+    """
+    Builds the features of every student for a single career fair,
+      `chunk_size` students at a time.
+
+    Every chunk only cleans the attendances of its own students, which are
+      found in the student and attendance tables sorted by stu_id once (see
+      StudentRows). The event categories are taken from every event once, so
+      every chunk has the same feature columns as the whole roster.
+
+    Args:
+        feature_names (list): The ordered feature list of the model.
+        raw_data (dict): The raw data, keyed by name.
+        fair (pd.DataFrame): The career fair (see find_career_fair).
+        chunk_size (int): The number of students per chunk.
+
+    Yields:
+        tuple: The stu_id and career fair of every row of a chunk, and the
+          features of the rows in the model's order.
+    """
+    if chunk_size < 1:
+        raise ValueError(f'chunk_size must be at least 1, got {chunk_size}')
+
+    student_df = raw_data['student_data']
+    student_data = merge_student_data(
+        student_df, raw_data['student_counts_1'],
+        raw_data['student_counts_2'], raw_data['appointment_data'])
+    event_attendance = raw_data['student_event_attendance']
+    event_categories, _ = event_category_matrix(event_attendance)
+
+    student_rows = StudentRows(student_data)
+    fair_attendance_rows = StudentRows(raw_data['student_fair_attendance'])
+    event_attendance_rows = StudentRows(event_attendance)
+
+    for start in range(0, len(student_df), chunk_size):
+        students = student_df.iloc[start:start + chunk_size]
+        rows = build_student_fair_rows(
+            students, raw_data['career_fair_data'],
+            raw_data['registration_data'], fair)
+
+        stu_ids = students['stu_id'].to_numpy()
+        cleaned = clean_student_fair_rows(
+            rows, student_rows.of(stu_ids), raw_data['career_fair_data'],
+            fair_attendance_rows.of(stu_ids),
+            event_attendance_rows.of(stu_ids), event_categories[:-1])
+
+        yield (rows[score_columns[:-1]],
+               select_model_features(cleaned, feature_names))
+
+
+def score_fair_chunks(
+    model,
+    feature_names: list,
+    raw_data: dict,
+    fair: pd.DataFrame,
+    chunk_size: int = score_chunk_size
+):
+    """
+    Predicts the attendance of every student at a single career fair,
+      `chunk_size` students at a time (see fair_feature_chunks).
+
+    Args:
+        model (RandomForestClassifier): The fitted model.
+        feature_names (list): The ordered feature list of the model.
+        raw_data (dict): The raw data, keyed by name.
+        fair (pd.DataFrame): The career fair to score (see find_career_fair).
+        chunk_size (int): The number of students per chunk.
+
+    Yields:
+        pd.DataFrame: The stu_id, career fair and attendance probability of
+          every student of a chunk.
+    """
+    attends = list(model.classes_).index(1)
+
+    for keys, features in fair_feature_chunks(feature_names, raw_data, fair,
+                                              chunk_size):
+        if not hasattr(model, 'feature_names_in_'):
+            # Fitted on CSR matrices (`random_forest.py --sparse`)
+            features = features.to_numpy()
+        scores = keys.copy()
+        scores['attendance_probability'] = (
+            model.predict_proba(features)[:, attends].astype(np.float32))
+
+        yield scores
+
+
+def write_scores(chunks, path: str) -> int:
+    """
+    Writes the scores a chunk at a time, to a Parquet file when the path ends
+      in .parquet and to a csv file otherwise.
+
+    Returns:
+        int: The number of rows written.
+    """
+    rows = 0
+    writer = None
+    start = time.perf_counter()
+    try:
+        for chunk in chunks:
+            if path.endswith('.parquet'):
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(path, mode='w' if rows == 0 else 'a',
+                             header=rows == 0, index=False)
+
+            rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            print(f'{Fore.GREEN}    ✓{Fore.LIGHTCYAN_EX} {rows} rows scored '
+                  f'{Fore.LIGHTBLACK_EX}({rows / elapsed:,.0f} rows/s)'
+                  f'{Style.RESET_ALL}')
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return rows
+
+
+def score_fair(
+    name: str,
+    date: str | None = None,
+    saved_model: str = model_path(),
+    output_path: str | None = None,
+    chunk_size: int = score_chunk_size
+) -> str:
+    """
+    Scores every student for an upcoming career fair with a saved model and
+      writes the attendance probabilities.
+
+    Args:
+        name (str): The career_fair_name of the fair.
+        date (str | None): The career_fair_date, when more than one fair has
+          the name.
+        saved_model (str): The directory of the saved model.
+        output_path (str | None): The .parquet or .csv file to write the
+          scores to, by default a csv file named after the fair in the data
+          directory.
+        chunk_size (int): The number of students to score at once.
+
+    Returns:
+        str: The path the scores were written to.
+    """
+    print(f'{Fore.MAGENTA}\nScoring {name}...{Style.RESET_ALL}')
+    start = time.perf_counter()
+
+    model, metadata = load_model(saved_model)
+    raw_data = read_raw_files(raw_file_names)
+    fair = find_career_fair(raw_data['career_fair_data'], name, date)
+
+    if output_path is None:
+        file_name = (f'{name} {fair["career_fair_date"].iloc[0]:%Y-%m-%d}'
+                     .lower().replace(' ', '_'))
+        output_path = os.path.join(data_directory, f'{file_name}_scores.csv')
+
+    rows = write_scores(
+        score_fair_chunks(model, metadata['feature_names'], raw_data, fair,
+                          chunk_size),
+        output_path)
+
+    elapsed = time.perf_counter() - start
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} {rows} students scored in '
+          f'{elapsed:.1f}s {Fore.LIGHTBLACK_EX}({rows / elapsed:,.0f} rows/s '
+          f'overall), written to {output_path}{Style.RESET_ALL}')
+
+    return output_path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Predicts the attendance of every student at a career '
+                    'fair with a saved model.')
+    parser.add_argument('name', help='The career_fair_name of the fair')
+    parser.add_argument('--date', help='The career_fair_date of the fair, '
+                        'when more than one fair has the name')
+    parser.add_argument('--model', default=model_path(),
+                        help='The directory of the saved model')
+    parser.add_argument('--output', help='The .parquet or .csv file to write '
+                        'the scores to')
+    parser.add_argument('--chunk-size', type=int, default=score_chunk_size,
+                        help='The number of students to score at once')
+    args = parser.parse_args()
+
+    score_fair(args.name, args.date, args.model, args.output,
+               args.chunk_size)
@@ -0,0 +1,408 @@
+# =============================================================================
+#                           Local Prediction Service
+# =============================================================================
+#
+# Serves the probability that a student attends a career fair over HTTP, with
+#   a model saved by `random_forest.py`. The features of every student for
+#   the served fairs are built once at startup (see score.py), and concurrent
+#   requests are coalesced into micro-batches that are predicted with a
+#   single vectorized call of the flattened forest (see forest_inference.py).
+#
+# It only listens on localhost, so it can be load-tested on a dev box.
+#
+# Usage:
+#   python serve.py "Fall Career Fair 2025" ["Winter Career Fair 2026" ...] \
+#       [--date 2025-09-17 2026-02-04 ...]
+#   curl 'http://127.0.0.1:8765/predict?stu_id=1000&fair=Fall+Career+Fair+2025'
+#   curl 'http://127.0.0.1:8765/predict?stu_id=1000&fair=Fall+Career+Fair+2025&date=2025-09-17'
+#   curl 'http://127.0.0.1:8765/stats'
+import argparse
+import asyncio
+import collections
+import datetime
+import functools
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from colorama import Fore, Style
+
+from forest_inference import flat_forest_predict_proba
+from model_artifact import load_flat_model, model_path
+from preprocessing import raw_file_names, read_raw_files
+from score import fair_feature_chunks, find_career_fair, score_chunk_size
+
+serve_host = '127.0.0.1'
+serve_port = 8765
+
+# A batch is predicted as soon as it has `max_batch_size` requests, or
+#   `max_batch_wait_ms` after its first request, whichever comes first
+max_batch_size = 256
+max_batch_wait_ms = 2.0
+
+# The latency percentiles are computed over the most recent requests
+latency_window = 10_000
+
+http_reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+
+def build_feature_table(
+    feature_names: list,
+    raw_data: dict,
+    fairs: list,
+    chunk_size: int = score_chunk_size
+) -> tuple[dict, np.ndarray]:
+    """
+    Builds the features of every student for every served career fair, in a
+      single contiguous uint8 matrix of flags.
+
+    Args:
+        feature_names (list): The ordered feature list of the model.
+        raw_data (dict): The raw data, keyed by name.
+        fairs (list): The served career fairs (see find_career_fair).
+        chunk_size (int): The number of students to build at once.
+
+    Returns:
+        tuple: The row of every (stu_id, career_fair_name, career_fair_date),
+          with the date as 'YYYY-MM-DD', and the features of every row.
+    """
+    keys = []
+    features = []
+    for fair in fairs:
+        for chunk_keys, chunk_features in fair_feature_chunks(
+                feature_names, raw_data, fair, chunk_size):
+            keys.extend(zip(chunk_keys['stu_id'].tolist(),
+                            chunk_keys['career_fair_name'].astype(str),
+                            chunk_keys['career_fair_date'].dt.strftime(
+                                '%Y-%m-%d')))
+            features.append(chunk_features.to_numpy())
+
+    rows = {key: row for row, key in enumerate(keys)}
+    if len(rows) != len(keys):
+        raise ValueError('A career fair is served more than once')
+    return rows, np.ascontiguousarray(np.concatenate(features))
+
+
+class PredictionService:
+    """
+    Answers attendance predictions for the rows of a feature table, batching
+      the concurrent requests.
+
+    Args:
+        predict_proba (callable): Predicts the class probabilities of a
+          matrix of features, e.g. of a flattened forest.
+        classes (array-like): The class of every probability column.
+        rows (dict): The row of every (stu_id, career_fair_name,
+          career_fair_date), with the date as 'YYYY-MM-DD'.
+        features (np.ndarray): The features of every row.
+        batch_size (int): The most requests predicted at once.
+        batch_wait_ms (float): How long a batch waits for more requests.
+    """
+
+    def __init__(
+        self,
+        predict_proba,
+        classes,
+        rows: dict,
+        features: np.ndarray,
+        batch_size: int = max_batch_size,
+        batch_wait_ms: float = max_batch_wait_ms
+    ):
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least 1, got '
+                             f'{batch_size}')
+
+        self.predict_proba = predict_proba
+        self.rows = rows
+        self.features = features
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.attends = list(classes).index(1)
+
+        # The dates of every served fair name, to find the fair of a request
+        #   without a date
+        self.fair_dates = collections.defaultdict(set)
+        for _, fair_name, date in rows:
+            self.fair_dates[fair_name].add(date)
+
+        self.queue = None
+        self.batcher = None
+        self.started = time.perf_counter()
+        self.latencies = collections.deque(maxlen=latency_window)
+        self.counters = collections.Counter()
+
+    def predict_batch(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Predicts the attendance probability of a batch of rows at once.
+        """
+        return self.predict_proba(self.features[rows])[:, self.attends]
+
+    def fair_date(self, fair_name: str, date: str | None) -> str:
+        """
+        Gets the date of a served fair as 'YYYY-MM-DD', the only date it's
+          served on when no date is given.
+
+        Raises:
+            KeyError: When the fair isn't served.
+            ValueError: When the date is malformed, or no date is given and
+              more than one served fair has the name.
+        """
+        if date is not None:
+            try:
+                return datetime.date.fromisoformat(date).isoformat()
+            except ValueError:
+                raise ValueError(f'Expected the date as YYYY-MM-DD, got '
+                                 f'{date!r}') from None
+
+        dates = self.fair_dates.get(fair_name)
+        if not dates:
+            raise KeyError(fair_name)
+        if len(dates) > 1:
+            raise ValueError(f'More than one served career fair named '
+                             f'{fair_name!r} ({", ".join(sorted(dates))}), '
+                             f'pick one with its date')
+        return next(iter(dates))
+
+    async def predict(self, stu_id: int, fair_name: str, date: str) -> float:
+        """
+        Queues a prediction for the next batch and waits for it.
+
+        Raises:
+            KeyError: When the student or fair isn't served.
+        """
+        row = self.rows[(stu_id, fair_name, date)]
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    async def run_batches(self):
+        """
+        Collects the queued requests into batches and predicts them, one
+          batch at a time. The prediction runs in a thread, so requests keep
+          being queued for the next batch meanwhile.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            rows = np.fromiter((row for row, _ in batch), dtype=np.intp,
+                               count=len(batch))
+            try:
+                probabilities = await loop.run_in_executor(
+                    None, self.predict_batch, rows)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            self.counters['batches'] += 1
+            self.counters['batched_requests'] += len(batch)
+            for (_, future), probability in zip(batch, probabilities):
+                if not future.done():
+                    future.set_result(float(probability))
+
+    def stats(self) -> dict:
+        """
+        Gets the latency percentiles and throughput counters.
+        """
+        uptime = time.perf_counter() - self.started
+        latencies = np.array(self.latencies) * 1000
+        batches = self.counters['batches']
+        return {
+            'requests': self.counters['requests'],
+            'errors': self.counters['errors'],
+            'batches': batches,
+            'mean_batch_size': (self.counters['batched_requests'] / batches
+                                if batches else 0),
+            'p50_ms': float(np.percentile(latencies, 50))
+            if len(latencies) else None,
+            'p99_ms': float(np.percentile(latencies, 99))
+            if len(latencies) else None,
+            'requests_per_second': self.counters['requests'] / uptime,
+            'uptime_seconds': uptime,
+        }
+
+    async def respond(self, method: str, target: str) -> tuple[int, dict]:
+        """
+        Answers a request for /predict or /stats.
+
+        Returns:
+            tuple: The status code and the json body.
+        """
+        url = urlsplit(target)
+        if url.path not in ('/predict', '/stats'):
+            return 404, {'error': f'Unknown path {url.path}'}
+        if method != 'GET':
+            return 405, {'error': f'{method} is not supported, use GET'}
+        if url.path == '/stats':
+            return 200, self.stats()
+
+        start = time.perf_counter()
+        self.counters['requests'] += 1
+        query = parse_qs(url.query)
+        try:
+            stu_id = int(query['stu_id'][0])
+            fair_name = query['fair'][0]
+        except (KeyError, ValueError):
+            self.counters['errors'] += 1
+            return 400, {'error': 'Expected an integer stu_id and a fair'}
+
+        try:
+            date = self.fair_date(fair_name, query.get('date', [None])[0])
+            probability = await self.predict(stu_id, fair_name, date)
+        except KeyError:
+            self.counters['errors'] += 1
+            return 404, {'error': f'No prediction for student {stu_id} at '
+                                  f'{fair_name!r}'}
+        except ValueError as error:
+            self.counters['errors'] += 1
+            return 400, {'error': str(error)}
+        except Exception as error:
+            self.counters['errors'] += 1
+            return 500, {'error': str(error)}
+
+        self.latencies.append(time.perf_counter() - start)
+        return 200, {'stu_id': stu_id, 'career_fair_name': fair_name,
+                     'career_fair_date': date,
+                     'attendance_probability': probability}
+
+    async def write_response(self, writer, status: int, body: dict,
+                             keep_alive: bool):
+        content = json.dumps(body).encode()
+        writer.write(
+            f'HTTP/1.1 {status} {http_reasons[status]}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(content)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}'
+            f'\r\n\r\n'.encode() + content)
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Answers the requests of a connection, keeping it open between
+          requests unless the client asks to close it. A request with a body
+          isn't supported, so the connection is closed after it rather than
+          reading its body as the next request.
+        """
+        try:
+            while True:
+                try:
+                    request_line = await reader.readline()
+                    if not request_line:
+                        break
+
+                    headers = {}
+                    while True:
+                        line = await reader.readline()
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                        name, _, value = line.decode('latin-1').partition(
+                            ':')
+                        headers[name.strip().lower()] = value.strip()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # A line longer than the stream's limit
+                    await self.write_response(
+                        writer, 400, {'error': 'Request line or header too '
+                                               'long'}, keep_alive=False)
+                    break
+
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    status, body = 400, {'error': 'Malformed request line'}
+                    keep_alive = False
+                else:
+                    method, target, version = parts
+                    status, body = await self.respond(method, target)
+                    has_body = ('content-length' in headers or
+                                'transfer-encoding' in headers)
+                    keep_alive = (
+                        version == 'HTTP/1.1' and status != 405 and
+                        not has_body and
+                        headers.get('connection', '').lower() != 'close')
+
+                await self.write_response(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = serve_host, port: int = serve_port):
+        """
+        Starts the batching loop and the HTTP server.
+
+        Returns:
+            asyncio.Server: The started server.
+        """
+        self.queue = asyncio.Queue()
+        self.batcher = asyncio.create_task(self.run_batches())
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(service: PredictionService, host: str, port: int):
+    server = await service.start(host, port)
+    print(f'{Fore.GREEN}✓{Fore.MAGENTA} Serving predictions on '
+          f'{Fore.LIGHTBLACK_EX}http://{host}:{port}/predict'
+          f'{Style.RESET_ALL}')
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Serves attendance predictions of a saved model over '
+                    'HTTP on localhost.')
+    parser.add_argument('fairs', nargs='+',
+                        help='The career_fair_name of every served fair')
+    parser.add_argument('--date', nargs='+',
+                        help='The career_fair_date of every served fair, in '
+                             'the same order, e.g. 2025-09-17, to pick fairs '
+                             'that share a name')
+    parser.add_argument('--model', default=model_path(),
+                        help='The directory of the saved model')
+    parser.add_argument('--port', type=int, default=serve_port)
+    parser.add_argument('--batch-size', type=int, default=max_batch_size,
+                        help='The most requests predicted at once')
+    parser.add_argument('--batch-wait-ms', type=float,
+                        default=max_batch_wait_ms,
+                        help='How long a batch waits for more requests')
+    args = parser.parse_args()
+    if args.date is not None and len(args.date) != len(args.fairs):
+        parser.error(f'--date needs a date for each of the '
+                     f'{len(args.fairs)} fairs, got {len(args.date)}')
+
+    forest, metadata = load_flat_model(args.model)
+    raw_data = read_raw_files(raw_file_names)
+    dates = args.date or [None] * len(args.fairs)
+    fairs = [find_career_fair(raw_data['career_fair_data'], name, date)
+             for name, date in zip(args.fairs, dates)]
+
+    print(f'{Fore.MAGENTA}\nBuilding the features of the served fairs...'
+          f'{Style.RESET_ALL}')
+    rows, features = build_feature_table(metadata['feature_names'],
+                                         raw_data, fairs)
+    print(f'{Fore.LIGHTBLACK_EX}  ⓘ {Fore.BLUE} Rows: '
+          f'{Fore.LIGHTBLACK_EX}{len(rows)}{Style.RESET_ALL}')
+
+    asyncio.run(serve(
+        PredictionService(
+            functools.partial(flat_forest_predict_proba, forest),
+            forest['classes'], rows, features, args.batch_size,
+            args.batch_wait_ms),
+        serve_host, args.port))